@@ -1,5 +1,8 @@
 """
 Async client for topn-db FastAPI service.
+
+Both the underlying `httpx.AsyncClient` and the `TopnDbClient` wrapper are
+created on first use (`get_topn_db_client`) rather than at import time.
 """
 
 from typing import Optional
@@ -8,9 +11,11 @@ import httpx
 
 from core.config import settings
 
+from .cache import ResponseCache
 from .topn_db_client import TopnDbClient
 
 _client: Optional[httpx.AsyncClient] = None
+_topn_db_client: Optional[TopnDbClient] = None
 
 
 def get_client() -> httpx.AsyncClient:
@@ -26,12 +31,25 @@ def get_client() -> httpx.AsyncClient:
     return _client
 
 
+def get_topn_db_client() -> TopnDbClient:
+    """Get the global topn-db API client, creating it on first use."""
+    global _topn_db_client
+    if _topn_db_client is None:
+        cache = (
+            ResponseCache(ttls=settings.TOPN_DB_CACHE_TTLS)
+            if settings.TOPN_DB_CACHE_ENABLED
+            else None
+        )
+        _topn_db_client = TopnDbClient(
+            base_url=settings.TOPN_DB_BASE_URL, client=get_client(), cache=cache
+        )
+    return _topn_db_client
+
+
 async def close_client():
     """Close the global async client."""
-    global _client
+    global _client, _topn_db_client
     if _client is not None:
         await _client.aclose()
         _client = None
-
-
-topn_db_client = TopnDbClient(base_url=settings.TOPN_DB_BASE_URL, client=get_client())
+    _topn_db_client = None
@@ -0,0 +1,96 @@
+"""Response cache used by `TopnDbClient` for GET requests.
+
+Entries expire after a per-endpoint TTL (longest matching path prefix wins)
+and are invalidated by prefix when the client performs writes. A
+generation counter guards against a GET that was in flight while a write
+happened repopulating the cache with stale data.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> CacheKey:
+    """Build a cache key from an endpoint and its query parameters."""
+    items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return endpoint, items
+
+
+class ResponseCache:
+    """In-memory TTL cache keyed by endpoint and query parameters."""
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        default_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # Longest prefixes first so the most specific rule wins.
+        self.ttls = dict(sorted(ttls.items(), key=lambda kv: -len(kv[0])))
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        for prefix, ttl in self.ttls.items():
+            if endpoint.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def set(self, key: CacheKey, value: Any, generation: Optional[int] = None) -> None:
+        """Store *value* unless the cache was invalidated since *generation*."""
+        if generation is not None and generation != self.generation:
+            return
+        ttl = self.ttl_for(key[0])
+        if ttl > 0:
+            self._entries[key] = (self._clock() + ttl, value)
+
+    def invalidate(
+        self, prefixes: Iterable[str] = (), contains: Iterable[str] = ()
+    ) -> int:
+        """Drop entries whose endpoint starts with or contains any given string."""
+        prefixes, contains = tuple(prefixes), tuple(contains)
+        stale = [
+            key
+            for key in self._entries
+            if key[0].startswith(prefixes) or any(c in key[0] for c in contains)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.generation += 1
+        self.invalidations += 1
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
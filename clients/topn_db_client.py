@@ -1,24 +1,110 @@
+import contextlib
+import json
+import re
 from logging import getLogger
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set
 
 import httpx
 
+from tools.utils.single_flight import SingleFlight
+
+from .cache import ResponseCache, make_key
+
 logger = getLogger(__name__)
 
+_ARRAY_START = re.compile(r'"items"\s*:\s*\[')
+_WHITESPACE = " \t\r\n,"
+
+
+class JsonItemsStream:
+    """Incremental parser for the ``items`` array of a JSON response.
+
+    Text is fed chunk by chunk; complete array elements are decoded and
+    returned as soon as they are available and dropped from the buffer, so
+    memory stays proportional to a single element rather than the response.
+    A bare top-level array is accepted as well.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._in_array = False
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        if self.done:
+            return []
+        self._buffer += text
+        if not self._in_array and not self._seek_array():
+            return []
+
+        items: List[Any] = []
+        pos = 0
+        buffer = self._buffer
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                pos = len(buffer)
+                break
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Element not complete yet; wait for the next chunk.
+                break
+            items.append(item)
+        self._buffer = buffer[pos:]
+        return items
+
+    def _seek_array(self) -> bool:
+        stripped = self._buffer.lstrip()
+        if stripped.startswith("["):
+            self._buffer = stripped[1:]
+            self._in_array = True
+            return True
+        match = _ARRAY_START.search(self._buffer)
+        if match is None:
+            # Keep a tail in case the key is split across chunks.
+            self._buffer = self._buffer[-32:]
+            return False
+        self._buffer = self._buffer[match.end() :]
+        self._in_array = True
+        return True
+
+
+# Cached endpoint prefixes to drop after a successful write to a resource.
+_INVALIDATION_RULES = {
+    "/api/v1/tasks": {"prefixes": ("/api/v1/tasks",), "contains": ()},
+    "/api/v1/items": {"prefixes": ("/api/v1/items",), "contains": ("/items-to-send",)},
+}
+
 
 class TopnDbClient:
     """Client for communicating with the OLX Database API."""
 
-    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None):
+    def __init__(
+        self,
+        base_url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         """Initialize the database client.
 
         Args:
             base_url: Base URL of the database API
             client: Optional httpx.AsyncClient instance. If not provided, a new one will be created.
+            cache: Optional response cache. When set, GET responses are cached
+                with per-endpoint TTLs, identical in-flight GETs are coalesced
+                and writes invalidate the related cached resources.
         """
         self.base_url = base_url.rstrip("/")
         self.client = client or httpx.AsyncClient()
         self._own_client = client is None
+        self.cache = cache
+        self._inflight = SingleFlight(memoize=False)
 
     async def __aenter__(self):
         return self
@@ -33,6 +119,47 @@ class TopnDbClient:
         endpoint: str,
         json_data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Make an HTTP request to the API, going through the cache if enabled.
+
+        Cached responses are shared between callers and must not be mutated.
+        """
+        if self.cache is None:
+            return await self._send(method, endpoint, json_data, params, headers)
+
+        if method == "GET":
+            key = make_key(endpoint, params)
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+            generation = self.cache.generation
+
+            async def fetch():
+                data = await self._send(method, endpoint, json_data, params, headers)
+                self.cache.set(key, data, generation=generation)
+                return data
+
+            return await self._inflight.do(key, fetch)
+
+        data = await self._send(method, endpoint, json_data, params, headers)
+        self._invalidate_for(endpoint)
+        return data
+
+    def _invalidate_for(self, endpoint: str) -> None:
+        for resource, rule in _INVALIDATION_RULES.items():
+            if endpoint.startswith(resource):
+                self.cache.invalidate(rule["prefixes"], rule["contains"])
+                return
+        self.cache.clear()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
         """Make an HTTP request to the API.
 
@@ -41,6 +168,7 @@ class TopnDbClient:
             endpoint: API endpoint (without base URL)
             json_data: JSON data to send in request body
             params: Query parameters
+            headers: Extra request headers
 
         Returns:
             Response data as dictionary
@@ -50,11 +178,11 @@ class TopnDbClient:
         """
         url = f"{self.base_url}{endpoint}"
 
-        logger.debug(f"Making {method} request to {url}")
+        logger.debug("Making %s request to %s", method, url)
 
         try:
             response = await self.client.request(
-                method=method, url=url, json=json_data, params=params
+                method=method, url=url, json=json_data, params=params, headers=headers
             )
             response.raise_for_status()
 
@@ -66,13 +194,51 @@ class TopnDbClient:
 
         except httpx.HTTPStatusError as e:
             logger.error(
-                f"HTTP error {e.response.status_code} for {method} {url}: {e.response.text}"
+                "HTTP error %s for %s %s: %s",
+                e.response.status_code,
+                method,
+                url,
+                e.response.text,
             )
             raise
         except Exception as e:
-            logger.error(f"Request failed for {method} {url}: {str(e)}")
+            logger.error("Request failed for %s %s: %s", method, url, e)
             raise
 
+    async def _stream_items(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the ``items`` array of a response, decoding it incrementally.
+
+        Raises:
+            httpx.HTTPStatusError: If the request fails
+        """
+        url = f"{self.base_url}{endpoint}"
+
+        logger.debug("Streaming %s request to %s", method, url)
+
+        async with self.client.stream(method, url, params=params) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                logger.error(
+                    "HTTP error %s for %s %s: %s",
+                    response.status_code,
+                    method,
+                    url,
+                    response.text,
+                )
+                response.raise_for_status()
+
+            parser = JsonItemsStream()
+            async for chunk in response.aiter_text():
+                for item in parser.feed(chunk):
+                    yield item
+                if parser.done:
+                    break
+
     # ==================== API Root & Health ====================
 
     async def get_api_root(self) -> Dict[str, Any]:
@@ -150,6 +316,96 @@ class TopnDbClient:
         params = {"source_url": source_url, "limit": limit}
         return await self._make_request("GET", "/api/v1/items/by-source", params=params)
 
+    async def iter_items_by_source_url(
+        self,
+        source_url: str,
+        fields: Sequence[str] = ("id", "item_url"),
+        page_size: int = 1000,
+        fallback_limit: int = 10000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over items of a source URL with projection and keyset paging.
+
+        Only *fields* are requested, pages are fetched with an ``after_id``
+        cursor (the id of the last item of the previous page) and each page
+        body is parsed as a stream, so peak memory does not grow with the
+        number of stored items. Iteration stops on a short page or when the
+        cursor does not advance.
+
+        A server that returns fields that were not requested, or a page
+        starting at or before the cursor, does not support this protocol;
+        the items are then read with one plain request of up to
+        *fallback_limit* items, skipping those already yielded.
+        """
+        fields = list(fields)
+        if "id" not in fields:
+            fields.append("id")
+        requested = set(fields)
+        yielded_ids: Set[Any] = set()
+        after_id = None
+        while True:
+            params: Dict[str, Any] = {
+                "source_url": source_url,
+                "limit": page_size,
+                "fields": ",".join(fields),
+            }
+            if after_id is not None:
+                params["after_id"] = after_id
+
+            count = 0
+            last_id = None
+            unsupported = False
+            async with contextlib.aclosing(
+                self._stream_items("GET", "/api/v1/items/by-source", params=params)
+            ) as items:
+                async for item in items:
+                    if count == 0 and not self._honours_paging(
+                        item, requested, after_id
+                    ):
+                        unsupported = True
+                        break
+                    count += 1
+                    last_id = item.get("id", last_id)
+                    yielded_ids.add(last_id)
+                    yield item
+
+            if unsupported:
+                logger.warning(
+                    "topn-db ignored fields/after_id for %s; "
+                    "reading up to %s items in one request",
+                    source_url,
+                    fallback_limit,
+                )
+                response = await self.get_items_by_source_url(
+                    source_url, limit=fallback_limit
+                )
+                for item in response.get("items", []):
+                    if item.get("id") is None or item["id"] not in yielded_ids:
+                        yield item
+                return
+            if count < page_size or last_id is None or last_id == after_id:
+                return
+            after_id = last_id
+
+    @staticmethod
+    def _honours_paging(
+        item: Dict[str, Any], requested: Set[str], after_id: Any
+    ) -> bool:
+        """Whether the first item of a page shows projection and cursor work."""
+        if not set(item) <= requested:
+            return False
+        item_id = item.get("id")
+        return after_id is None or item_id is None or item_id > after_id
+
+    async def iter_item_urls_by_source_url(
+        self, source_url: str, page_size: int = 1000
+    ) -> AsyncIterator[str]:
+        """Iterate over the ``item_url`` of every item stored for *source_url*."""
+        async for item in self.iter_items_by_source_url(
+            source_url, fields=("id", "item_url"), page_size=page_size
+        ):
+            if item.get("item_url"):
+                yield item["item_url"]
+
     async def get_recent_items(
         self, hours: int = 24, limit: int = 100
     ) -> Dict[str, Any]:
@@ -165,9 +421,26 @@ class TopnDbClient:
         """Get item by URL."""
         return await self._make_request("GET", f"/api/v1/items/by-url/{item_url}")
 
-    async def create_item(self, item_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new item record."""
-        return await self._make_request("POST", "/api/v1/items/", json_data=item_data)
+    async def create_item(
+        self, item_data: Dict[str, Any], idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a new item record.
+
+        Args:
+            item_data: Item fields
+            idempotency_key: Sent as ``Idempotency-Key`` so a retried write is
+                recognised as the same request
+        """
+        if idempotency_key is None:
+            return await self._make_request(
+                "POST", "/api/v1/items/", json_data=item_data
+            )
+        return await self._make_request(
+            "POST",
+            "/api/v1/items/",
+            json_data=item_data,
+            headers={"Idempotency-Key": idempotency_key},
+        )
 
     async def delete_item_by_id(self, item_id: int) -> Dict[str, Any]:
         """Delete item by ID."""
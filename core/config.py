@@ -1,13 +1,17 @@
 """Define configuration settings using Pydantic and manage environment variables."""
 
 from logging import getLogger
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from pydantic import ValidationInfo, field_validator
+from pydantic import PrivateAttr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+
+    from tools.processing.llm_pool import LLMPool
+
 logger = getLogger(__name__)
 
 load_dotenv("dev.env")
@@ -22,29 +26,200 @@ class Settings(BaseSettings):
 
     TOPN_DB_BASE_URL: str
 
+    # topn-db response cache (TTL in seconds per endpoint prefix)
+    TOPN_DB_CACHE_ENABLED: bool = False
+    TOPN_DB_CACHE_TTLS: Dict[str, float] = {
+        "/api/v1/tasks": 5.0,
+        "/api/v1/items": 2.0,
+    }
+
     # Model Configuration
     GROQ_API_KEY: Optional[str] = None
     GROQ_MODEL_NAME: Optional[str] = None
-
-    GENERATIVE_MODEL: Optional[ChatGroq] = None
+    # Optional pool of models used instead of the single Groq model, e.g.
+    # [{"model": "llama-3.1-8b-instant", "api_key": "...", "weight": 2,
+    #   "requests_per_minute": 30}, {"provider": "openai", "model": "...",
+    #   "base_url": "...", "api_key": "...", "max_concurrency": 4}]
+    LLM_POOL: List[Dict[str, Any]] = []
+    LLM_POOL_COOLDOWN_SECONDS: float = 30
 
     CYCLE_FREQUENCY_SECONDS: int = 10
+    # Upper bound for one scraping cycle; URLs not reached in time are
+    # cancelled and scraped first in the next cycle. 0 disables the deadline.
+    CYCLE_DEADLINE_SECONDS: float = 120
 
     DEFAULT_LAST_MINUTES_GETTING: int = 45
 
-    @field_validator("GENERATIVE_MODEL")
-    def generative_model(
-        cls, value: Optional[ChatGroq], info: ValidationInfo
-    ) -> Optional[ChatGroq]:
-        env_data = info.data
-
-        model_name = env_data.get("GROQ_MODEL_NAME")
-        api_key = env_data.get("GROQ_API_KEY")
-
-        if model_name:
-            return ChatGroq(model_name=model_name, api_key=api_key)
-        else:
+    # Rule-based description extraction (LLM fast path)
+    RULE_EXTRACTOR_ENABLED: bool = True
+    RULE_EXTRACTOR_MIN_CONFIDENCE: float = 0.85
+    # LLM summaries kept in memory (and in the state snapshot)
+    SUMMARY_CACHE_SIZE: int = 2000
+
+    # OLX egress pool: proxy URLs, per-egress request budget and cooldown
+    # after 403/429 answers (shorter when the direct connection is the only
+    # egress, as it would pause all scraping)
+    OLX_PROXIES: List[str] = []
+    OLX_EGRESS_INCLUDE_DIRECT: bool = True
+    OLX_EGRESS_REQUESTS_PER_MINUTE: int = 300
+    OLX_EGRESS_COOLDOWN_SECONDS: int = 300
+    OLX_EGRESS_SOLE_COOLDOWN_SECONDS: int = 30
+
+    # Adaptive (AIMD) concurrency for OLX requests and URL workers
+    OLX_CONCURRENCY_INITIAL: int = 2
+    OLX_CONCURRENCY_MAX: int = 8
+    OLX_CONCURRENCY_LATENCY_TARGET_SECONDS: float = 3.0
+
+    # Hedged OLX requests: a backup request is sent when a search or detail
+    # page is slower than the given latency percentile, for at most
+    # OLX_HEDGE_MAX_RATIO of requests.
+    OLX_HEDGING_ENABLED: bool = False
+    OLX_HEDGE_PERCENTILE: float = 0.95
+    OLX_HEDGE_MIN_DELAY_SECONDS: float = 0.25
+    OLX_HEDGE_MAX_RATIO: float = 0.1
+
+    # Summary route per OLX category path (longest prefix wins):
+    # "llm:<prompt>" (see prompts.SUMMARY_PROMPTS), "rules" (rule extractor
+    # only) or "none" (no summary and no detail page download). Listings of
+    # uncategorised searches are routed by their breadcrumb.
+    SUMMARY_ROUTES: Dict[str, str] = {
+        "nieruchomosci/mieszkania/wynajem": "llm:apartment",
+        "nieruchomosci/stancje-pokoje": "llm:apartment",
+        "nieruchomosci/domy/wynajem": "llm:apartment",
+        "nieruchomosci": "rules",
+        "antyki-i-kolekcje": "none",
+        "dla-dzieci": "none",
+        "dom-ogrod": "none",
+        "elektronika": "none",
+        "moda": "none",
+        "motoryzacja": "none",
+        "muzyka-edukacja": "none",
+        "oddam-za-darmo": "none",
+        "rolnictwo": "none",
+        "sport-hobby": "none",
+        "zdrowie-i-uroda": "none",
+        "zwierzeta": "none",
+    }
+    SUMMARY_ROUTE_DEFAULT: str = "rules"
+    # Re-posted listings (same title, price, location and photo as a recent
+    # one) reuse its description and summary instead of a detail fetch
+    REPOST_FINGERPRINT_ENABLED: bool = True
+    REPOST_FINGERPRINT_TTL_HOURS: float = 168
+    REPOST_FINGERPRINT_MAX_ENTRIES: int = 5000
+    # Check rewritten high-resolution image URLs with a HEAD request
+    IMAGE_URL_VERIFY: bool = True
+
+    # Startup
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Retention cleanup of old items (one replica at a time, off-peak)
+    RETENTION_ENABLED: bool = False
+    RETENTION_DAYS: int = 30
+    RETENTION_INTERVAL_HOURS: float = 24
+    RETENTION_WINDOW: Optional[str] = "02:00-05:00"
+    RETENTION_PAUSE_SECONDS: float = 30
+    RETENTION_LOCK_DSN: Optional[str] = None
+    RETENTION_LOCK_FILE: Optional[str] = None
+
+    # Memory: soft RSS ceiling (0 = none) and optional tracemalloc snapshots
+    MEMORY_SOFT_LIMIT_MB: float = 0
+    MEMORY_TRACEMALLOC_ENABLED: bool = False
+    MEMORY_SNAPSHOT_EVERY_CYCLES: int = 10
+
+    # Warm restart: local state snapshot (disabled without a path) and how
+    # often the per-source lists of stored item URLs are re-read from topn-db.
+    # 0 re-reads them every cycle, which keeps dedup exact when several
+    # replicas share tasks, but then no list is cached or snapshotted and
+    # the first cycle after a restart still reads every source from topn-db.
+    # Skipping those reads needs opting in: single-replica workers using the
+    # snapshot should set a refresh interval (e.g. 600).
+    STATE_SNAPSHOT_PATH: Optional[str] = None
+    STATE_SNAPSHOT_INTERVAL_SECONDS: float = 60
+    STATE_SNAPSHOT_MAX_AGE_SECONDS: float = 3600
+    SEEN_URLS_REFRESH_SECONDS: float = 0
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {"httpx": "WARNING", "httpcore": "WARNING"}
+    LOG_FORMAT: str = "json"
+    LOG_RATE_LIMIT_PER_MINUTE: int = 60
+
+    # Item persistence: with OUTBOX_PATH set, new items are committed to a
+    # local SQLite outbox and forwarded to topn-db in the background.
+    # Records that fail OUTBOX_MAX_ATTEMPTS times, or are rejected outright
+    # (4xx), are kept as dead letters until the item is scraped again.
+    OUTBOX_PATH: Optional[str] = None
+    OUTBOX_FLUSH_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 20
+
+    # Where item records are written: "topn-db" (HTTP API) or "postgres"
+    # (bulk COPY / multi-row upserts into DATABASE_URL, skipping item URLs
+    # already stored)
+    ITEM_SINK: str = "topn-db"
+    DATABASE_URL: Optional[str] = None
+    POSTGRES_ITEM_TABLE: str = "items"
+    POSTGRES_ITEM_COLUMNS: List[str] = [
+        "item_url",
+        "source_url",
+        "title",
+        "price",
+        "location",
+        "created_at",
+        "created_at_pretty",
+        "image_url",
+        "description",
+        "source",
+        "first_seen",
+        "summary_price",
+        "summary_deposit",
+        "summary_animals_allowed",
+        "summary_rent",
+        "repost_of",
+    ]
+    POSTGRES_COPY_THRESHOLD: int = 200
+
+    # New-item events: redis://..., http(s)://... (webhook) or memory://
+    EVENT_SINK_URL: Optional[str] = None
+    EVENT_STREAM_NAME: str = "olx:new-items"
+    EVENT_SINK_TIMEOUT_SECONDS: float = 5
+
+    _generative_model: Any = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def require_model_name(self) -> "Settings":
+        if not self.GROQ_MODEL_NAME and not self.LLM_POOL:
             raise ValueError("GROQ_MODEL_NAME must be set")
+        return self
+
+    @property
+    def GENERATIVE_MODEL(self) -> Optional[Union["ChatGroq", "LLMPool"]]:
+        """Chat model used for summaries, built on first access.
+
+        Constructing `ChatGroq` imports langchain, which dominates the worker's
+        import time, so it is deferred until a summary is actually needed (or
+        until the startup warm-up in `main.py`). With ``LLM_POOL`` configured
+        this is an `LLMPool` spreading calls over its members.
+        """
+        if self._generative_model is None and self.LLM_POOL:
+            from tools.processing.llm_pool import build_llm_pool
+
+            logger.info("Initialising LLM pool of %s models", len(self.LLM_POOL))
+            self._generative_model = build_llm_pool(
+                self.LLM_POOL, cooldown_seconds=self.LLM_POOL_COOLDOWN_SECONDS
+            )
+        if self._generative_model is None:
+            from langchain_groq import ChatGroq
+
+            logger.info("Initialising generative model %s", self.GROQ_MODEL_NAME)
+            self._generative_model = ChatGroq(
+                model_name=self.GROQ_MODEL_NAME, api_key=self.GROQ_API_KEY
+            )
+        return self._generative_model
+
+    @GENERATIVE_MODEL.setter
+    def GENERATIVE_MODEL(self, value: Any) -> None:
+        self._generative_model = value
 
 
 settings = Settings()
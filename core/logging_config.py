@@ -0,0 +1,154 @@
+"""Logging setup for the worker.
+
+Records are handed to a `QueueHandler`, so the event loop only pays for
+putting a record on an in-memory queue; a `QueueListener` thread formats
+them (as JSON by default) and writes to stdout. Repetitive INFO/DEBUG
+messages are rate-limited per call site before they are queued, and levels
+can be set per logger.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+# Attributes every LogRecord has; anything else was passed via ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue records with their traceback kept apart from the message.
+
+    The stock ``prepare`` merges the formatted traceback into ``msg`` and
+    clears ``exc_info``, so the JSON formatter could never fill ``exc``.
+    Here the traceback is rendered into ``exc_text`` (frames must not cross
+    to the listener thread) and the message is left alone.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXC_FORMATTER.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most *per_minute* records per call site and minute.
+
+    Records at WARNING and above are never dropped. The first record let
+    through after a suppressed stretch carries a ``suppressed`` count.
+    """
+
+    def __init__(
+        self,
+        per_minute: int,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__()
+        self.per_minute = per_minute
+        self.window = window
+        self._clock = clock
+        # call site -> [window start, records passed, records suppressed]
+        self._windows: Dict[Tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.per_minute <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        now = self._clock()
+        state = self._windows.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] >= self.per_minute:
+            state[2] += 1
+            return False
+        state[1] += 1
+        return True
+
+
+def configure_logging(
+    level: str = "INFO",
+    levels: Optional[Dict[str, str]] = None,
+    fmt: str = "json",
+    rate_limit_per_minute: int = 0,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """Install queue-based logging on the root logger and start the listener.
+
+    Args:
+        level: Root log level
+        levels: Per-logger levels, e.g. ``{"httpx": "WARNING"}``
+        fmt: ``"json"`` or ``"text"``
+        rate_limit_per_minute: Cap for INFO/DEBUG records per call site;
+            0 disables rate limiting
+        stream: Output stream, stdout by default
+
+    Returns:
+        The running listener; call ``stop()`` on shutdown to flush it.
+    """
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    if rate_limit_per_minute > 0:
+        queue_handler.addFilter(RateLimitFilter(rate_limit_per_minute))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, logger_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    listener = logging.handlers.QueueListener(
+        log_queue, output, respect_handler_level=True
+    )
+    listener.start()
+    return listener
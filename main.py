@@ -1,40 +1,118 @@
 import asyncio
 import logging
-import sys
 
-from clients import close_client, topn_db_client
+from clients import close_client, get_topn_db_client
 from core.config import settings
+from core.logging_config import configure_logging
+from tools.monitoring.memory import MemoryMonitor
 from tools.monitoring.monitor import ItemMonitor
+from tools.monitoring.retention import RetentionTask, build_retention_lock
+from tools.monitoring.snapshot import StateSnapshotter
 from tools.scraping.olx import OLXScraper
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        # logging.FileHandler('olx_worker.log')
-    ],
-)
-
 logger = logging.getLogger(__name__)
 
 
+def startup() -> ItemMonitor:
+    """Build the worker's long-lived objects.
+
+    Nothing heavy happens at import time; clients, the scraper session and the
+    LLM are created here or lazily on first use.
+    """
+    return ItemMonitor(
+        db_client=get_topn_db_client(),
+        scraper_cls=OLXScraper,
+        cycle_deadline_seconds=settings.CYCLE_DEADLINE_SECONDS,
+        seen_refresh_seconds=settings.SEEN_URLS_REFRESH_SECONDS,
+        memory=MemoryMonitor(
+            soft_limit_mb=settings.MEMORY_SOFT_LIMIT_MB,
+            tracemalloc_enabled=settings.MEMORY_TRACEMALLOC_ENABLED,
+            snapshot_every_cycles=settings.MEMORY_SNAPSHOT_EVERY_CYCLES,
+        ),
+    )
+
+
+async def warm_up(monitor: ItemMonitor) -> None:
+    """Pay one-off initialisation costs before the first cycle.
+
+    Builds the generative model, opens the scraper session and checks that
+    topn-db is reachable. Failures are logged; the cycle itself will surface
+    any persistent problem.
+    """
+    try:
+        _ = settings.GENERATIVE_MODEL
+    except Exception as exc:
+        logger.warning("Generative model warm-up failed: %s", exc)
+    try:
+        await monitor.scraper.warm_up()
+    except Exception as exc:
+        logger.warning("Scraper warm-up failed: %s", exc)
+    try:
+        await monitor.db_client.health_check()
+    except Exception as exc:
+        logger.warning("topn-db health check failed during warm-up: %s", exc)
+
+
+def build_retention(monitor: ItemMonitor) -> RetentionTask | None:
+    if not settings.RETENTION_ENABLED:
+        return None
+    return RetentionTask(
+        monitor.db_client,
+        days=settings.RETENTION_DAYS,
+        interval_hours=settings.RETENTION_INTERVAL_HOURS,
+        window=settings.RETENTION_WINDOW,
+        pause_seconds=settings.RETENTION_PAUSE_SECONDS,
+        lock=build_retention_lock(
+            settings.RETENTION_LOCK_DSN, settings.RETENTION_LOCK_FILE
+        ),
+    )
+
+
+def build_snapshotter() -> StateSnapshotter | None:
+    if not settings.STATE_SNAPSHOT_PATH:
+        return None
+    return StateSnapshotter(
+        settings.STATE_SNAPSHOT_PATH,
+        interval_seconds=settings.STATE_SNAPSHOT_INTERVAL_SECONDS,
+        max_age_seconds=settings.STATE_SNAPSHOT_MAX_AGE_SECONDS,
+    )
+
+
 async def worker_main():
-    monitor = ItemMonitor(db_client=topn_db_client, scraper_cls=OLXScraper)
+    monitor = startup()
+    retention = build_retention(monitor)
+    snapshotter = build_snapshotter()
+    if snapshotter is not None:
+        snapshotter.restore(monitor)
+    if settings.WARM_UP_ON_STARTUP:
+        await warm_up(monitor)
+    await monitor.sink.start()
+    if monitor.memory is not None:
+        monitor.memory.start()
+        # `kill -USR1 <pid>` logs a memory report.
+        monitor.memory.install_signal_handler(asyncio.get_running_loop())
+    if retention is not None:
+        retention.start()
     try:
         while True:
             try:
                 logger.info("Starting new item search cycle")
                 await monitor.run_once()
             except Exception as e:
-                logger.error(f"Error in item finder: {e}", exc_info=True)
+                logger.error("Error in item finder: %s", e, exc_info=True)
+            if snapshotter is not None:
+                await snapshotter.maybe_save(monitor)
             logger.info(
-                f"Sleeping for {settings.CYCLE_FREQUENCY_SECONDS} seconds before next cycle"
+                "Sleeping for %s seconds before next cycle",
+                settings.CYCLE_FREQUENCY_SECONDS,
             )
             await asyncio.sleep(settings.CYCLE_FREQUENCY_SECONDS)
     finally:
         logger.info("Closing ItemMonitor and scraper resources")
+        if retention is not None:
+            await retention.close()
+        if snapshotter is not None:
+            await snapshotter.maybe_save(monitor, force=True)
         await monitor.close()
 
 
@@ -47,5 +125,18 @@ async def main():
         await close_client()
 
 
+def run() -> None:
+    listener = configure_logging(
+        level=settings.LOG_LEVEL,
+        levels=settings.LOG_LEVELS,
+        fmt=settings.LOG_FORMAT,
+        rate_limit_per_minute=settings.LOG_RATE_LIMIT_PER_MINUTE,
+    )
+    try:
+        asyncio.run(main())
+    finally:
+        listener.stop()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
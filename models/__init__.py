@@ -1,3 +1,107 @@
+import json
+import re
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, field_validator
+
+_TRUE = {"true", "yes", "tak", "1"}
+_FALSE = {"false", "no", "nie", "0"}
+_FIELDS = ("price", "deposit", "animals_allowed", "rent")
+_FRACTION = re.compile(r"[.,]\d{1,2}$")
+
+
+class DescriptionSummary(BaseModel):
+    """Typed rental terms extracted from a listing description (PLN)."""
+
+    price: int = 0
+    deposit: int = 0
+    animals_allowed: Optional[bool] = None
+    rent: int = 0
+
+    @field_validator("price", "deposit", "rent", mode="before")
+    @classmethod
+    def _coerce_amount(cls, value: Any) -> int:
+        # Models answer "2 500 zł", "2500.00" or null as often as 2500.
+        if value is None or isinstance(value, bool):
+            return 0
+        if isinstance(value, (int, float)):
+            return max(0, int(value))
+        # "2.500" / "2,500" group thousands; only a trailing 1-2 digit part
+        # ("2500.00", "2 500,5") is a fraction.
+        text = _FRACTION.sub("", re.sub(r"[^\d.,]", "", str(value)))
+        digits = re.sub(r"[^\d]", "", text)
+        return int(digits) if digits else 0
+
+    @field_validator("animals_allowed", mode="before")
+    @classmethod
+    def _coerce_animals(cls, value: Any) -> Optional[bool]:
+        if isinstance(value, bool) or value is None:
+            return value
+        lowered = str(value).strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+        return None
+
+    @classmethod
+    def repair(cls, raw: Any) -> "DescriptionSummary":
+        """Build a summary from a malformed model answer without another call.
+
+        Accepts a dict, a JSON object embedded in text (code fences, trailing
+        commas, single quotes) or the legacy ``key: value`` line format.
+        """
+        if isinstance(raw, BaseModel):
+            raw = raw.model_dump()
+        if isinstance(raw, dict):
+            return cls.model_validate({k: raw.get(k) for k in _FIELDS if k in raw})
+        text = str(raw or "")
+        data = _loads_lenient(text)
+        if data is None:
+            data = {}
+            for line in text.splitlines():
+                key, sep, value = line.partition(":")
+                key = key.strip().strip("-*\"' ").lower()
+                if sep and key in _FIELDS:
+                    data[key] = value.strip().strip(",\"' ")
+        return cls.repair(data)
+
+    def to_text(self) -> str:
+        """Render the summary in the 4-line format shown to users."""
+        if self.animals_allowed is None:
+            animals = "NOT_SPECIFIED"
+        else:
+            animals = str(self.animals_allowed).lower()
+        return (
+            f"price: {self.price}\n"
+            f"deposit: {self.deposit}\n"
+            f"animals_allowed: {animals}\n"
+            f"rent: {self.rent}"
+        )
+
+    def as_record(self) -> Dict[str, Any]:
+        """Fields as persisted on the item record."""
+        return {f"summary_{name}": getattr(self, name) for name in _FIELDS}
+
+
+def _loads_lenient(text: str) -> Optional[dict]:
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    candidate = text[start : end + 1]
+    for attempt in (
+        candidate,
+        re.sub(r",\s*([}\]])", r"\1", candidate).replace("'", '"'),
+    ):
+        try:
+            data = json.loads(attempt)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
 class Item:
     def __init__(
         self,
@@ -9,6 +113,9 @@ class Item:
         item_url,
         description,
         created_at_pretty,
+        ad_id=None,
+        summary: Optional[DescriptionSummary] = None,
+        repost_of: Optional[str] = None,
     ):
         self.title = title
         self.price = price
@@ -18,3 +125,7 @@ class Item:
         self.location = location
         self.item_url = item_url
         self.description = description
+        self.ad_id = ad_id
+        self.summary = summary
+        # URL of the earlier listing this one is a re-post of, if recognised
+        self.repost_of = repost_of
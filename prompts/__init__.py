@@ -36,3 +36,55 @@ def get_description_summary_prompt(description: str) -> str:
     
     Do not add any explanations, introductions, or conclusions. Output only these 4 lines exactly as specified.
     """
+
+
+def get_description_summary_json_prompt(description: str) -> str:
+    return f"""
+    Extract the following distinct information from this apartment description:
+
+    1. price - base monthly rent for the flat itself only
+    2. deposit - the deposit (kaucja), a separate one-time security payment
+    3. animals_allowed - whether pets/animals are allowed
+    4. rent - additional recurring fees (czynsz) beyond the base rent
+
+    Each value is independent: the price must not include the rent fees.
+
+    Currency conversion rules:
+    - If amounts are in PLN (zł), keep the numeric value as is
+    - If amounts are in USD ($) or EUR (€), multiply by 4 to convert to PLN
+    - If amounts are in any other currency, use 0
+    - If no currency is specified, assume PLN
+
+    Apartment description:
+    {description}
+
+    Respond with a single JSON object and nothing else, in this shape:
+    {{"price": <integer PLN or 0 if not given>, "deposit": <integer PLN or 0>,
+    "animals_allowed": <true, false or null if not stated>,
+    "rent": <integer PLN or 0>}}
+    """
+
+
+def get_listing_price_json_prompt(description: str) -> str:
+    return f"""
+    Extract the asking price from this marketplace listing description.
+
+    Currency conversion rules:
+    - If the amount is in PLN (zł), keep the numeric value as is
+    - If the amount is in USD ($) or EUR (€), multiply by 4 to convert to PLN
+    - If the amount is in any other currency, use 0
+    - If no currency is specified, assume PLN
+
+    Listing description:
+    {description}
+
+    Respond with a single JSON object and nothing else, in this shape:
+    {{"price": <integer PLN or 0 if not given>}}
+    """
+
+
+# Prompts selectable per category by the summary router ("llm:<name>").
+SUMMARY_PROMPTS = {
+    "apartment": get_description_summary_json_prompt,
+    "price": get_listing_price_json_prompt,
+}
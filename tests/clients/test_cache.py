@@ -0,0 +1,61 @@
+import os
+from unittest import IsolatedAsyncioTestCase
+
+os.environ.setdefault("TOPN_DB_BASE_URL", "http://api")
+
+from clients.cache import ResponseCache, make_key  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(
+            ttls={"/api/v1/tasks": 5, "/api/v1/tasks/pending": 1}, clock=self.clock
+        )
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_key_ignores_param_order(self):
+        self.assertEqual(
+            make_key("/x", {"a": 1, "b": 2}), make_key("/x", {"b": 2, "a": 1})
+        )
+
+    async def test_entries_expire_after_endpoint_ttl(self):
+        key = make_key("/api/v1/tasks/")
+        self.cache.set(key, {"tasks": []})
+        self.assertEqual(self.cache.get(key), (True, {"tasks": []}))
+        self.clock.now = 5.1
+        self.assertEqual(self.cache.get(key), (False, None))
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    async def test_longest_prefix_ttl_wins_and_uncached_endpoints(self):
+        self.assertEqual(self.cache.ttl_for("/api/v1/tasks/pending"), 1)
+        self.assertEqual(self.cache.ttl_for("/api/v1/tasks/3"), 5)
+        key = make_key("/api/v1/items/")
+        self.cache.set(key, {})
+        self.assertFalse(self.cache.get(key)[0])
+
+    async def test_invalidate_by_prefix_and_substring(self):
+        a, b = make_key("/api/v1/tasks/1"), make_key("/api/v1/tasks/2/items-to-send")
+        self.cache.set(a, 1)
+        self.cache.set(b, 2)
+        self.assertEqual(self.cache.invalidate(contains=("/items-to-send",)), 1)
+        self.assertTrue(self.cache.get(a)[0])
+        self.cache.invalidate(prefixes=("/api/v1/tasks",))
+        self.assertFalse(self.cache.get(a)[0])
+
+    async def test_set_is_dropped_when_generation_changed(self):
+        key = make_key("/api/v1/tasks/")
+        generation = self.cache.generation
+        self.cache.invalidate(prefixes=("/api/v1/tasks",))
+        self.cache.set(key, "stale", generation=generation)
+        self.assertFalse(self.cache.get(key)[0])
@@ -36,13 +36,20 @@ class TestClientsInit(IsolatedAsyncioTestCase):
             # Ensure aclose called on created client
             client.aclose.assert_awaited()
 
-    async def test_topn_db_client_is_instantiated(self):
+    async def test_topn_db_client_is_instantiated_lazily(self):
         import importlib
 
         with patch("httpx.AsyncClient", autospec=True) as ac:
             mod = importlib.import_module("clients")
             importlib.reload(mod)
-            # topn_db_client should be present
-            self.assertTrue(hasattr(mod, "topn_db_client"))
+            # Importing the package must not create any client
+            ac.assert_not_called()
+
+            db = mod.get_topn_db_client()
+            self.assertIsInstance(db, mod.TopnDbClient)
+            self.assertIs(mod.get_topn_db_client(), db)
             # get_client called during creation
-            ac.assert_called()
+            ac.assert_called_once()
+
+            await mod.close_client()
+            self.assertIsNone(mod._topn_db_client)
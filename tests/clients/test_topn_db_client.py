@@ -129,3 +129,138 @@ class TestTopnDbClient(IsolatedAsyncioTestCase):
             mr.assert_awaited_with("POST", "/api/v1/items/", json_data={"x": 1})
             await c.delete_item_by_id(15)
             mr.assert_awaited_with("DELETE", f"/api/v1/items/15")
+
+    async def _mock_client(self, pages):
+        import httpx
+
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            body = pages.pop(0)
+
+            async def chunks():
+                for i in range(0, len(body), 7):
+                    yield body[i : i + 7].encode()
+
+            return httpx.Response(200, content=chunks())
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return self.TopnDbClient(base_url="http://api", client=client), requests
+
+    async def test_iter_items_by_source_url_pages_with_cursor_and_projection(self):
+        import json
+
+        pages = [
+            json.dumps(
+                {"items": [{"id": 1, "item_url": "a"}, {"id": 2, "item_url": "b"}]}
+            ),
+            json.dumps({"total": 1, "items": [{"id": 3, "item_url": "c"}]}),
+        ]
+        db, requests = await self._mock_client(pages)
+        urls = [u async for u in db.iter_item_urls_by_source_url("src", page_size=2)]
+
+        self.assertEqual(urls, ["a", "b", "c"])
+        self.assertEqual(len(requests), 2)
+        first, second = (r.url.params for r in requests)
+        self.assertEqual(first["fields"], "id,item_url")
+        self.assertEqual(first["source_url"], "src")
+        self.assertNotIn("after_id", first)
+        self.assertEqual(second["after_id"], "2")
+
+    async def test_iter_items_falls_back_when_cursor_is_ignored(self):
+        import json
+
+        page = json.dumps([{"id": 1, "item_url": "a"}])
+        full = json.dumps(
+            {"items": [{"id": 1, "item_url": "a"}, {"id": 2, "item_url": "b"}]}
+        )
+        db, requests = await self._mock_client([page, page, full])
+        urls = [u async for u in db.iter_item_urls_by_source_url("src", page_size=1)]
+
+        self.assertEqual(urls, ["a", "b"])
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(requests[2].url.params["limit"], "10000")
+        self.assertNotIn("fields", requests[2].url.params)
+
+    async def test_iter_items_falls_back_when_projection_is_ignored(self):
+        import json
+
+        page = json.dumps({"items": [{"id": 1, "item_url": "a", "title": "t"}]})
+        full = json.dumps({"items": [{"id": 1, "item_url": "a", "title": "t"}]})
+        db, requests = await self._mock_client([page, full])
+        urls = [u async for u in db.iter_item_urls_by_source_url("src", page_size=1)]
+
+        self.assertEqual(urls, ["a"])
+        self.assertEqual(len(requests), 2)
+
+    async def test_stream_items_raises_on_http_error(self):
+        import httpx
+
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda r: httpx.Response(500, text="bad"))
+        )
+        db = self.TopnDbClient(base_url="http://api", client=client)
+        with self.assertRaises(httpx.HTTPStatusError):
+            async for _ in db.iter_items_by_source_url("src"):
+                pass
+
+    async def test_json_items_stream_handles_split_chunks(self):
+        from clients.topn_db_client import JsonItemsStream
+
+        body = '{"total": 2, "items": [{"id": 1, "t": "x]"}, {"id": 2}], "n": 1}'
+        parser = JsonItemsStream()
+        items = []
+        for i in range(0, len(body), 3):
+            items.extend(parser.feed(body[i : i + 3]))
+        self.assertEqual(items, [{"id": 1, "t": "x]"}, {"id": 2}])
+        self.assertTrue(parser.done)
+
+    async def test_cached_gets_coalesce_and_writes_invalidate(self):
+        import asyncio
+
+        from clients.cache import ResponseCache
+
+        calls = []
+
+        async def request(method, url, json=None, params=None, headers=None):
+            calls.append((method, url))
+            await asyncio.sleep(0.01)
+            resp = MagicMock(status_code=200)
+            resp.json.return_value = {"n": len(calls)}
+            return resp
+
+        self.httpx_client.request = request
+        c = self.TopnDbClient(
+            base_url="http://api",
+            client=self.httpx_client,
+            cache=ResponseCache(ttls={"/api/v1/tasks": 60, "/api/v1/items": 60}),
+        )
+
+        # Identical concurrent GETs share one request
+        r1, r2 = await asyncio.gather(c.get_all_tasks(), c.get_all_tasks())
+        self.assertEqual(r1, r2)
+        self.assertEqual(len(calls), 1)
+
+        # Served from cache afterwards
+        await c.get_all_tasks()
+        self.assertEqual(len(calls), 1)
+
+        # Item writes keep task listings but drop items-to-send
+        await c.get_items_to_send_for_task(1)
+        await c.create_item({"x": 1})
+        await c.get_all_tasks()
+        await c.get_items_to_send_for_task(1)
+        self.assertEqual(
+            [u for m, u in calls if m == "GET"],
+            [
+                "http://api/api/v1/tasks/",
+                "http://api/api/v1/tasks/1/items-to-send",
+                "http://api/api/v1/tasks/1/items-to-send",
+            ],
+        )
+
+        # Task writes invalidate task reads
+        await c.update_task(1, {"a": 1})
+        await c.get_all_tasks()
+        self.assertEqual(calls[-1], ("GET", "http://api/api/v1/tasks/"))
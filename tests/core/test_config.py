@@ -44,3 +44,22 @@ class TestSettings(IsolatedAsyncioTestCase):
         s = core.Settings()
         # GENERATIVE_MODEL should be set (instance of stub class)
         self.assertIsNotNone(s.GENERATIVE_MODEL)
+
+    async def test_llm_pool_replaces_single_model(self):
+        import sys
+
+        sys.modules["langchain_groq"] = types.SimpleNamespace(
+            ChatGroq=type("ChatGroq", (), {"__init__": lambda *a, **k: None})
+        )
+        os.environ.pop("GROQ_MODEL_NAME", None)
+        os.environ["LLM_POOL"] = '[{"model": "a", "api_key": "k1"}, {"model": "b"}]'
+        try:
+            core = importlib.import_module("core.config")
+            s = core.Settings()
+            from tools.processing.llm_pool import LLMPool
+
+            self.assertIsInstance(s.GENERATIVE_MODEL, LLMPool)
+            self.assertEqual(len(s.GENERATIVE_MODEL.members), 2)
+        finally:
+            os.environ.pop("LLM_POOL")
+            os.environ["GROQ_MODEL_NAME"] = "dummy-model"
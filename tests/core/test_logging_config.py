@@ -0,0 +1,82 @@
+import io
+import json
+import logging
+from unittest import IsolatedAsyncioTestCase
+
+from core.logging_config import RateLimitFilter, configure_logging
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLoggingConfig(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.root = logging.getLogger()
+        self.saved = (list(self.root.handlers), self.root.level)
+
+    async def asyncTearDown(self):
+        handlers, level = self.saved
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        for handler in handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(level)
+        logging.getLogger("noisy").setLevel(logging.NOTSET)
+
+    async def test_json_output_through_queue_with_module_levels(self):
+        out = io.StringIO()
+        listener = configure_logging(levels={"noisy": "ERROR"}, stream=out)
+        logging.getLogger("worker").info("found %s items", 3, extra={"url": "u"})
+        logging.getLogger("noisy").warning("hidden")
+        listener.stop()
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["msg"], "found 3 items")
+        self.assertEqual(lines[0]["logger"], "worker")
+        self.assertEqual(lines[0]["url"], "u")
+
+    async def test_exceptions_keep_their_traceback_field(self):
+        out = io.StringIO()
+        listener = configure_logging(stream=out)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("worker").error("failed %s", "u", exc_info=True)
+        listener.stop()
+
+        line = json.loads(out.getvalue())
+        self.assertEqual(line["msg"], "failed u")
+        self.assertIn("ValueError: boom", line["exc"])
+
+        out = io.StringIO()
+        listener = configure_logging(fmt="text", stream=out)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("worker").exception("failed")
+        listener.stop()
+        self.assertIn("ValueError: boom", out.getvalue())
+
+    async def test_rate_limit_per_call_site(self):
+        clock = FakeClock()
+        limiter = RateLimitFilter(per_minute=2, clock=clock)
+
+        def record(level=logging.INFO, lineno=10):
+            return logging.LogRecord("x", level, "f.py", lineno, "m", (), None)
+
+        passed = [limiter.filter(record()) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Other call sites and warnings are not affected
+        self.assertTrue(limiter.filter(record(lineno=11)))
+        self.assertTrue(limiter.filter(record(level=logging.WARNING)))
+
+        clock.now = 60
+        first = record()
+        self.assertTrue(limiter.filter(first))
+        self.assertEqual(first.suppressed, 3)
@@ -1,6 +1,6 @@
 from unittest import IsolatedAsyncioTestCase
 
-from models import Item
+from models import DescriptionSummary, Item
 
 
 class TestModels(IsolatedAsyncioTestCase):
@@ -23,3 +23,36 @@ class TestModels(IsolatedAsyncioTestCase):
         )
         self.assertEqual(it.title, "t")
         self.assertEqual(it.item_url, "u")
+
+    async def test_description_summary_repair(self):
+        fenced = DescriptionSummary.repair(
+            "Sure!\n```json\n{'price': '2 500 zł', 'animals_allowed': 'tak',}\n```"
+        )
+        self.assertEqual((fenced.price, fenced.animals_allowed), (2500, True))
+        lines = DescriptionSummary.repair(
+            "price: 1800\ndeposit: 1800.00\nanimals_allowed: NOT_SPECIFIED\nrent: x"
+        )
+        self.assertEqual(
+            lines.to_text(),
+            "price: 1800\ndeposit: 1800\nanimals_allowed: NOT_SPECIFIED\nrent: 0",
+        )
+        self.assertEqual(
+            lines.as_record(),
+            {
+                "summary_price": 1800,
+                "summary_deposit": 1800,
+                "summary_animals_allowed": None,
+                "summary_rent": 0,
+            },
+        )
+        self.assertEqual(DescriptionSummary.repair("garbage"), DescriptionSummary())
+
+    async def test_description_summary_amount_separators(self):
+        for raw, expected in (
+            ("2.500 zł", 2500),
+            ("2,500", 2500),
+            ("2500.00", 2500),
+            ("2 500,5 PLN", 2500),
+            ("1.234.567,89", 1234567),
+        ):
+            self.assertEqual(DescriptionSummary(price=raw).price, expected, raw)
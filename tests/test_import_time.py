@@ -0,0 +1,65 @@
+"""Cold-start guard: importing the worker must stay cheap.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter and
+checks that heavy dependencies (langchain) are not imported and that the
+cumulative import time of ``main`` stays under a generous budget.
+"""
+
+import os
+import subprocess
+import sys
+from unittest import IsolatedAsyncioTestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous on purpose: CI machines vary, this catches regressions such as
+# constructing the LLM client at import time (which alone costs seconds).
+IMPORT_BUDGET_US = int(os.environ.get("IMPORT_TIME_BUDGET_US", 1_500_000))
+
+LAZY_MODULES = ("langchain_groq", "langchain_core", "groq")
+
+
+def measure_import(module: str) -> dict:
+    """Return ``{module: cumulative_us}`` from ``-X importtime`` output."""
+    env = dict(os.environ)
+    env.setdefault("TOPN_DB_BASE_URL", "http://api")
+    env.setdefault("GROQ_MODEL_NAME", "dummy")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[12:].split("|"))
+        if cumulative.isdigit():
+            timings[name] = int(cumulative)
+    return timings
+
+
+class TestImportTime(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_main_import_is_lazy_and_within_budget(self):
+        timings = measure_import("main")
+        self.assertIn("main", timings)
+        loaded = [m for m in timings if m.split(".")[0] in LAZY_MODULES]
+        self.assertEqual(loaded, [], "heavy modules imported at import time")
+        self.assertLess(timings["main"], IMPORT_BUDGET_US)
+
+    async def test_importing_clients_creates_no_connections(self):
+        import importlib
+
+        mod = importlib.import_module("clients")
+        importlib.reload(mod)
+        self.assertIsNone(mod._client)
+        self.assertIsNone(mod._topn_db_client)
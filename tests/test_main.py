@@ -30,6 +30,7 @@ class TestMain(IsolatedAsyncioTestCase):
             inst = Mon.return_value
             inst.run_once = AsyncMock()
             inst.close = AsyncMock()
+            inst.sink.start = AsyncMock()
 
             async def stop(_):
                 raise asyncio.CancelledError
@@ -40,6 +41,7 @@ class TestMain(IsolatedAsyncioTestCase):
                 with self.assertRaises(asyncio.CancelledError):
                     await mod.worker_main()
 
+            inst.sink.start.assert_awaited()
             inst.run_once.assert_awaited()
             inst.close.assert_awaited()
 
@@ -52,3 +54,31 @@ class TestMain(IsolatedAsyncioTestCase):
                 await mod.main()
                 wm.assert_awaited()
                 cc.assert_awaited()
+
+    async def test_warm_up_initialises_resources_and_tolerates_failures(self):
+        mod = importlib.import_module("main")
+        importlib.reload(mod)
+
+        monitor = types.SimpleNamespace(
+            scraper=types.SimpleNamespace(warm_up=AsyncMock()),
+            db_client=types.SimpleNamespace(
+                health_check=AsyncMock(side_effect=RuntimeError("down"))
+            ),
+        )
+        mod.settings.GENERATIVE_MODEL = None
+        await mod.warm_up(monitor)
+        # The (stubbed) model has been built by the warm-up
+        self.assertIsNotNone(mod.settings.GENERATIVE_MODEL)
+        monitor.scraper.warm_up.assert_awaited()
+        monitor.db_client.health_check.assert_awaited()
+
+    async def test_startup_builds_monitor_with_lazy_db_client(self):
+        mod = importlib.import_module("main")
+        importlib.reload(mod)
+
+        with patch("main.ItemMonitor") as Mon, patch(
+            "main.get_topn_db_client", return_value="db"
+        ):
+            mod.startup()
+            Mon.assert_called_once()
+            self.assertEqual(Mon.call_args.kwargs["db_client"], "db")
@@ -0,0 +1,139 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.events.sinks import (
+    InProcessQueueSink,
+    NewItemEvent,
+    RedisStreamEventSink,
+    WebhookEventSink,
+    build_event_sink,
+)
+
+
+def event(n, task_ids=(1,)):
+    return NewItemEvent(
+        item_url=f"https://www.olx.pl/d/oferta/{n}.html",
+        title=f"t{n}",
+        price="1 000 zł",
+        source_url="https://www.olx.pl/nieruchomosci/",
+        task_ids=list(task_ids),
+    )
+
+
+async def fake_redis(commands, errors=()):
+    """Minimal RESP server replying to every command with a stream ID.
+
+    Commands named in *errors* are answered with an error, once each.
+    """
+    errors = list(errors)
+
+    async def handle(reader, writer):
+        while True:
+            header = await reader.readline()
+            if not header:
+                break
+            args = []
+            for _ in range(int(header[1:])):
+                length = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(length + 2))[:-2].decode())
+            commands.append(args)
+            if args[0] in errors:
+                errors.remove(args[0])
+                writer.write(b"-ERR failed\r\n")
+            elif args[0] == "XADD":
+                writer.write(b"$3\r\n1-0\r\n")
+            else:
+                writer.write(b"+OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+class TestEventSinks(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_in_process_queue_drops_oldest_when_full(self):
+        sink = InProcessQueueSink(maxsize=2)
+        await sink.publish([event(1), event(2), event(3)])
+        self.assertEqual(sink.dropped, 1)
+        self.assertEqual(sink.queue.get_nowait().title, "t2")
+
+    async def test_webhook_posts_events(self):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(204)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        sink = WebhookEventSink("http://bot/hooks/items", client=client)
+        await sink.publish([event(1, task_ids=(4, 5))])
+        self.assertEqual(bodies[0]["events"][0]["task_ids"], [4, 5])
+        await client.aclose()
+
+    async def test_redis_stream_xadd(self):
+        commands = []
+        server = await fake_redis(commands)
+        port = server.sockets[0].getsockname()[1]
+        sink = RedisStreamEventSink(f"redis://:secret@127.0.0.1:{port}/2")
+        await sink.publish([event(1), event(2)])
+        await sink.close()
+        server.close()
+        await server.wait_closed()
+
+        self.assertEqual(commands[0], ["AUTH", "secret"])
+        self.assertEqual(commands[1], ["SELECT", "2"])
+        xadd = commands[2]
+        self.assertEqual(
+            xadd[:6], ["XADD", "olx:new-items", "MAXLEN", "~", "10000", "*"]
+        )
+        self.assertEqual(json.loads(xadd[7])["item_url"], event(1).item_url)
+        self.assertEqual(len(commands), 4)
+
+    async def test_redis_timeout_drops_the_connection(self):
+        async def silent(reader, writer):
+            await reader.read()  # never replies
+
+        server = await asyncio.start_server(silent, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        sink = RedisStreamEventSink(f"redis://127.0.0.1:{port}", timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            await sink.publish([event(1)])
+        self.assertIsNone(sink._writer)
+        await sink.close()
+        server.close()
+        await server.wait_closed()
+
+    async def test_redis_failed_handshake_is_not_reused(self):
+        commands = []
+        server = await fake_redis(commands, errors=["SELECT"])
+        port = server.sockets[0].getsockname()[1]
+        sink = RedisStreamEventSink(f"redis://:secret@127.0.0.1:{port}/2")
+        with self.assertRaises(RuntimeError):
+            await sink.publish([event(1)])
+        self.assertIsNone(sink._writer)
+
+        await sink.publish([event(2)])
+        await sink.close()
+        server.close()
+        await server.wait_closed()
+
+        self.assertEqual(
+            [c[0] for c in commands], ["AUTH", "SELECT", "AUTH", "SELECT", "XADD"]
+        )
+
+    async def test_build_event_sink(self):
+        self.assertIsNone(build_event_sink(None))
+        self.assertIsInstance(build_event_sink("memory://"), InProcessQueueSink)
+        self.assertIsInstance(build_event_sink("redis://r:6379"), RedisStreamEventSink)
+        self.assertIsInstance(build_event_sink("https://bot/x"), WebhookEventSink)
+        with self.assertRaises(ValueError):
+            build_event_sink("ftp://x")
@@ -0,0 +1,49 @@
+import tracemalloc
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from tools.monitoring import memory
+from tools.monitoring.memory import MemoryMonitor
+
+
+class TestMemoryMonitor(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    async def test_cycle_rss_deltas(self):
+        mon = MemoryMonitor()
+        with patch.object(memory, "read_rss_bytes", side_effect=[100 << 20, 110 << 20]):
+            mon.begin_cycle()
+            entry = mon.end_cycle()
+        self.assertEqual(entry, {"cycle": 1, "rss_mb": 110.0, "delta_mb": 10.0})
+        self.assertGreater(memory.read_rss_bytes(), 0)
+
+    async def test_snapshot_diff_reports_growth(self):
+        mon = MemoryMonitor(tracemalloc_enabled=True, snapshot_every_cycles=1)
+        mon.start()
+        mon.begin_cycle()
+        retained = [bytearray(1024) for _ in range(2000)]
+        mon.end_cycle()
+        self.assertTrue(mon.top_growth)
+        self.assertIn("test_memory.py", mon.top_growth[0])
+        self.assertIn("top_growth", mon.report())
+        del retained
+
+    async def test_soft_limit_throttles_concurrency(self):
+        mon = MemoryMonitor(soft_limit_mb=100)
+        with patch.object(memory, "read_rss_bytes", return_value=200 << 20):
+            self.assertEqual(mon.limit_concurrency(8), 1)
+            self.assertTrue(mon.relieve_pressure())
+            # Once per cycle only
+            self.assertFalse(mon.relieve_pressure())
+            mon.begin_cycle()
+            self.assertTrue(mon.relieve_pressure())
+        with patch.object(memory, "read_rss_bytes", return_value=50 << 20):
+            mon.begin_cycle()
+            self.assertEqual(mon.limit_concurrency(8), 8)
+            self.assertFalse(mon.relieve_pressure())
+        self.assertEqual(mon.pressure_events, 2)
@@ -1,7 +1,29 @@
 import os
 import types
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def stored_urls(*pages):
+    """Fake `iter_item_urls_by_source_url` returning *pages* call by call.
+
+    Each page is a list of item URLs or an exception to raise; the last page
+    is repeated once the others are used up.
+    """
+    pages = list(pages)
+
+    def iter_urls(source_url, **kwargs):
+        page = pages.pop(0) if len(pages) > 1 else pages[0]
+
+        async def gen():
+            if isinstance(page, Exception):
+                raise page
+            for url in page:
+                yield url
+
+        return gen()
+
+    return MagicMock(side_effect=iter_urls)
 
 
 class TestItemMonitor(IsolatedAsyncioTestCase):
@@ -21,6 +43,7 @@ class TestItemMonitor(IsolatedAsyncioTestCase):
         # Import after stubs are ready
         from models import Item
         from tools.monitoring.monitor import ItemMonitor
+        from tools.scraping.base import BaseScraper
 
         self.Item = Item
         self.ItemMonitor = ItemMonitor
@@ -34,13 +57,11 @@ class TestItemMonitor(IsolatedAsyncioTestCase):
                 {"url": "https://u2"},
             ]
         }
-        self.db.get_items_by_source_url.return_value = {
-            "items": [{"item_url": "https://old"}]
-        }
+        self.db.iter_item_urls_by_source_url = stored_urls(["https://old"])
         self.db.create_item = AsyncMock()
 
         # Fake scraper class
-        class FakeScraper:
+        class FakeScraper(BaseScraper):
             def __init__(self):
                 self.closed = False
 
@@ -135,16 +156,40 @@ class TestItemMonitor(IsolatedAsyncioTestCase):
         self.assertEqual([p["source_url"] for p in payloads], ["SRC", "SRC", "SRC"])
 
     async def test_run_once_handles_fetch_errors_and_continues(self):
-        # Make get_items_by_source_url raise for first url only
-        self.db.get_items_by_source_url.side_effect = [
-            RuntimeError("boom"),
-            {"items": []},
-        ]
+        # Make the existing items lookup raise for first url only
+        self.db.iter_item_urls_by_source_url = stored_urls(RuntimeError("boom"), [])
         with patch("tools.monitoring.monitor.asyncio.sleep", new=AsyncMock()):
             await self.monitor.run_once()
         # Should still attempt second url, so not zero persisting calls
         self.assertGreaterEqual(self.db.create_item.await_count, 1)
 
+    async def test_run_once_scrapes_equivalent_urls_once(self):
+        self.db.get_all_tasks.return_value = {
+            "tasks": [
+                {"url": "https://www.olx.pl/nieruchomosci/?b=2&a=1"},
+                {"url": "https://olx.pl/nieruchomosci?a=1&b=2&utm_source=x"},
+            ]
+        }
+        self.db.iter_item_urls_by_source_url = stored_urls(
+            ["https://www.olx.pl/d/oferta/a.html?reason=x"], []
+        )
+        seen = []
+
+        async def fetch(url, existing_urls, summarizer):
+            seen.append((url, existing_urls))
+            return []
+
+        self.monitor.scraper.fetch_new_items = fetch
+        with patch("tools.monitoring.monitor.asyncio.sleep", new=AsyncMock()):
+            await self.monitor.run_once()
+
+        self.assertEqual(len(seen), 1)
+        url, existing = seen[0]
+        self.assertEqual(url, "https://www.olx.pl/nieruchomosci/?a=1&b=2")
+        self.assertEqual(existing, {"https://www.olx.pl/d/oferta/a.html"})
+        # Existing items are looked up for every task URL variant
+        self.assertEqual(self.db.iter_item_urls_by_source_url.call_count, 2)
+
     async def test_run_once_raises_on_outer_error(self):
         self.db.get_all_tasks.side_effect = RuntimeError("fatal")
         with self.assertRaises(RuntimeError):
@@ -154,3 +199,220 @@ class TestItemMonitor(IsolatedAsyncioTestCase):
         scr = self.monitor.scraper
         await self.monitor.close()
         self.assertTrue(getattr(scr, "closed", False))
+
+    async def test_run_once_publishes_events_with_task_ids(self):
+        from tools.events.sinks import InProcessQueueSink
+
+        self.db.get_all_tasks.return_value = {
+            "tasks": [
+                {"id": 1, "url": "https://www.olx.pl/a/"},
+                {"id": 2, "url": "https://olx.pl/a"},
+                {"id": 3, "url": "https://www.olx.pl/a/"},
+            ]
+        }
+        self.monitor.event_sink = InProcessQueueSink()
+        with patch("tools.monitoring.monitor.asyncio.sleep", new=AsyncMock()):
+            await self.monitor.run_once()
+
+        queue = self.monitor.event_sink.queue
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+        # One event per new item, listing every task whose URL matched it
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0].task_ids, [1, 3, 2])
+
+    async def test_cycle_deadline_cancels_and_carries_over_urls(self):
+        import asyncio
+
+        self.db.get_all_tasks.return_value = {
+            "tasks": [{"url": "https://slow"}, {"url": "https://fast"}]
+        }
+        seen = []
+
+        async def fetch(url, existing_urls, summarizer):
+            seen.append(url)
+            if url == "https://slow":
+                await asyncio.sleep(10)
+            return []
+
+        self.monitor.scraper.fetch_new_items = fetch
+        self.monitor.cycle_deadline_seconds = 0.05
+        await self.monitor.run_once()
+
+        # The slow URL is cancelled; nothing is left for the fast one
+        self.assertEqual(seen, ["https://slow"])
+        self.assertEqual(self.monitor._carry_over, ["https://slow", "https://fast"])
+        self.assertEqual(self.monitor.cycle_stats["overruns"], 1)
+        self.assertEqual(self.monitor.cycle_stats["cancelled_urls"], 2)
+
+        # Carried-over URLs go first in the next cycle
+        self.monitor._carry_over = ["https://fast"]
+        seen.clear()
+        await self.monitor.run_once()
+        self.assertEqual(seen, ["https://fast", "https://slow"])
+        self.assertEqual(self.monitor._carry_over, ["https://slow"])
+        self.assertLess(self.monitor.cycle_stats["max_duration"], 1)
+
+    async def test_persist_items_includes_typed_summary(self):
+        from models import DescriptionSummary
+
+        item = self.Item(
+            title="a",
+            price="",
+            image_url="",
+            created_at=None,
+            location="",
+            item_url="https://www.olx.pl/d/oferta/a.html",
+            description="",
+            created_at_pretty="",
+            summary=DescriptionSummary(price=2500, animals_allowed=True),
+        )
+        await self.monitor._persist_items([item], source_url="SRC")
+        payload = self.db.create_item.await_args.args[0]
+        self.assertEqual(payload["summary_price"], 2500)
+        self.assertIs(payload["summary_animals_allowed"], True)
+        self.assertNotIn("repost_of", payload)
+
+        item.repost_of = "https://www.olx.pl/d/oferta/old.html"
+        await self.monitor._persist_items([item], source_url="SRC")
+        payload = self.db.create_item.await_args.args[0]
+        self.assertEqual(payload["repost_of"], item.repost_of)
+
+    async def test_urls_are_scraped_concurrently_up_to_scraper_limit(self):
+        import asyncio
+
+        active, peak = 0, 0
+
+        async def fetch(url, existing_urls, summarizer):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return []
+
+        self.db.get_all_tasks.return_value = {
+            "tasks": [{"url": f"https://u{i}"} for i in range(5)]
+        }
+        self.monitor.scraper.fetch_new_items = fetch
+        type(self.monitor.scraper).concurrency_limit = 2
+        await self.monitor.run_once()
+        self.assertEqual(peak, 2)
+
+    async def test_stored_urls_are_cached_between_refreshes(self):
+        self.monitor.seen_refresh_seconds = 600
+        self.db.iter_item_urls_by_source_url = stored_urls(["https://old"], [])
+
+        await self.monitor.run_once()
+        await self.monitor.run_once()
+
+        # Loaded once per source URL, then extended with the persisted items
+        self.assertEqual(self.db.iter_item_urls_by_source_url.call_count, 2)
+        seen = self.monitor._seen["https://u1"][1]
+        self.assertIn("https://old/", seen)
+        self.assertIn("https://u1/new1", seen)
+        self.assertEqual(set(self.monitor.last_scraped), {"https://u1", "https://u2"})
+
+    async def test_least_recently_scraped_urls_go_first(self):
+        self.db.get_all_tasks.return_value = {
+            "tasks": [
+                {"url": "https://u1"},
+                {"url": "https://u2"},
+                {"url": "https://u3"},
+            ]
+        }
+        # e.g. restored from a snapshot; u3 was never scraped
+        self.monitor.last_scraped = {
+            "https://u1": 200.0,
+            "https://u2": 100.0,
+            "https://gone": 50.0,
+        }
+        seen = []
+
+        async def fetch(url, existing_urls, summarizer):
+            seen.append(url)
+            return []
+
+        self.monitor.scraper.fetch_new_items = fetch
+        with patch.object(
+            type(self.monitor.scraper), "concurrency_limit", new=1, create=True
+        ):
+            await self.monitor.run_once()
+
+        self.assertEqual(seen, ["https://u3", "https://u2", "https://u1"])
+        self.assertEqual(
+            set(self.monitor.last_scraped), {"https://u1", "https://u2", "https://u3"}
+        )
+
+    async def test_export_and_restore_state(self):
+        self.monitor.seen_refresh_seconds = 600
+        await self.monitor.run_once()
+        state = self.monitor.export_state()
+
+        other = self.ItemMonitor(
+            db_client=self.db,
+            scraper_cls=type(self.monitor.scraper),
+            seen_refresh_seconds=600,
+        )
+        other.restore_state(state)
+        self.db.iter_item_urls_by_source_url.reset_mock()
+        existing = await other._existing_item_urls(["https://u1"])
+        await other.close()
+
+        self.db.iter_item_urls_by_source_url.assert_not_called()
+        self.assertIn("https://u1/new2", existing)
+        self.assertEqual(other.last_scraped, self.monitor.last_scraped)
+
+    async def test_streamed_items_are_persisted_before_the_url_finishes(self):
+        import asyncio
+
+        self.db.get_all_tasks.return_value = {"tasks": [{"url": "https://u1"}]}
+        item = self.Item(
+            title="t",
+            price="p",
+            image_url="i",
+            created_at=None,
+            location="l",
+            item_url="https://u1/first",
+            description="d",
+            created_at_pretty="cp",
+        )
+
+        stored_while_pending = []
+
+        async def iter_new_items(url, existing_urls, summarizer):
+            yield item
+            stored_while_pending.append(self.db.create_item.await_count)
+            await asyncio.sleep(10)
+            yield item  # pragma: no cover
+
+        self.monitor.scraper.iter_new_items = iter_new_items
+        self.monitor.cycle_deadline_seconds = 0.05
+        await self.monitor.run_once()
+
+        # The first item was stored while the next one was still pending
+        self.assertEqual(stored_while_pending, [1])
+        self.assertEqual(self.db.create_item.await_count, 1)
+        self.assertEqual(self.monitor._carry_over, ["https://u1"])
+        self.assertNotIn("https://u1", self.monitor.last_scraped)
+
+    async def test_url_completed_only_after_every_item_is_stored(self):
+        def create_item(record, idempotency_key=None):
+            if record["item_url"] == "https://u2/new2":
+                raise RuntimeError("db down")
+
+        self.db.create_item.side_effect = create_item
+        completed = []
+        self.monitor.scraper.url_completed = completed.append
+        await self.monitor.run_once()
+
+        # u2 lost an item, so its page must not be skipped as unchanged
+        self.assertEqual(completed, ["https://u1"])
+
+    async def test_items_pending_in_the_sink_count_as_existing(self):
+        self.monitor.sink.pending_item_urls = AsyncMock(
+            return_value={"https://u1/queued"}
+        )
+        existing = await self.monitor._existing_item_urls(["https://u1"])
+
+        self.assertEqual(existing, {"https://old/", "https://u1/queued"})
+        self.monitor.sink.pending_item_urls.assert_awaited_once_with(["https://u1"])
@@ -0,0 +1,115 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from tools.monitoring.retention import (
+    WARSAW,
+    FileLock,
+    RetentionTask,
+    in_window,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def at(hour, minute=0):
+    return WARSAW.localize(datetime(2025, 5, 1, hour, minute))
+
+
+def stored_urls(urls):
+    async def gen(source_url, **kwargs):
+        for url in urls:
+            yield url
+
+    return MagicMock(side_effect=gen)
+
+
+class TestRetentionTask(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = AsyncMock()
+        self.db.get_all_tasks.return_value = {"tasks": [{"url": "https://u1"}]}
+        self.db.delete_old_items.side_effect = [
+            {"deleted_count": 50},
+            {"deleted_count": 7},
+            {"message": "ok"},
+        ]
+        self.db.iter_item_urls_by_source_url = stored_urls(["a", "b"])
+        self.clock = FakeClock()
+        self.now = at(3)
+
+    async def asyncTearDown(self):
+        pass
+
+    def make_task(self, **kwargs):
+        return RetentionTask(
+            self.db,
+            days=30,
+            pause_seconds=0,
+            now=lambda: self.now,
+            clock=self.clock,
+            **kwargs,
+        )
+
+    async def test_window_wraps_midnight(self):
+        self.assertTrue(in_window(at(23, 30), "23:00-02:00"))
+        self.assertTrue(in_window(at(1), "23:00-02:00"))
+        self.assertFalse(in_window(at(12), "23:00-02:00"))
+        self.assertTrue(in_window(at(12), None))
+
+    async def test_runs_steps_and_reports(self):
+        task = self.make_task()
+        self.assertTrue(task.due())
+        with patch("tools.monitoring.retention.asyncio.sleep", new=AsyncMock()):
+            report = await task.run_once()
+
+        self.assertEqual(report.rows_removed, 57)
+        self.assertEqual(report.steps, [120, 60, 30])
+        self.assertEqual(
+            [c.args[0] for c in self.db.delete_old_items.await_args_list],
+            [120, 60, 30],
+        )
+        self.assertIsNotNone(report.dedup_latency_before)
+        self.assertIsNotNone(report.dedup_latency_after)
+
+        # Not due again until the interval has passed
+        self.assertFalse(task.due())
+        self.clock.now += 24 * 3600
+        self.assertTrue(task.due())
+        self.now = at(12)
+        self.assertFalse(task.due())
+
+    async def test_only_one_holder_of_file_lock(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "retention.lock")
+            other = FileLock(path)
+            task = self.make_task(lock=FileLock(path))
+            async with other.hold() as acquired:
+                self.assertTrue(acquired)
+                self.assertIsNone(await task.run_once())
+            self.db.delete_old_items.assert_not_awaited()
+            self.assertFalse(task.due())
+
+    async def test_skips_run_recorded_by_other_replica(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "retention.lock")
+            first = self.make_task(lock=FileLock(path))
+            await first.run_once()
+            self.assertEqual(self.db.delete_old_items.await_count, 3)
+
+            # Another replica checks later in the same window
+            self.now = at(4)
+            other = self.make_task(lock=FileLock(path))
+            self.assertTrue(other.due())
+            self.assertIsNone(await other.run_once())
+            self.assertEqual(self.db.delete_old_items.await_count, 3)
+            self.assertFalse(other.due())
+            self.clock.now += 23 * 3600
+            self.assertTrue(other.due())
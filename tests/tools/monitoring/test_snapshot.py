@@ -0,0 +1,66 @@
+import gzip
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestStateSnapshot(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        from tools.monitoring import snapshot
+
+        self.snapshot = snapshot
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state.json.gz")
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def test_save_and_load_roundtrip(self):
+        state = {"seen": {"https://u1": {"loaded_at": 1.0, "urls": ["https://a"]}}}
+        size = self.snapshot.save_snapshot(self.path, state, saved_at=100)
+
+        self.assertEqual(size, os.path.getsize(self.path))
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        self.assertEqual(
+            self.snapshot.load_snapshot(self.path, max_age=60, now=150), state
+        )
+
+    async def test_stale_missing_and_corrupt_snapshots_are_ignored(self):
+        self.assertIsNone(self.snapshot.load_snapshot(self.path, max_age=60))
+
+        self.snapshot.save_snapshot(self.path, {"a": 1}, saved_at=100)
+        self.assertIsNone(self.snapshot.load_snapshot(self.path, max_age=60, now=500))
+
+        with open(self.path, "wb") as f:
+            f.write(gzip.compress(b"{not json")[:-4])
+        self.assertIsNone(self.snapshot.load_snapshot(self.path, max_age=60, now=100))
+
+    async def test_snapshotter_saves_on_interval_and_restores(self):
+        clock = FakeClock()
+        snapshotter = self.snapshot.StateSnapshotter(
+            self.path, interval_seconds=60, max_age_seconds=600, clock=clock
+        )
+        monitor = MagicMock()
+        monitor.export_state.return_value = {"last_scraped": {"https://u1": 5.0}}
+
+        self.assertFalse(snapshotter.restore(monitor))
+        self.assertTrue(await snapshotter.maybe_save(monitor))
+        clock.now += 30
+        self.assertFalse(await snapshotter.maybe_save(monitor))
+        self.assertTrue(await snapshotter.maybe_save(monitor, force=True))
+
+        self.assertTrue(snapshotter.restore(monitor))
+        monitor.restore_state.assert_called_once_with(
+            {"last_scraped": {"https://u1": 5.0}}
+        )
+        clock.now += 3600
+        self.assertFalse(snapshotter.restore(monitor))
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+import httpx
+
+from tools.persistence.outbox import OutboxItemSink, SqliteOutbox
+from tools.persistence.sinks import BaseItemSink, TopnDbItemSink, idempotency_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSink(BaseItemSink):
+    def __init__(self, fail_urls=()):
+        self.fail_urls = set(fail_urls)
+        self.received = []
+
+    async def write(self, records):
+        self.received.extend(records)
+        return [r for r in records if r["item_url"] not in self.fail_urls]
+
+
+def record(n, source="SRC"):
+    return {"item_url": f"https://www.olx.pl/d/oferta/{n}.html", "source_url": source}
+
+
+class TestOutboxItemSink(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "outbox.db")
+        self.clock = FakeClock()
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    def make_sink(self, target, **kwargs):
+        return OutboxItemSink(
+            SqliteOutbox(self.path, clock=self.clock), target, **kwargs
+        )
+
+    async def test_write_is_durable_before_flush(self):
+        sink = self.make_sink(RecordingSink())
+        accepted = await sink.write([record(1), record(2)])
+        self.assertEqual(len(accepted), 2)
+        sink.outbox.close()
+
+        # A new process sees the pending records and delivers them.
+        target = RecordingSink()
+        sink = self.make_sink(target)
+        self.assertEqual(sink.outbox.pending(), 2)
+        self.assertEqual(await sink.flush_once(), 2)
+        self.assertEqual(sink.outbox.pending(), 0)
+        self.assertEqual(
+            [r["item_url"] for r in target.received][0], record(1)["item_url"]
+        )
+        await sink.close()
+
+    async def test_duplicate_records_are_queued_once(self):
+        sink = self.make_sink(RecordingSink())
+        await sink.write([record(1)])
+        await sink.write([record(1), record(1, source="OTHER")])
+        self.assertEqual(sink.outbox.pending(), 2)
+        self.assertEqual(sink.enqueued, 2)
+        await sink.close()
+
+    async def test_pending_item_urls_by_source(self):
+        sink = self.make_sink(RecordingSink())
+        await sink.write([record(1), record(2, source="OTHER")])
+        self.assertEqual(await sink.pending_item_urls(["SRC"]), {record(1)["item_url"]})
+        await sink.flush_once()
+        self.assertEqual(await sink.pending_item_urls(["SRC", "OTHER"]), set())
+        await sink.close()
+
+    async def test_failed_records_are_retried_with_backoff(self):
+        target = RecordingSink(fail_urls={record(2)["item_url"]})
+        sink = self.make_sink(target, base_backoff=10, batch_size=10)
+        await sink.write([record(1), record(2)])
+
+        self.assertEqual(await sink.flush_once(), 1)
+        self.assertEqual(sink.outbox.pending(), 1)
+        # Not due yet
+        self.assertEqual(await sink.flush_once(), 0)
+
+        target.fail_urls.clear()
+        self.clock.now += 10
+        self.assertEqual(await sink.flush_once(), 1)
+        self.assertEqual(sink.outbox.pending(), 0)
+        self.assertEqual(sink.retries, 1)
+        await sink.close()
+
+    async def test_exhausted_records_become_dead_letters(self):
+        target = RecordingSink(fail_urls={record(1)["item_url"]})
+        sink = self.make_sink(target, base_backoff=1, max_backoff=1, max_attempts=3)
+        await sink.write([record(1)])
+        for _ in range(3):
+            await sink.flush_once()
+            self.clock.now += 1
+
+        self.assertEqual(len(target.received), 3)
+        self.assertEqual((sink.stats["pending"], sink.stats["dead_letters"]), (0, 1))
+        self.assertEqual(await sink.pending_item_urls(["SRC"]), set())
+        self.assertEqual(await sink.flush_once(), 0)
+        self.assertEqual(len(target.received), 3)
+
+        # Scraped again later: queued afresh and delivered
+        target.fail_urls.clear()
+        self.assertEqual(await sink.write([record(1)]), [record(1)])
+        self.assertEqual(sink.outbox.pending(), 1)
+        self.assertEqual(await sink.flush_once(), 1)
+        self.assertEqual(sink.stats["dead_letters"], 0)
+        await sink.close()
+
+    async def test_rejected_records_are_not_retried(self):
+        rejection = httpx.HTTPStatusError(
+            "bad request",
+            request=httpx.Request("POST", "http://api"),
+            response=httpx.Response(422),
+        )
+        db = AsyncMock()
+        db.create_item.side_effect = [rejection, None]
+        sink = self.make_sink(TopnDbItemSink(db))
+        await sink.write([record(1), record(2)])
+
+        self.assertEqual(await sink.flush_once(), 1)
+        self.assertEqual((sink.stats["pending"], sink.stats["dead_letters"]), (0, 1))
+        self.assertEqual(sink.retries, 0)
+        await sink.close()
+
+    async def test_outbox_without_status_column_is_upgraded(self):
+        import sqlite3
+
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "idempotency_key TEXT NOT NULL UNIQUE, payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, last_error TEXT, "
+            "created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO outbox (idempotency_key, payload, created_at) "
+            "VALUES (?, ?, 0)",
+            (idempotency_key(record(1)), json.dumps(record(1))),
+        )
+        conn.commit()
+        conn.close()
+
+        sink = self.make_sink(RecordingSink())
+        self.assertEqual(await sink.pending_item_urls(["SRC"]), {record(1)["item_url"]})
+        self.assertEqual(await sink.flush_once(), 1)
+        await sink.close()
+
+    async def test_background_flusher_drains_outbox(self):
+        target = RecordingSink()
+        sink = self.make_sink(target, flush_interval=0.01)
+        await sink.start()
+        await sink.write([record(1)])
+        for _ in range(100):
+            if target.received:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(len(target.received), 1)
+        await sink.close()
+
+
+class TestTopnDbItemSink(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_conflict_counts_as_stored_and_errors_are_dropped(self):
+        conflict = httpx.HTTPStatusError(
+            "conflict",
+            request=httpx.Request("POST", "http://api"),
+            response=httpx.Response(409),
+        )
+        db = AsyncMock()
+        db.create_item.side_effect = [None, conflict, RuntimeError("down")]
+        sink = TopnDbItemSink(db)
+
+        stored = await sink.write([record(1), record(2), record(3)])
+
+        self.assertEqual(stored, [record(1), record(2)])
+        self.assertEqual(
+            db.create_item.await_args_list[0].kwargs["idempotency_key"],
+            idempotency_key(record(1)),
+        )
+        self.assertEqual(
+            sink.stats, {"written": 1, "duplicates": 1, "failed": 1, "rejected": 0}
+        )
+
+    async def test_client_errors_other_than_timeouts_are_permanent(self):
+        def error(status):
+            return httpx.HTTPStatusError(
+                str(status),
+                request=httpx.Request("POST", "http://api"),
+                response=httpx.Response(status),
+            )
+
+        db = AsyncMock()
+        db.create_item.side_effect = [error(400), error(408), error(429), error(503)]
+        sink = TopnDbItemSink(db)
+
+        records = [record(n) for n in range(4)]
+        stored, rejected = await sink.write_with_rejections(records)
+
+        self.assertEqual((stored, rejected), ([], [records[0]]))
+        self.assertEqual(sink.stats["rejected"], 1)
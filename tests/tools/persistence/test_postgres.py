@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+
+from tools.persistence.postgres import PostgresItemSink, copy_text
+
+SCHEMA = """
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    item_url TEXT NOT NULL UNIQUE,
+    source_url TEXT,
+    title TEXT,
+    price TEXT,
+    location TEXT,
+    created_at TEXT,
+    created_at_pretty TEXT,
+    image_url TEXT,
+    description TEXT,
+    source TEXT,
+    first_seen TEXT,
+    summary_price INTEGER,
+    summary_deposit INTEGER,
+    summary_animals_allowed BOOLEAN,
+    summary_rent INTEGER,
+    repost_of TEXT
+)
+"""
+
+
+def record(n, source="SRC"):
+    return {
+        "item_url": f"https://www.olx.pl/d/oferta/{n}.html",
+        "source_url": source,
+        "title": f"Flat {n}",
+        "price": "2 500 zł",
+        "description": "line 1\nline 2",
+        "summary_price": 2500,
+        "summary_animals_allowed": False,
+        "ad_id": n,  # not a column; ignored
+    }
+
+
+class TestPostgresItemSink(IsolatedAsyncioTestCase):
+    """Runs against SQLite as a stand-in for Postgres."""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "items.db")
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(SCHEMA)
+        self.sink = PostgresItemSink(
+            lambda: sqlite3.connect(self.path, check_same_thread=False),
+            paramstyle="qmark",
+            max_rows_per_statement=2,
+        )
+
+    async def asyncTearDown(self):
+        await self.sink.close()
+        self.tmp.cleanup()
+
+    def rows(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute(
+                "SELECT item_url, source_url, description, summary_price, "
+                "summary_animals_allowed, repost_of FROM items ORDER BY id"
+            ).fetchall()
+
+    async def test_bulk_insert_skips_existing_item_urls(self):
+        stored = await self.sink.write([record(1), record(2), record(3)])
+        self.assertEqual(len(stored), 3)
+        again = await self.sink.write([record(3, source="OTHER"), record(4)])
+
+        # Already stored items count as accepted but are not inserted again
+        self.assertEqual(len(again), 2)
+        self.assertEqual(len(self.rows()), 4)
+        self.assertEqual(
+            self.rows()[2],
+            (record(3)["item_url"], "SRC", "line 1\nline 2", 2500, 0, None),
+        )
+        self.assertEqual(
+            self.sink.stats, {"written": 4, "duplicates": 1, "failed": 0, "copies": 0}
+        )
+
+    async def test_failed_batch_is_rolled_back_and_reconnects(self):
+        bad = record(2)
+        bad["item_url"] = None  # violates NOT NULL
+        self.assertEqual(await self.sink.write([record(1), record(5), bad]), [])
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(self.sink.stats["failed"], 3)
+
+        self.assertEqual(len(await self.sink.write([record(1)])), 1)
+        self.assertEqual(len(self.rows()), 1)
+
+    async def test_large_batches_use_copy(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1,), (1,)]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        sink = PostgresItemSink(lambda: conn, copy_threshold=3)
+
+        stored = await sink.write([record(1), record(2), record(2)])
+
+        self.assertEqual(len(stored), 3)
+        self.assertEqual(sink.stats["copies"], 1)
+        self.assertEqual(sink.stats["duplicates"], 1)
+        copy_sql, data = cursor.copy_expert.call_args.args
+        self.assertTrue(copy_sql.startswith("COPY items_copy (item_url, source_url"))
+        self.assertIn("line 1\\nline 2", data.getvalue())
+        self.assertIn(
+            "ON CONFLICT (item_url) DO NOTHING", cursor.execute.call_args.args[0]
+        )
+        conn.commit.assert_called_once()
+
+    async def test_copy_text_escapes_values(self):
+        self.assertEqual(copy_text([("a\tb", None, "c\\d")]), "a\\tb\t\\N\tc\\\\d\n")
+
+    async def test_build_item_sink_selects_postgres(self):
+        from tools.persistence import sinks
+
+        with patch.object(sinks.settings, "ITEM_SINK", "postgres"), patch.object(
+            sinks.settings, "DATABASE_URL", None
+        ):
+            with self.assertRaises(ValueError):
+                sinks.build_item_sink(MagicMock())
+        with patch.object(sinks.settings, "ITEM_SINK", "postgres"), patch.object(
+            sinks.settings, "DATABASE_URL", "postgresql://db/items"
+        ):
+            self.assertIsInstance(sinks.build_item_sink(MagicMock()), PostgresItemSink)
@@ -26,12 +26,46 @@ class TestDescriptionSummarizer(IsolatedAsyncioTestCase):
 
     async def test_summarize_returns_content(self):
         s = self.DescriptionSummarizer()
-        fake_resp = MagicMock(content="summary")
+        fake_resp = MagicMock(content='{"price": 3000, "rent": "450 zł"}')
         self.settings.GENERATIVE_MODEL = types.SimpleNamespace(
             ainvoke=AsyncMock(return_value=fake_resp)
         )
         res = await s.summarize("desc")
-        self.assertEqual(res, "summary")
+        self.assertEqual(
+            res, "price: 3000\ndeposit: 0\nanimals_allowed: NOT_SPECIFIED\nrent: 450"
+        )
+
+    async def test_structured_output_mode_and_local_repair(self):
+        from models import DescriptionSummary
+
+        raw = MagicMock(content='```json\n{"price": "2 800", "deposit": 2800,}\n```')
+        runnable = types.SimpleNamespace(
+            ainvoke=AsyncMock(
+                side_effect=[
+                    {
+                        "raw": None,
+                        "parsed": DescriptionSummary(price=1),
+                        "parsing_error": None,
+                    },
+                    {"raw": raw, "parsed": None, "parsing_error": ValueError()},
+                ]
+            )
+        )
+        model = types.SimpleNamespace(
+            with_structured_output=MagicMock(return_value=runnable)
+        )
+        self.settings.GENERATIVE_MODEL = model
+        s = self.DescriptionSummarizer(extractor=None, min_confidence=1.1)
+        s.extractor = None
+
+        self.assertEqual((await s.summarize_structured("a")).price, 1)
+        repaired = await s.summarize_structured("b")
+        self.assertEqual((repaired.price, repaired.deposit), (2800, 2800))
+        self.assertEqual(s.repairs, 1)
+        # The structured wrapper is built once per model
+        model.with_structured_output.assert_called_once_with(
+            DescriptionSummary, method="json_mode", include_raw=True
+        )
 
     async def test_summarize_handles_exception(self):
         s = self.DescriptionSummarizer()
@@ -40,3 +74,74 @@ class TestDescriptionSummarizer(IsolatedAsyncioTestCase):
         )
         res = await s.summarize("desc")
         self.assertEqual(res, "")
+
+    async def test_confident_rule_extraction_skips_llm(self):
+        s = self.DescriptionSummarizer()
+        model = types.SimpleNamespace(ainvoke=AsyncMock())
+        self.settings.GENERATIVE_MODEL = model
+        res = await s.summarize(
+            "Cena 2500 zł, kaucja 2500 zł, czynsz 400 zł, bez zwierząt"
+        )
+        self.assertEqual(
+            res, "price: 2500\ndeposit: 2500\nanimals_allowed: false\nrent: 400"
+        )
+        model.ainvoke.assert_not_awaited()
+        self.assertEqual(s.rule_hits, 1)
+        self.assertEqual(s.llm_calls, 0)
+
+    async def test_low_confidence_falls_back_to_llm(self):
+        s = self.DescriptionSummarizer(min_confidence=1.1)
+        fake_resp = MagicMock(content="price: 2500\ndeposit: 2500")
+        self.settings.GENERATIVE_MODEL = types.SimpleNamespace(
+            ainvoke=AsyncMock(return_value=fake_resp)
+        )
+        res = await s.summarize("Cena 2500 zł, kaucja 2500 zł")
+        self.assertTrue(res.startswith("price: 2500\ndeposit: 2500"))
+        self.assertEqual(s.llm_calls, 1)
+
+    async def test_llm_summaries_are_cached_and_exported(self):
+        s = self.DescriptionSummarizer(cache_size=1)
+        s.extractor = None
+        model = types.SimpleNamespace(
+            ainvoke=AsyncMock(
+                side_effect=[
+                    MagicMock(content='{"price": 1}'),
+                    MagicMock(content='{"price": 2}'),
+                ]
+            )
+        )
+        self.settings.GENERATIVE_MODEL = model
+
+        first = await s.summarize_structured("same text")
+        again = await s.summarize_structured("same text ")
+        self.assertEqual((first.price, again.price), (1, 1))
+        self.assertEqual((model.ainvoke.await_count, s.cache_hits), (1, 1))
+
+        # LRU bound of one entry: a new description evicts the old one
+        await s.summarize_structured("other text")
+        restored = self.DescriptionSummarizer(cache_size=5)
+        restored.extractor = None
+        restored.restore_state(s.export_state())
+        self.assertEqual(len(restored._cache), 1)
+        self.assertEqual((await restored.summarize_structured("other text")).price, 2)
+        self.assertEqual(restored.cache_hits, 1)
+
+    async def test_route_selects_prompt_or_skips_llm(self):
+        from tools.processing.routing import Route
+
+        s = self.DescriptionSummarizer()
+        model = types.SimpleNamespace(
+            ainvoke=AsyncMock(return_value=MagicMock(content='{"price": 900}'))
+        )
+        self.settings.GENERATIVE_MODEL = model
+        text = "Sprzedam rower, stan dobry"
+
+        self.assertIsNone(await s.summarize_structured(text, Route("none")))
+        self.assertIsNone(await s.summarize_structured(text, Route("rules")))
+        model.ainvoke.assert_not_awaited()
+
+        summary = await s.summarize_structured(text, Route("llm", "price"))
+        self.assertEqual(summary.price, 900)
+        prompt = model.ainvoke.await_args.args[0]
+        self.assertIn("asking price", prompt)
+        self.assertIn(text, prompt)
@@ -0,0 +1,105 @@
+import os
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from tools.processing.extractor import (
+    RuleBasedExtractor,
+    format_summary,
+    parse_summary,
+)
+from tools.processing.extractor_benchmark import (
+    compare,
+    evaluate_extractor,
+    load_corpus,
+)
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fixtures", "descriptions.jsonl"
+)
+
+
+class TestRuleBasedExtractor(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.extractor = RuleBasedExtractor()
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_extracts_all_fields_with_full_confidence(self):
+        res = self.extractor.extract(
+            "Cena: 2 500 zł + czynsz administracyjny 550 zł. Kaucja 3000 zł. "
+            "Zwierzęta mile widziane."
+        )
+        self.assertEqual(res.price, 2500)
+        self.assertEqual(res.deposit, 3000)
+        self.assertEqual(res.rent, 550)
+        self.assertTrue(res.animals_allowed)
+        self.assertEqual(res.confidence, 1.0)
+        self.assertFalse(res.has_conflicts)
+
+    async def test_converts_foreign_currency(self):
+        res = self.extractor.extract("Do wynajęcia za 800 EUR, kaucja 1600 eur")
+        self.assertEqual(res.price, 3200)
+        self.assertEqual(res.deposit, 6400)
+
+    async def test_missing_price_is_low_confidence(self):
+        res = self.extractor.extract("Ładne mieszkanie, zapraszam")
+        self.assertEqual(res.price, 0)
+        self.assertLess(res.confidence, 0.85)
+
+    async def test_conflicting_pet_policy_is_flagged(self):
+        res = self.extractor.extract(
+            "Cena 2000 zł. Zwierzęta mile widziane. Bez zwierząt w sypialni."
+        )
+        self.assertIn("animals_allowed", res.conflicts)
+        self.assertIsNone(res.animals_allowed)
+
+    async def test_conflicting_amounts_are_flagged(self):
+        res = self.extractor.extract("Cena 2000 zł, a od lipca cena 2200 zł")
+        self.assertIn("price", res.conflicts)
+
+    async def test_month_counts_are_not_amounts(self):
+        for text in (
+            "Cena 3000 zł. Kaucja: 2 miesiące.",
+            "Cena 3000 zł, kaucja zwrotna 1-miesięczna.",
+            "Cena 3000 zł, kaucja 5.",
+        ):
+            res = self.extractor.extract(text)
+            self.assertEqual(res.deposit, 0, text)
+            self.assertLess(res.confidence, 0.85, text)
+
+    async def test_summary_format_round_trips(self):
+        text = format_summary(
+            {"price": 1, "deposit": 2, "animals_allowed": False, "rent": 3}
+        )
+        self.assertEqual(text, "price: 1\ndeposit: 2\nanimals_allowed: false\nrent: 3")
+        self.assertEqual(
+            parse_summary(text),
+            {"price": 1, "deposit": 2, "animals_allowed": False, "rent": 3},
+        )
+        self.assertIsNone(
+            parse_summary("animals_allowed: NOT_SPECIFIED")["animals_allowed"]
+        )
+
+
+class TestExtractorBenchmark(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.corpus = load_corpus(CORPUS_PATH)
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_confident_answers_match_labels(self):
+        report = evaluate_extractor(self.corpus)
+        self.assertGreaterEqual(report["coverage"], 0.5)
+        self.assertEqual(report["confident_exact_match"], 1.0)
+        self.assertIn("p95_ms", report["latency"])
+
+    async def test_compare_includes_llm_report(self):
+        llm = AsyncMock(
+            return_value="price: 0\ndeposit: 0\nanimals_allowed: NOT_SPECIFIED\nrent: 0"
+        )
+        report = await compare(self.corpus, summarize=llm)
+        self.assertIn("rules", report)
+        self.assertIn("llm", report)
+        self.assertEqual(llm.await_count, len(self.corpus))
@@ -0,0 +1,111 @@
+import types
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from tools.processing.llm_pool import LLMPool, PoolMember, build_llm_pool
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def fake_model(answer="ok", error=None):
+    return types.SimpleNamespace(
+        ainvoke=AsyncMock(return_value=answer, side_effect=error)
+    )
+
+
+class TestLLMPool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_spreads_calls_by_weight_and_remaining_quota(self):
+        heavy = PoolMember("heavy", fake_model("a"), weight=3, requests_per_minute=2)
+        light = PoolMember("light", fake_model("b"), weight=1)
+        pool = LLMPool([heavy, light], clock=self.clock)
+
+        answers = [await pool.ainvoke("p") for _ in range(4)]
+
+        # heavy until its per-minute budget is used up, then light
+        self.assertEqual(answers, ["a", "a", "b", "b"])
+        self.clock.now += 60
+        self.assertEqual(await pool.ainvoke("p"), "a")
+        self.assertEqual(pool.stats["heavy"]["requests"], 3)
+
+    async def test_fails_over_and_cools_down_failing_member(self):
+        error = APIStatusError(429)
+        broken = PoolMember("broken", fake_model(error=error), weight=10)
+        spare = PoolMember("spare", fake_model("spare"), weight=0.01)
+        pool = LLMPool([broken, spare], cooldown_seconds=30, clock=self.clock)
+
+        self.assertEqual(await pool.ainvoke("p"), "spare")
+        self.assertEqual(await pool.ainvoke("p"), "spare")
+        broken.model.ainvoke.assert_awaited_once()
+
+        # Back after the cooldown; a repeated failure doubles it
+        self.clock.now += 31
+        await pool.ainvoke("p")
+        self.assertEqual(broken.cooldown_until, self.clock.now + 60)
+        self.assertEqual(pool.stats["broken"]["failures"], 2)
+
+    async def test_raises_last_error_when_every_member_fails(self):
+        pool = LLMPool(
+            [PoolMember("only", fake_model(error=ValueError("boom")))],
+            clock=self.clock,
+        )
+        with self.assertRaises(ValueError):
+            await pool.ainvoke("p")
+
+    async def test_client_errors_are_raised_without_failover(self):
+        bad_request = APIStatusError(400)
+        first = PoolMember("first", fake_model(error=bad_request), weight=10)
+        spare = PoolMember("spare", fake_model("spare"), weight=0.01)
+        pool = LLMPool([first, spare], clock=self.clock)
+
+        with self.assertRaises(APIStatusError):
+            await pool.ainvoke("p")
+        spare.model.ainvoke.assert_not_awaited()
+        self.assertEqual(first.cooldown_until, 0.0)
+        self.assertEqual(first.in_flight, 0)
+
+    async def test_structured_output_is_bound_per_member(self):
+        structured = fake_model({"parsed": 1})
+        capable = types.SimpleNamespace(
+            ainvoke=AsyncMock(),
+            with_structured_output=MagicMock(return_value=structured),
+        )
+        plain = PoolMember("plain", fake_model("raw"), weight=0.1)
+        pool = LLMPool([PoolMember("capable", capable), plain], clock=self.clock)
+        runnable = pool.with_structured_output(dict, method="json_mode")
+
+        self.assertEqual(await runnable.ainvoke("p"), {"parsed": 1})
+        self.assertEqual(await runnable.ainvoke("p"), {"parsed": 1})
+        capable.with_structured_output.assert_called_once_with(dict, method="json_mode")
+
+        structured.ainvoke.side_effect = APIStatusError(503)
+        self.assertEqual(await runnable.ainvoke("p"), "raw")
+
+    async def test_build_from_config(self):
+        providers = {"groq": lambda config: fake_model(config["model"])}
+        pool = build_llm_pool(
+            [{"model": "m1", "weight": 2, "requests_per_minute": 30}],
+            providers=providers,
+        )
+        self.assertEqual(pool.members[0].name, "groq:m1#0")
+        self.assertEqual(pool.members[0].requests_per_minute, 30)
+        self.assertEqual(await pool.ainvoke("p"), "m1")
+        with self.assertRaises(ValueError):
+            build_llm_pool([{"provider": "nope", "model": "x"}], providers=providers)
@@ -0,0 +1,51 @@
+from unittest import IsolatedAsyncioTestCase
+
+from tools.processing.routing import (
+    Route,
+    SummaryRouter,
+    category_from_breadcrumb,
+    category_from_url,
+)
+
+
+class TestSummaryRouter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.router = SummaryRouter(
+            {
+                "nieruchomosci/mieszkania/wynajem": "llm:apartment",
+                "/d/nieruchomosci/": "rules",
+                "elektronika": "none",
+            },
+            default="llm:price",
+        )
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_category_from_url_and_breadcrumb(self):
+        self.assertEqual(
+            category_from_url("https://www.olx.pl/d/elektronika/telefony/?q=x"),
+            "elektronika/telefony",
+        )
+        self.assertEqual(category_from_url("https://www.olx.pl/d/oferta/a.html"), "")
+        self.assertEqual(
+            category_from_breadcrumb(
+                ["/", "/nieruchomosci/", "https://www.olx.pl/nieruchomosci/domy/"]
+            ),
+            "nieruchomosci/domy",
+        )
+
+    async def test_longest_prefix_wins_and_default_applies(self):
+        route = self.router.route("nieruchomosci/mieszkania/wynajem/warszawa")
+        self.assertEqual(route, Route("llm", "apartment"))
+        self.assertEqual(self.router.route("nieruchomosci/domy"), Route("rules"))
+        self.assertFalse(self.router.route("elektronika/telefony").needs_summary)
+        self.assertEqual(self.router.route(""), Route("llm", "price"))
+        self.assertIsNone(self.router.match("warszawa"))
+        self.assertEqual(self.router.stats, {"llm": 2, "rules": 1, "none": 1})
+
+    async def test_invalid_routes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Route.parse("llm:missing")
+        with self.assertRaises(ValueError):
+            SummaryRouter({"moda": "skip"})
@@ -18,3 +18,24 @@ class TestBaseScraper(IsolatedAsyncioTestCase):
     async def test_close_returns_none(self):
         res = await self.scraper.close()
         self.assertIsNone(res)
+
+    async def test_list_and_iterator_forms_are_interchangeable(self):
+        class StreamingScraper(BaseScraper):
+            async def iter_new_items(self, url, existing_urls, summarizer):
+                for i in range(2):
+                    yield f"{url}/{i}"
+
+        class ListScraper(BaseScraper):
+            async def fetch_new_items(self, url, existing_urls, summarizer):
+                return [f"{url}/a"]
+
+        self.assertEqual(
+            await StreamingScraper().fetch_new_items("u", set(), None), ["u/0", "u/1"]
+        )
+        streamed = [i async for i in ListScraper().iter_new_items("u", set(), None)]
+        self.assertEqual(streamed, ["u/a"])
+
+        with self.assertRaises(TypeError):
+
+            class IncompleteScraper(BaseScraper):
+                pass
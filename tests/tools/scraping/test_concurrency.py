@@ -0,0 +1,107 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.scraping.concurrency import (
+    AIMDLimiter,
+    NoPermitAvailable,
+    looks_like_captcha,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAIMDLimiter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+        self.limiter = AIMDLimiter(
+            initial=2, max_limit=4, latency_target=1.0, clock=self.clock
+        )
+
+    async def asyncTearDown(self):
+        pass
+
+    async def respond(self, latency=0.1, **outcome):
+        async with self.limiter.acquire() as permit:
+            self.clock.now += latency
+            permit.report(**outcome)
+
+    async def test_additive_increase_per_window_of_healthy_responses(self):
+        for _ in range(2):
+            await self.respond(status_code=200)
+        self.assertEqual(self.limiter.limit, 3)
+        # Slow responses do not count towards an increase
+        for _ in range(3):
+            await self.respond(latency=2.0, status_code=200)
+        self.assertEqual(self.limiter.limit, 3)
+        for _ in range(10):
+            await self.respond(status_code=200)
+        self.assertEqual(self.limiter.limit, 4)
+
+    async def test_raised_limit_wakes_waiters(self):
+        import asyncio
+        import gc
+
+        self.limiter._limit = 1
+        async with self.limiter.acquire() as permit:
+            waiter = asyncio.create_task(self._acquire_and_release())
+            await asyncio.sleep(0)
+            self.limiter._healthy_streak = 1
+            permit.report(status_code=200)
+            self.assertEqual(self.limiter.limit, 2)
+            gc.collect()
+            # Woken by the raised limit, not by this permit's release
+            await asyncio.wait_for(waiter, 1)
+
+    async def _acquire_and_release(self):
+        async with self.limiter.acquire():
+            pass
+
+    async def test_multiplicative_decrease_with_cooldown(self):
+        self.limiter._limit = 4
+        await self.respond(status_code=429)
+        self.assertEqual(self.limiter.limit, 2)
+        # Same burst: no second cut within the cooldown
+        await self.respond(error=httpx.ReadTimeout("slow"))
+        self.assertEqual(self.limiter.limit, 2)
+        self.clock.now += 10
+        await self.respond(status_code=200, captcha=True)
+        self.assertEqual(self.limiter.limit, 1)
+        self.assertEqual(self.limiter.stats["decreases"], 2)
+
+    async def test_permits_are_bounded_by_limit(self):
+        self.limiter.max_limit = 2
+        active, peak = 0, 0
+
+        async def work():
+            nonlocal active, peak
+            async with self.limiter.acquire() as permit:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                permit.report(status_code=200)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_acquire_without_waiting_fails_when_full(self):
+        self.limiter._limit = 1
+        async with self.limiter.acquire():
+            self.assertFalse(self.limiter.has_free_permit)
+            with self.assertRaises(NoPermitAvailable):
+                async with self.limiter.acquire(wait=False):
+                    pass  # pragma: no cover
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_captcha_markers(self):
+        self.assertTrue(looks_like_captcha('<div class="g-recaptcha"></div>'))
+        self.assertFalse(looks_like_captcha("<html>ogłoszenia</html>"))
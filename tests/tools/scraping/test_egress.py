@@ -0,0 +1,151 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+from tools.scraping.egress import Egress, EgressPool, build_egresses
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def stand_in_proxy(status=200, seen=None, name="", headers=None):
+    """httpx client whose transport plays the role of a local proxy."""
+
+    def handler(request):
+        if seen is not None:
+            seen.append((name, request.headers.get("user-agent")))
+        return httpx.Response(status, text="ok", headers={"retry-after": "600"})
+
+    return httpx.AsyncClient(headers=headers, transport=httpx.MockTransport(handler))
+
+
+class TestEgressPool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+
+    async def asyncTearDown(self):
+        pass
+
+    def _pool(self, egresses, statuses=None, seen=None):
+        statuses = statuses or {}
+        return EgressPool(
+            egresses,
+            client_factory=lambda e: stand_in_proxy(
+                statuses.get(e.name, 200), seen, e.name, e.headers
+            ),
+            cooldown_seconds=60,
+            clock=self.clock,
+        )
+
+    async def _request(self, pool):
+        async with pool.acquire() as egress:
+            response = await pool.client(egress).get("http://olx/")
+            pool.report(
+                egress,
+                status_code=response.status_code,
+                retry_after=response.headers.get("retry-after"),
+            )
+            return egress.name
+
+    async def test_build_egresses_assigns_profiles(self):
+        egresses = build_egresses(
+            {"User-Agent": "base"}, proxies=["http://p1", "http://p2"]
+        )
+        self.assertEqual([e.name for e in egresses], ["direct", "proxy-1", "proxy-2"])
+        self.assertEqual(egresses[0].headers["User-Agent"], "base")
+        self.assertNotEqual(egresses[1].headers["User-Agent"], "base")
+        self.assertEqual(egresses[2].proxy, "http://p2")
+        with self.assertRaises(ValueError):
+            EgressPool([])
+
+    async def test_requests_spread_to_least_loaded(self):
+        seen = []
+        pool = self._pool(
+            [Egress("a", {"User-Agent": "ua-a"}), Egress("b", {"User-Agent": "ua-b"})],
+            seen=seen,
+        )
+        names = [await self._request(pool) for _ in range(4)]
+        self.assertEqual(sorted(names), ["a", "a", "b", "b"])
+        self.assertEqual(set(seen), {("a", "ua-a"), ("b", "ua-b")})
+        await pool.aclose()
+
+    async def test_throttled_egress_cools_down(self):
+        pool = self._pool([Egress("a", {}), Egress("b", {})], statuses={"a": 429})
+        names = [await self._request(pool) for _ in range(4)]
+        self.assertEqual(names.count("a"), 1)
+        stats = pool.stats
+        self.assertFalse(stats["a"]["healthy"])
+        self.assertEqual(stats["a"]["throttled"], 1)
+        # Retry-After longer than the configured cooldown is honoured
+        self.assertEqual(pool.egresses[0].cooldown_until, self.clock.now + 600)
+
+        self.clock.now += 601
+        self.assertTrue(pool.stats["a"]["healthy"])
+
+    async def test_sole_egress_uses_short_cooldown(self):
+        pool = EgressPool([Egress("a", {})], cooldown_seconds=300, clock=self.clock)
+        pool.report(pool.egresses[0], status_code=403)
+        self.assertEqual(pool.egresses[0].cooldown_until, self.clock.now + 30)
+
+    async def test_network_errors_trip_cooldown_after_threshold(self):
+        pool = self._pool([Egress("a", {})])
+        egress = pool.egresses[0]
+        for _ in range(2):
+            pool.report(egress, error=RuntimeError("x"))
+        self.assertTrue(pool.stats["a"]["healthy"])
+        pool.report(egress, error=RuntimeError("x"))
+        self.assertFalse(pool.stats["a"]["healthy"])
+        pool.report(egress, status_code=200)
+        self.assertEqual(egress.consecutive_failures, 0)
+
+    async def test_budget_exhaustion_waits_for_window(self):
+        pool = self._pool([Egress("a", {}, requests_per_minute=1)])
+        await self._request(pool)
+
+        async def advance(_):
+            self.clock.now += 60
+
+        with patch("tools.scraping.egress.asyncio.sleep", new=advance) as _:
+            self.assertEqual(await self._request(pool), "a")
+        self.assertEqual(pool.stats["a"]["requests"], 2)
+
+    async def test_concurrent_acquire_tracks_in_flight(self):
+        pool = self._pool([Egress("a", {}), Egress("b", {})])
+        gate = asyncio.Event()
+        picked = []
+
+        async def hold():
+            async with pool.acquire() as egress:
+                picked.append(egress.name)
+                await gate.wait()
+
+        tasks = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.assertEqual(sorted(picked), ["a", "b"])
+        self.assertEqual(sum(s["in_flight"] for s in pool.stats.values()), 2)
+        gate.set()
+        await asyncio.gather(*tasks)
+
+
+class TestOLXScraperEgress(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        from tools.scraping.olx import OLXScraper
+
+        self.OLXScraper = OLXScraper
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_scraper_reports_status_to_pool(self):
+        scr = self.OLXScraper()
+        scr._client = stand_in_proxy(403)
+        items = await scr.fetch_new_items("http://olx", set(), MagicMock())
+        self.assertEqual(items, [])
+        self.assertEqual(scr.stats["egress"]["direct"]["throttled"], 1)
@@ -0,0 +1,70 @@
+from unittest import IsolatedAsyncioTestCase
+
+from models import DescriptionSummary
+from tools.scraping.fingerprint import (
+    FingerprintEntry,
+    FingerprintIndex,
+    image_key,
+    listing_fingerprint,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestFingerprint(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_fingerprint_ignores_formatting_and_image_size(self):
+        a = listing_fingerprint(
+            "Mieszkanie 2-pokojowe, Mokotów!",
+            "2 500 zł",
+            "Warszawa, Mokotów",
+            "https://ireland.apollo.olx.pl/v1/files/abc-PL/image;s=216x152",
+        )
+        b = listing_fingerprint(
+            "mieszkanie  2 pokojowe mokotow",
+            "2500 zł",
+            "warszawa - mokotów",
+            "https://ireland.apollo.olx.pl/v1/files/abc-PL/image;s=1000x700",
+        )
+        self.assertEqual(a, b)
+        self.assertNotEqual(
+            a, listing_fingerprint("Mieszkanie 2-pokojowe", "2600 zł", "Warszawa", "")
+        )
+        self.assertIsNone(listing_fingerprint("", "1 zł", "Warszawa", ""))
+        self.assertEqual(
+            image_key("http://img/1.jpg?w=1"), image_key("http://img/1.jpg")
+        )
+
+    async def test_index_expires_bounds_and_roundtrips(self):
+        clock = FakeClock()
+        index = FingerprintIndex(ttl_seconds=60, max_entries=2, clock=clock)
+        summary = DescriptionSummary(price=2500)
+        index.add("a", FingerprintEntry("https://x/a", "desc a", "img", summary))
+        index.add("b", FingerprintEntry("https://x/b", "desc b", "img"))
+        index.add("c", FingerprintEntry("https://x/c", "desc c", "img"))
+
+        self.assertIsNone(index.lookup("a"))  # evicted
+        self.assertEqual(index.lookup("b").description, "desc b")
+
+        restored = FingerprintIndex(ttl_seconds=60, clock=clock)
+        restored.restore_state(index.export_state())
+        self.assertEqual(len(restored), 2)
+
+        index.add("a", FingerprintEntry("https://x/a", "desc a", "img", summary))
+        restored.restore_state(index.export_state())
+        self.assertEqual(restored.lookup("a").summary.price, 2500)
+
+        clock.now += 61
+        self.assertIsNone(restored.lookup("a"))
+        self.assertEqual(restored.stats["hits"], 1)
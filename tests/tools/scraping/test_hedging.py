@@ -0,0 +1,146 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.scraping.hedging import Hedger, LatencyTracker
+
+
+def trained(**kwargs):
+    hedger = Hedger(min_samples=5, min_delay=0.01, **kwargs)
+    for _ in range(5):
+        hedger.latencies.add(0.01)
+    hedger.requests = 100
+    return hedger
+
+
+class TestHedger(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_percentile(self):
+        tracker = LatencyTracker()
+        for value in range(1, 101):
+            tracker.add(value / 100)
+        self.assertEqual(tracker.percentile(0.95), 0.96)
+        self.assertIsNone(LatencyTracker().percentile(0.5))
+
+    async def test_no_hedge_while_learning(self):
+        hedger = Hedger(min_samples=5)
+        calls = []
+
+        async def fn(attempt):
+            calls.append(1)
+            return "ok"
+
+        self.assertEqual(await hedger.run(fn), "ok")
+        self.assertEqual((len(calls), hedger.hedged), (1, 0))
+
+    async def test_slow_primary_loses_to_hedge(self):
+        hedger = trained()
+        delays = [1.0, 0.0]
+        cancelled = []
+
+        async def fn(attempt):
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        self.assertEqual(await hedger.run(fn), 0.0)
+        self.assertEqual(cancelled, [1.0])
+        self.assertEqual(hedger.stats["hedge_wins"], 1)
+        self.assertEqual(hedger.stats["hedge_win_rate"], 1.0)
+
+    async def test_failed_backup_falls_back_to_primary(self):
+        hedger = trained()
+        attempts = []
+
+        async def fn(attempt):
+            attempts.append(1)
+            if len(attempts) == 2:
+                raise RuntimeError("backup failed")
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        self.assertEqual(await hedger.run(fn), "primary")
+        self.assertEqual(hedger.primary_wins, 1)
+
+    async def test_hedge_rate_is_capped(self):
+        hedger = trained(max_hedge_ratio=0.1)
+        hedger.hedged = 10
+        calls = []
+
+        async def fn(attempt):
+            calls.append(1)
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        await hedger.run(fn)
+        self.assertEqual(len(calls), 1)
+
+    async def test_backup_is_skipped_when_it_cannot_start(self):
+        hedger = trained()
+        calls = []
+
+        async def fn(attempt):
+            calls.append(attempt.backup)
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        self.assertEqual(await hedger.run(fn, can_hedge=lambda: False), "ok")
+        self.assertEqual(calls, [False])
+        self.assertEqual((hedger.hedged, hedger.stats["skipped"]), (0, 1))
+
+    async def test_only_the_timed_block_counts_as_latency(self):
+        now = [0.0]
+        hedger = Hedger(min_samples=1, clock=lambda: now[0])
+
+        async def fn(attempt):
+            now[0] += 5  # waiting for a permit
+            with attempt.timed():
+                now[0] += 0.5
+            return "ok"
+
+        await hedger.run(fn)
+        self.assertEqual(hedger.latencies.percentile(0.5), 0.5)
+
+    async def test_cancelled_caller_cancels_attempts(self):
+        hedger = trained()
+        started, cancelled = [], []
+
+        async def fn(attempt):
+            started.append(attempt.backup)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(attempt.backup)
+                raise
+
+        for wait in (0.005, 0.05):  # before and after the backup starts
+            started.clear()
+            cancelled.clear()
+            caller = asyncio.create_task(hedger.run(fn))
+            await asyncio.sleep(wait)
+            caller.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await caller
+            self.assertEqual(sorted(cancelled), sorted(started))
+            self.assertTrue(started)
+
+    async def test_cancelled_attempt_adds_lower_bound_latency(self):
+        now = [0.0]
+        hedger = Hedger(min_samples=1, clock=lambda: now[0])
+
+        async def fn(attempt):
+            with attempt.timed():
+                now[0] += 3
+                raise asyncio.CancelledError
+
+        with self.assertRaises(asyncio.CancelledError):
+            await hedger.run(fn)
+        self.assertEqual(hedger.latencies.percentile(0.5), 3)
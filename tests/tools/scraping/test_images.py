@@ -0,0 +1,64 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from tools.scraping.images import ImageUrlResolver
+
+THUMB = "https://ireland.apollo.olx.pl/v1/files/abc-PL/image;s=216x152"
+HIGHRES = "https://ireland.apollo.olx.pl/v1/files/abc-PL/image;s=1000x700"
+
+
+def head_response(status=200, content_type="image/jpeg"):
+    return MagicMock(status_code=status, headers={"content-type": content_type})
+
+
+class TestImageUrlResolver(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = MagicMock(return_value=0.0)
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_rewrite_known_patterns(self):
+        resolver = ImageUrlResolver(verify=False)
+        self.assertEqual(await resolver.resolve(THUMB), HIGHRES)
+        self.assertEqual(
+            await resolver.resolve(
+                "https://ireland.apollo.olx.pl/v1/files/abc-PL/image?x=1"
+            ),
+            HIGHRES,
+        )
+        self.assertEqual(
+            await resolver.resolve("https://cdn.example/img.jpg"),
+            "https://cdn.example/img.jpg",
+        )
+        self.assertEqual(await resolver.resolve(""), "")
+
+    async def test_verification_is_cached_per_pattern(self):
+        client = MagicMock(head=AsyncMock(return_value=head_response()))
+        resolver = ImageUrlResolver(client=client, clock=self.clock)
+        self.assertEqual(await resolver.resolve(THUMB), HIGHRES)
+        self.assertEqual(
+            await resolver.resolve(THUMB.replace("abc", "def")),
+            HIGHRES.replace("abc", "def"),
+        )
+        client.head.assert_awaited_once_with(HIGHRES)
+
+        # Re-verified once the TTL elapsed
+        self.clock.return_value = 4000.0
+        await resolver.resolve(THUMB)
+        self.assertEqual(client.head.await_count, 2)
+
+    async def test_failed_verification_keeps_original(self):
+        client = MagicMock(head=AsyncMock(return_value=head_response(404)))
+        resolver = ImageUrlResolver(client=client, clock=self.clock)
+        self.assertEqual(await resolver.resolve(THUMB), THUMB)
+        self.assertEqual(await resolver.resolve(THUMB), THUMB)
+        client.head.assert_awaited_once()
+
+    async def test_transient_error_is_not_cached(self):
+        client = MagicMock(
+            head=AsyncMock(side_effect=[RuntimeError("x"), head_response()])
+        )
+        resolver = ImageUrlResolver(client=client, clock=self.clock)
+        self.assertEqual(await resolver.resolve(THUMB), THUMB)
+        self.assertEqual(await resolver.resolve(THUMB), HIGHRES)
@@ -3,6 +3,14 @@ import types
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from models import DescriptionSummary
+from tools.processing.routing import Route
+
+# Category of the ads built by `make_raw_ad` (category id 15).
+FLATS = "nieruchomosci/mieszkania/wynajem"
+
+SUMMARY = DescriptionSummary(price=2500, deposit=2500, animals_allowed=False, rent=400)
+
 OLX_LISTING_HTML = """
 <html><body>
   <div data-testid="l-card">
@@ -20,6 +28,11 @@ OLX_LISTING_HTML = """
 
 DETAIL_HTML = """
 <html><body>
+  <ol data-testid="breadcrumbs">
+    <li data-testid="breadcrumb-item"><a href="/">Strona główna</a></li>
+    <li data-testid="breadcrumb-item"><a href="/nieruchomosci/">Nieruchomości</a></li>
+    <li data-testid="breadcrumb-item"><a href="/nieruchomosci/mieszkania/wynajem/">Wynajem</a></li>
+  </ol>
   <div data-cy="ad_description">Some long description</div>
   <img data-testid="swiper-image-1" srcset="http://a.jpg 200w, http://b.jpg 800w"/>
 </body></html>
@@ -46,38 +59,339 @@ class TestOLXScraper(IsolatedAsyncioTestCase):
     async def asyncTearDown(self):
         pass
 
+    def _mock_transport_client(self, pages, content_length=True):
+        """httpx client serving *pages* (url -> html) in small chunks."""
+        import httpx
+
+        def handler(request):
+            body = pages[str(request.url)].encode()
+
+            async def chunks():
+                for i in range(0, len(body), 16):
+                    yield body[i : i + 16]
+
+            headers = {"content-length": str(len(body))} if content_length else {}
+            return httpx.Response(200, content=chunks(), headers=headers)
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
     async def test_fetch_new_items_filters_and_builds_items(self):
         # Mock httpx responses for list and details
-        list_resp = MagicMock(status_code=200, text=OLX_LISTING_HTML)
-        detail_resp = MagicMock(status_code=200, text=DETAIL_HTML)
+        client = self._mock_transport_client(
+            {
+                "http://olx": OLX_LISTING_HTML,
+                "https://www.olx.pl/d/oferta/1": DETAIL_HTML,
+            }
+        )
 
+        # Only the first card should be considered "recent"
         with patch(
-            "httpx.AsyncClient.get", new=AsyncMock(side_effect=[list_resp, detail_resp])
+            "tools.utils.time_helpers.TimeUtils.within_last_minutes",
+            side_effect=[True, False],
         ):
-            # Only the first card should be considered "recent"
-            with patch(
-                "tools.utils.time_helpers.TimeUtils.within_last_minutes",
-                side_effect=[True, False],
-            ):
-                scr = self.OLXScraper()
-                summarizer = types.SimpleNamespace(
-                    summarize=AsyncMock(return_value="sum")
-                )
-                items = await scr.fetch_new_items(
-                    "http://olx", existing_urls=set(), summarizer=summarizer
-                )
+            scr = self.OLXScraper()
+            scr._client = client
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=SUMMARY)
+            )
+            items = await scr.fetch_new_items(
+                "http://olx", existing_urls=set(), summarizer=summarizer
+            )
 
         self.assertEqual(len(items), 1)
         it = items[0]
         self.assertEqual(it.title, "Nice flat")
-        self.assertEqual(it.description, "sum")
+        self.assertEqual(it.description, SUMMARY.to_text())
+        self.assertIs(it.summary, SUMMARY)
+        self.assertEqual(it.image_url, "http://b.jpg")
         self.assertTrue(it.item_url.startswith("https://www.olx.pl"))
+        # Uncategorised search: routed by the detail page breadcrumb
+        summarizer.summarize_structured.assert_awaited_once_with(
+            "Some long description", Route("llm", "apartment")
+        )
+
+    async def test_detail_fetch_closes_early_and_reports_savings(self):
+        page = DETAIL_HTML.replace(
+            "</body>", "<script>" + "x" * 5000 + "</script></body>"
+        )
+        scr = self.OLXScraper()
+        scr._client = self._mock_transport_client({"https://www.olx.pl/d/x": page})
+        summarizer = types.SimpleNamespace(
+            summarize_structured=AsyncMock(return_value=SUMMARY)
+        )
+
+        desc, img, summary = await scr._fetch_item_details(
+            "https://www.olx.pl/d/x", summarizer
+        )
+
+        self.assertEqual(
+            (desc, img, summary), (SUMMARY.to_text(), "http://b.jpg", SUMMARY)
+        )
+        transfer = scr.stats["detail_transfer"]
+        self.assertEqual(transfer["pages"], 1)
+        self.assertEqual(transfer["closed_early"], 1)
+        self.assertGreater(transfer["bytes_saved"], 4000)
+        self.assertLess(transfer["bytes_read"], len(page))
+
+    async def test_early_close_without_length_has_unknown_savings(self):
+        page = DETAIL_HTML.replace(
+            "</body>", "<script>" + "x" * 5000 + "</script></body>"
+        )
+        scr = self.OLXScraper()
+        scr._client = self._mock_transport_client(
+            {"https://www.olx.pl/d/x": page}, content_length=False
+        )
+        summarizer = types.SimpleNamespace(
+            summarize_structured=AsyncMock(return_value=SUMMARY)
+        )
+        await scr._fetch_item_details("https://www.olx.pl/d/x", summarizer)
+
+        transfer = scr.stats["detail_transfer"]
+        self.assertEqual(transfer["closed_early"], 1)
+        self.assertEqual(transfer["bytes_saved"], 0)
+        self.assertEqual(transfer["bytes_saved_unknown"], 1)
+
+    async def test_fetch_new_items_uses_embedded_state(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        state = {
+            "listing": {
+                "listing": {
+                    "ads": [
+                        make_raw_ad(1),
+                        make_raw_ad(2, minutes_ago=600),
+                        make_raw_ad(3),
+                    ]
+                }
+            }
+        }
+        list_resp = MagicMock(status_code=200, text=render_state_page(state))
+        get = AsyncMock(return_value=list_resp)
+        with patch("httpx.AsyncClient.get", new=get):
+            scr = self.OLXScraper()
+            scr.router.learn(15, FLATS)
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=SUMMARY)
+            )
+            items = await scr.fetch_new_items(
+                "http://olx",
+                existing_urls={make_raw_ad(3)["url"]},
+                summarizer=summarizer,
+            )
+
+        # No detail pages are needed when the state carries the description
+        self.assertEqual(get.await_count, 1)
+        self.assertEqual([it.ad_id for it in items], [1])
+        self.assertEqual(items[0].description, SUMMARY.to_text())
+        self.assertEqual(items[0].location, "Warszawa, Mokotów")
+        self.assertIn("1000x700", items[0].image_url)
+        self.assertIsNotNone(items[0].created_at)
+
+    async def test_unchanged_search_page_is_revalidated_with_etag(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        state = {"listing": {"listing": {"ads": [make_raw_ad(1)]}}}
+        first = MagicMock(
+            status_code=200,
+            text=render_state_page(state),
+            headers={"etag": 'W/"abc"', "last-modified": "Mon, 19 Oct 2026"},
+        )
+        not_modified = MagicMock(status_code=304, text="", headers={})
+        get = AsyncMock(side_effect=[first, not_modified])
+        with patch("httpx.AsyncClient.get", new=get):
+            scr = self.OLXScraper()
+            scr.router.learn(15, FLATS)
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=SUMMARY)
+            )
+            self.assertEqual(
+                len(await scr.fetch_new_items("http://olx", set(), summarizer)), 1
+            )
+            # Validators only count once the monitor has stored the items.
+            self.assertEqual(scr.export_state()["validators"], {})
+            scr.url_completed("http://olx")
+            restored = self.OLXScraper()
+            restored.restore_state(scr.export_state())
+            items = await restored.fetch_new_items("http://olx", set(), summarizer)
+
+        self.assertEqual(items, [])
+        self.assertIsNone(get.await_args_list[0].kwargs["headers"])
+        self.assertEqual(
+            get.await_args_list[1].kwargs["headers"],
+            {"If-None-Match": 'W/"abc"', "If-Modified-Since": "Mon, 19 Oct 2026"},
+        )
+
+    async def test_reposted_listing_reuses_earlier_details(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        original = make_raw_ad(1)
+        repost = make_raw_ad(2, title=original["title"], photos=original["photos"])
+        responses = [
+            MagicMock(status_code=200, text=render_state_page(page), headers={})
+            for page in (
+                {"listing": {"listing": {"ads": [original]}}},
+                {"listing": {"listing": {"ads": [repost]}}},
+            )
+        ]
+        with patch("httpx.AsyncClient.get", new=AsyncMock(side_effect=responses)):
+            scr = self.OLXScraper()
+            scr.router.learn(15, FLATS)
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=SUMMARY)
+            )
+            first = await scr.fetch_new_items("http://olx", set(), summarizer)
+            second = await scr.fetch_new_items("http://olx", set(), summarizer)
+
+        summarizer.summarize_structured.assert_awaited_once()
+        self.assertIsNone(first[0].repost_of)
+        self.assertEqual(second[0].repost_of, first[0].item_url)
+        self.assertIs(second[0].summary, SUMMARY)
+        self.assertEqual(second[0].description, first[0].description)
+        self.assertEqual(scr.stats["reposts"]["hits"], 1)
+
+    async def test_overlapping_searches_share_listing_details(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        city = {"listing": {"listing": {"ads": [make_raw_ad(1), make_raw_ad(2)]}}}
+        district = {"listing": {"listing": {"ads": [make_raw_ad(2)]}}}
+        responses = [
+            MagicMock(status_code=200, text=render_state_page(city)),
+            MagicMock(status_code=200, text=render_state_page(district)),
+        ]
+        with patch("httpx.AsyncClient.get", new=AsyncMock(side_effect=responses)):
+            scr = self.OLXScraper()
+            scr.router.learn(15, FLATS)
+            scr.start_cycle()
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=SUMMARY)
+            )
+            await scr.fetch_new_items("http://a", set(), summarizer)
+            items = await scr.fetch_new_items("http://b", set(), summarizer)
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(summarizer.summarize_structured.await_count, 2)
+        self.assertEqual(scr.stats["details"]["duplicates"], 1)
+
+        scr.start_cycle()
+        self.assertEqual(scr.stats["details"]["calls"], 0)
+
+    async def test_failed_details_are_retried_within_the_cycle(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        page = {"listing": {"listing": {"ads": [make_raw_ad(1)]}}}
+        list_resp = MagicMock(status_code=200, text=render_state_page(page))
+        with patch("httpx.AsyncClient.get", new=AsyncMock(return_value=list_resp)):
+            scr = self.OLXScraper()
+            scr.start_cycle()
+            scr._fetch_item_details = AsyncMock(
+                side_effect=[RuntimeError("timeout"), ("desc", "img", SUMMARY)]
+            )
+            first = await scr.fetch_new_items("http://a", set(), MagicMock())
+            second = await scr.fetch_new_items("http://b", set(), MagicMock())
+
+        self.assertTrue(first[0].description.startswith("Failed to load description"))
+        self.assertEqual((second[0].description, second[0].summary), ("desc", SUMMARY))
+        self.assertEqual(scr._fetch_item_details.await_count, 2)
+
+    async def test_non_summarised_category_skips_detail_page(self):
+        list_resp = MagicMock(
+            status_code=200,
+            text=OLX_LISTING_HTML.replace(
+                "http://img/1.jpg",
+                "https://ireland.apollo.olx.pl/v1/files/a-PL/image;s=216x152",
+            ),
+        )
+        get = AsyncMock(return_value=list_resp)
+        with patch("httpx.AsyncClient.get", new=get), patch(
+            "tools.utils.time_helpers.TimeUtils.within_last_minutes",
+            side_effect=[True, False],
+        ):
+            scr = self.OLXScraper()
+            scr.images.verify = False
+            summarizer = types.SimpleNamespace(summarize_structured=AsyncMock())
+            items = await scr.fetch_new_items(
+                "https://www.olx.pl/elektronika/telefony/", set(), summarizer
+            )
+
+        get.assert_awaited_once()
+        summarizer.summarize_structured.assert_not_awaited()
+        self.assertEqual(len(items), 1)
+        self.assertTrue(items[0].image_url.endswith(";s=1000x700"))
+
+    async def test_category_search_uses_its_configured_route(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        state = {"listing": {"listing": {"ads": [make_raw_ad(1)]}}}
+        list_resp = MagicMock(status_code=200, text=render_state_page(state))
+        with patch("httpx.AsyncClient.get", new=AsyncMock(return_value=list_resp)):
+            scr = self.OLXScraper()
+            summarizer = types.SimpleNamespace(
+                summarize_structured=AsyncMock(return_value=None)
+            )
+            items = await scr.fetch_new_items(
+                "https://www.olx.pl/d/nieruchomosci/mieszkania/sprzedaz/warszawa/",
+                set(),
+                summarizer,
+            )
+
+        summarizer.summarize_structured.assert_awaited_once_with(
+            items[0].description, Route("rules")
+        )
+        self.assertEqual(scr.stats["summary_routes"]["rules"], 1)
+
+    async def test_uncategorised_search_learns_category_ids(self):
+        from tests.tools.scraping.test_olx_state import make_raw_ad, render_state_page
+
+        state = {"listing": {"listing": {"ads": [make_raw_ad(1), make_raw_ad(2)]}}}
+        scr = self.OLXScraper()
+        scr._client = self._mock_transport_client(
+            {
+                "https://www.olx.pl/warszawa/q-mieszkanie/": render_state_page(state),
+                make_raw_ad(1)["url"]: DETAIL_HTML,
+            }
+        )
+        summarizer = types.SimpleNamespace(
+            summarize_structured=AsyncMock(return_value=SUMMARY)
+        )
+        await scr.fetch_new_items(
+            "https://www.olx.pl/warszawa/q-mieszkanie/", set(), summarizer
+        )
+
+        # One breadcrumb read routes every ad of that category id
+        self.assertEqual(scr.stats["detail_transfer"]["pages"], 1)
+        self.assertEqual(scr.router.category_for_id(15), FLATS)
+        for call in summarizer.summarize_structured.await_args_list:
+            self.assertEqual(call.args[1], Route("llm", "apartment"))
+
+    async def test_no_permit_is_held_while_waiting_for_an_egress(self):
+        import asyncio
+        import time
+
+        scr = self.OLXScraper()
+        scr._client = self._mock_transport_client({"http://olx": "<html></html>"})
+        for egress in scr.egress.egresses:
+            egress.cooldown_until = time.monotonic() + 0.1
+        task = asyncio.create_task(scr._get_once("http://olx"))
+        await asyncio.sleep(0.01)
+        self.assertEqual(scr.limiter.in_flight, 0)
+
+        response = await task
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "<html></html>")
+        self.assertEqual(scr.limiter.in_flight, 0)
+        self.assertEqual(sum(e.errors for e in scr.egress.egresses), 0)
+
+    async def test_stats_do_not_create_clients(self):
+        scr = self.OLXScraper()
+        self.assertEqual(scr.stats["images"], {"rewritten": 0, "verifications": 0})
+        self.assertIsNone(scr._images)
+        self.assertIsNone(scr._client)
 
     async def test_fetch_item_details_otodom_shortcut(self):
         scr = self.OLXScraper()
-        desc, img = await scr._fetch_item_details(
+        desc, img, summary = await scr._fetch_item_details(
             "http://otodom.pl/123",
-            summarizer=types.SimpleNamespace(summarize=AsyncMock()),
+            summarizer=types.SimpleNamespace(summarize_structured=AsyncMock()),
         )
         self.assertIn("Otodom", desc)
         self.assertEqual(img, "")
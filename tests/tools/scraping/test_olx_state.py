@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase
+
+import pytz
+
+from tools.scraping.olx_state import (
+    extract_state,
+    html_to_text,
+    parse_detail_ad,
+    parse_search_ads,
+    parse_timestamp,
+)
+
+
+def render_state_page(state):
+    blob = json.dumps(json.dumps(state))
+    return (
+        "<html><head><script>"
+        f"window.__PRERENDERED_STATE__= {blob};\n"
+        "window.__TAURUS__ = {};"
+        "</script></head><body></body></html>"
+    )
+
+
+def make_raw_ad(ad_id=1, minutes_ago=5, **overrides):
+    created = datetime.now(pytz.UTC) - timedelta(minutes=minutes_ago)
+    raw = {
+        "id": ad_id,
+        "url": f"https://www.olx.pl/d/oferta/flat-CID3-ID{ad_id}.html",
+        "title": f"Flat {ad_id}",
+        "description": "Cena 2500 zł<br />Kaucja 2500 zł",
+        "createdTime": created.isoformat(),
+        "lastRefreshTime": created.isoformat(),
+        "price": {"displayValue": "2 500 zł", "regularPrice": {"value": 2500}},
+        "location": {"cityName": "Warszawa", "districtName": "Mokotów"},
+        "photos": [
+            f"https://ireland.apollo.olx.pl/v1/files/{ad_id}-PL/image;s={{width}}x{{height}}"
+        ],
+        "category": {"id": 15},
+    }
+    raw.update(overrides)
+    return raw
+
+
+class TestOlxState(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_extract_state_decodes_string_blob(self):
+        page = render_state_page({"listing": {"listing": {"ads": []}}})
+        self.assertEqual(extract_state(page), {"listing": {"listing": {"ads": []}}})
+
+    async def test_extract_state_missing_or_broken(self):
+        self.assertIsNone(extract_state("<html></html>"))
+        self.assertIsNone(extract_state("window.__PRERENDERED_STATE__ = {broken"))
+
+    async def test_parse_search_ads(self):
+        state = {"listing": {"listing": {"ads": [make_raw_ad(7), {"title": "x"}]}}}
+        ads = parse_search_ads(state)
+        self.assertEqual(len(ads), 1)
+        ad = ads[0]
+        self.assertEqual(ad.ad_id, 7)
+        self.assertEqual(ad.price, "2 500 zł")
+        self.assertEqual(ad.location, "Warszawa, Mokotów")
+        self.assertEqual(ad.description, "Cena 2500 zł\nKaucja 2500 zł")
+        self.assertEqual(
+            ad.image_url, "https://ireland.apollo.olx.pl/v1/files/7-PL/image;s=1000x700"
+        )
+        self.assertEqual(ad.category_id, 15)
+        self.assertEqual(ad.created_at.tzinfo, pytz.UTC)
+
+    async def test_parse_detail_ad(self):
+        ad = parse_detail_ad({"ad": {"ad": make_raw_ad(3)}})
+        self.assertEqual(ad.ad_id, 3)
+        self.assertIsNone(parse_detail_ad({}))
+
+    async def test_helpers(self):
+        self.assertIsNone(parse_timestamp("nope"))
+        self.assertEqual(
+            parse_timestamp("2024-01-01T10:00:00Z"),
+            datetime(2024, 1, 1, 10, tzinfo=pytz.UTC),
+        )
+        self.assertEqual(html_to_text("<p>a &amp; b</p><p>c</p>"), "a & b\nc")
@@ -0,0 +1,68 @@
+from unittest import IsolatedAsyncioTestCase
+
+from tools.scraping.streaming import DetailPageScanner
+
+PAGE = (
+    "<html><head></head><body>"
+    '<div class="gallery"><img data-testid="swiper-image" src="http://a.jpg"/>'
+    '<img data-testid="swiper-image-lazy" src="http://b.jpg"/></div>'
+    '<div data-cy="ad_description"><div>Nested <b>text</b></div>tail</div>'
+    "<script>var trailing = 1;</script>"
+    "</body></html>"
+)
+
+
+def feed_in_chunks(scanner, text, size):
+    for i in range(0, len(text), size):
+        if scanner.feed(text[i : i + size]):
+            return i + size
+    return len(text)
+
+
+class TestDetailPageScanner(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_collects_fragments_across_chunk_boundaries(self):
+        for size in (1, 3, 7, 64):
+            scanner = DetailPageScanner()
+            consumed = feed_in_chunks(scanner, PAGE, size)
+            self.assertTrue(scanner.done)
+            self.assertEqual(
+                scanner.description_html,
+                '<div data-cy="ad_description"><div>Nested <b>text</b></div>tail</div>',
+            )
+            self.assertEqual(
+                scanner.image_html,
+                '<img data-testid="swiper-image" src="http://a.jpg"/>',
+            )
+            # Scanning stops before the trailing script
+            self.assertLess(consumed, len(PAGE))
+
+    async def test_collects_breadcrumb_links(self):
+        page = (
+            '<ol><li data-testid="breadcrumb-item"><a href="/">Start</a></li>'
+            '<li data-testid="breadcrumb-item" class="x">'
+            '<a class="y" href="/nieruchomosci/mieszkania/">Flats</a></li></ol>'
+        ) + PAGE
+        for size in (1, 5, 64):
+            scanner = DetailPageScanner()
+            feed_in_chunks(scanner, page, size)
+            self.assertEqual(scanner.breadcrumbs, ["/", "/nieruchomosci/mieszkania/"])
+
+    async def test_not_done_without_image(self):
+        scanner = DetailPageScanner()
+        scanner.feed('<div data-cy="ad_description">only text</div></body>')
+        self.assertFalse(scanner.done)
+        self.assertIn("only text", scanner.html)
+
+    async def test_embedded_state_finishes_scan(self):
+        scanner = DetailPageScanner()
+        scanner.feed('<script>window.__PRERENDERED_STATE__= "{}";')
+        self.assertFalse(scanner.done)
+        scanner.feed("</script><div>rest</div>")
+        self.assertTrue(scanner.done)
+        self.assertTrue(scanner.state_script.startswith("window.__PRERENDERED_STATE__"))
@@ -0,0 +1,56 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.flight = SingleFlight()
+        self.runs = 0
+
+    async def asyncTearDown(self):
+        pass
+
+    async def _work(self, value="v", delay=0.01):
+        self.runs += 1
+        await asyncio.sleep(delay)
+        return value
+
+    async def test_concurrent_calls_share_one_execution(self):
+        results = await asyncio.gather(
+            *(self.flight.do("k", self._work) for _ in range(5))
+        )
+        self.assertEqual(results, ["v"] * 5)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(self.flight.coalesced, 4)
+
+    async def test_repeated_calls_are_memoised_until_reset(self):
+        await self.flight.do("k", self._work)
+        await self.flight.do("k", self._work)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(self.flight.stats["cache_hits"], 1)
+        self.assertEqual(self.flight.duplicates, 1)
+
+        self.flight.reset()
+        await self.flight.do("k", self._work)
+        self.assertEqual(self.runs, 2)
+        self.assertEqual(self.flight.stats["executions"], 1)
+
+    async def test_failures_propagate_and_are_not_memoised(self):
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("x")
+
+        results = await asyncio.gather(
+            self.flight.do("k", boom), self.flight.do("k", boom), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(await self.flight.do("k", self._work), "v")
+
+    async def test_without_memoize_only_coalesces(self):
+        flight = SingleFlight(memoize=False)
+        await flight.do("k", self._work)
+        await flight.do("k", self._work)
+        self.assertEqual(self.runs, 2)
+        flight.forget("k")
@@ -1,5 +1,8 @@
+from datetime import datetime, timedelta
 from unittest import IsolatedAsyncioTestCase
 
+import pytz
+
 from tools.utils.time_helpers import TimeUtils
 
 
@@ -17,3 +20,10 @@ class TestTimeUtils(IsolatedAsyncioTestCase):
 
     async def test_invalid_format_returns_false(self):
         self.assertFalse(TimeUtils.within_last_minutes("bad", n=10))
+
+    async def test_is_recent_uses_exact_timestamp(self):
+        now = datetime.now(pytz.UTC)
+        self.assertTrue(TimeUtils.is_recent(now - timedelta(minutes=5), n=10))
+        self.assertFalse(TimeUtils.is_recent(now - timedelta(minutes=15), n=10))
+        naive = (now - timedelta(minutes=1)).replace(tzinfo=None)
+        self.assertTrue(TimeUtils.is_recent(naive, n=10))
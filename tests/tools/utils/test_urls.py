@@ -0,0 +1,53 @@
+from unittest import IsolatedAsyncioTestCase
+
+from tools.utils.urls import canonicalize_item_url, canonicalize_search_url
+
+
+class TestUrlCanonicalization(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
+
+    async def test_search_url_param_order_tracking_and_slash(self):
+        a = canonicalize_search_url(
+            "https://olx.pl/nieruchomosci/mieszkania/wynajem/warszawa"
+            "?search[filter_float_price:to]=3000&search[order]=created_at:desc"
+            "&utm_source=fb#top"
+        )
+        b = canonicalize_search_url(
+            "https://www.olx.pl/nieruchomosci/mieszkania/wynajem/warszawa/"
+            "?search[order]=created_at:desc&search[filter_float_price:to]=3000"
+            "&search[filter_float_price:from]="
+        )
+        self.assertEqual(a, b)
+        self.assertTrue(a.startswith("https://www.olx.pl/nieruchomosci/"))
+        self.assertNotIn("utm_source", a)
+        self.assertNotIn("#", a)
+
+    async def test_search_url_otodom_strips_trailing_slash(self):
+        self.assertEqual(
+            canonicalize_search_url("https://otodom.pl/pl/wyniki/wynajem/?b=2&a=1"),
+            "https://www.otodom.pl/pl/wyniki/wynajem?a=1&b=2",
+        )
+
+    async def test_item_url_drops_query_and_fragment(self):
+        canonical = "https://www.olx.pl/d/oferta/flat-CID3-ID1.html"
+        for variant in (
+            "https://www.olx.pl/d/oferta/flat-CID3-ID1.html?reason=extended_search",
+            "https://olx.pl/d/oferta/flat-CID3-ID1.html#gallery",
+            "https://www.olx.pl/oferta/flat-CID3-ID1.html",
+            "/d/oferta/flat-CID3-ID1.html",
+        ):
+            self.assertEqual(canonicalize_item_url(variant), canonical)
+
+    async def test_item_url_otodom_and_other_hosts(self):
+        self.assertEqual(
+            canonicalize_item_url("https://www.otodom.pl/pl/oferta/x-ID4a/?s=1"),
+            "https://www.otodom.pl/pl/oferta/x-ID4a",
+        )
+        self.assertEqual(
+            canonicalize_item_url("https://example.com/z?id=3&utm_medium=x"),
+            "https://example.com/z?id=3",
+        )
@@ -0,0 +1,241 @@
+"""Publishing of new-item events to consumers (the Telegram bot side).
+
+For every newly persisted item the worker emits a compact `NewItemEvent`
+listing the monitoring tasks whose URL matched it, so consumers can react
+immediately instead of polling topn-db per task. Sinks:
+
+* ``redis://[:password@]host:port[/db]`` - appended to a Redis stream (XADD)
+* ``http(s)://...`` - POSTed as JSON to a webhook
+* ``memory://`` - kept in an in-process queue (tests, local runs)
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NewItemEvent:
+    """A newly stored item and the tasks it belongs to."""
+
+    item_url: str
+    title: str
+    price: str
+    source_url: str
+    task_ids: List[Any] = field(default_factory=list)
+    image_url: Optional[str] = None
+    first_seen: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], task_ids: Sequence[Any]):
+        return cls(
+            item_url=record["item_url"],
+            title=record.get("title", ""),
+            price=record.get("price", ""),
+            source_url=record.get("source_url", ""),
+            task_ids=list(task_ids),
+            image_url=record.get("image_url"),
+            first_seen=record.get("first_seen"),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+
+class BaseEventSink(abc.ABC):
+    """Interface for event destinations."""
+
+    @abc.abstractmethod
+    async def publish(self, events: Sequence[NewItemEvent]) -> None:
+        """Deliver *events*; raise if they could not be delivered."""
+
+    async def close(self) -> None:
+        """Release resources."""
+
+
+class InProcessQueueSink(BaseEventSink):
+    """Put events on an `asyncio.Queue`; when full, the oldest are dropped."""
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self.queue: asyncio.Queue[NewItemEvent] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    async def publish(self, events: Sequence[NewItemEvent]) -> None:
+        for event in events:
+            if self.queue.full():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(event)
+
+
+class WebhookEventSink(BaseEventSink):
+    """POST events as ``{"events": [...]}`` to a URL."""
+
+    def __init__(
+        self,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 5.0,
+    ) -> None:
+        self.url = url
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self._own_client = client is None
+
+    async def publish(self, events: Sequence[NewItemEvent]) -> None:
+        if not events:
+            return
+        response = await self._client.post(
+            self.url, json={"events": [asdict(e) for e in events]}
+        )
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._own_client:
+            await self._client.aclose()
+
+
+def _resp_command(*args: Any) -> bytes:
+    """Encode a command in the Redis serialization protocol."""
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Redis connection closed")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"-":
+        raise RuntimeError(f"Redis error: {payload.decode()}")
+    if kind in (b"+", b":"):
+        return payload.decode()
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        return [await _read_reply(reader) for _ in range(max(0, int(payload)))]
+    raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+
+class RedisStreamEventSink(BaseEventSink):
+    """Append events to a Redis stream with ``XADD``.
+
+    Speaks the wire protocol directly so any Redis-compatible server works
+    without an extra client dependency. Each entry has a single ``event``
+    field with the JSON payload; the stream is trimmed to about *maxlen*.
+    Connecting, writing and reading each give up after *timeout* seconds,
+    dropping the connection.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        stream: str = "olx:new-items",
+        maxlen: int = 10000,
+        timeout: float = 5.0,
+    ) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.username = unquote(parts.username) if parts.username else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.stream = stream
+        self.maxlen = maxlen
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            if self.password:
+                auth = ("AUTH", self.username, self.password)
+                await self._command(*[a for a in auth if a])
+            if self.db:
+                await self._command("SELECT", self.db)
+        except BaseException:
+            # Never keep a connection that looks ready but is not
+            # authenticated or on the right database.
+            await self._disconnect()
+            raise
+
+    async def _command(self, *args: Any) -> Any:
+        self._writer.write(_resp_command(*args))
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+        return await asyncio.wait_for(_read_reply(self._reader), self.timeout)
+
+    async def publish(self, events: Sequence[NewItemEvent]) -> None:
+        if not events:
+            return
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                for event in events:
+                    await self._command(
+                        "XADD",
+                        self.stream,
+                        "MAXLEN",
+                        "~",
+                        self.maxlen,
+                        "*",
+                        "event",
+                        event.to_json(),
+                    )
+            except (
+                OSError,
+                ConnectionError,
+                asyncio.IncompleteReadError,
+                asyncio.TimeoutError,
+            ):
+                # Reconnect on the next publish.
+                await self._disconnect()
+                raise
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        await self._disconnect()
+
+
+def build_event_sink(
+    url: Optional[str], stream: str = "olx:new-items", timeout: float = 5.0
+) -> Optional[BaseEventSink]:
+    """Create the event sink for *url*, or None when events are disabled."""
+    if not url:
+        return None
+    scheme = urlsplit(url).scheme
+    if scheme == "redis":
+        return RedisStreamEventSink(url, stream=stream, timeout=timeout)
+    if scheme in ("http", "https"):
+        return WebhookEventSink(url, timeout=timeout)
+    if scheme == "memory":
+        return InProcessQueueSink()
+    raise ValueError(f"Unsupported event sink URL: {url}")
@@ -0,0 +1,170 @@
+"""Memory instrumentation for long-running workers.
+
+`MemoryMonitor` records the process RSS at the start and end of every
+cycle and, when tracemalloc is enabled, takes a snapshot every few cycles
+and diffs it against the previous one to show which allocation sites grew.
+A report can be requested at any time by sending SIGUSR1 to the process.
+Above the configured soft limit the monitor reports memory pressure so the
+caller can release caches and reduce concurrency.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import signal
+import sys
+import tracemalloc
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def read_rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryMonitor:
+    """Track RSS per cycle and allocation growth between tracemalloc snapshots."""
+
+    def __init__(
+        self,
+        soft_limit_mb: float = 0,
+        tracemalloc_enabled: bool = False,
+        tracemalloc_frames: int = 1,
+        snapshot_every_cycles: int = 10,
+        top_n: int = 15,
+        history: int = 50,
+    ) -> None:
+        self.soft_limit_mb = soft_limit_mb
+        self.tracemalloc_enabled = tracemalloc_enabled
+        self.tracemalloc_frames = tracemalloc_frames
+        self.snapshot_every_cycles = max(1, snapshot_every_cycles)
+        self.top_n = top_n
+        self.cycles: Deque[Dict[str, float]] = deque(maxlen=history)
+        self.top_growth: List[str] = []
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._cycle_start_rss = 0
+        self._cycle_count = 0
+        self._relieved_this_cycle = False
+        self.pressure_events = 0
+
+    def start(self) -> None:
+        if self.tracemalloc_enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+        if self.tracemalloc_enabled:
+            self._snapshot = self._take_snapshot()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+
+    def begin_cycle(self) -> None:
+        self._cycle_start_rss = read_rss_bytes()
+        self._relieved_this_cycle = False
+
+    def end_cycle(self) -> Dict[str, float]:
+        """Record the cycle's RSS delta and take a snapshot when one is due."""
+        rss = read_rss_bytes()
+        self._cycle_count += 1
+        entry = {
+            "cycle": self._cycle_count,
+            "rss_mb": round(rss / _MB, 1),
+            "delta_mb": round((rss - self._cycle_start_rss) / _MB, 2),
+        }
+        self.cycles.append(entry)
+        if (
+            self.tracemalloc_enabled
+            and self._cycle_count % self.snapshot_every_cycles == 0
+        ):
+            self.diff_snapshots()
+            logger.info(
+                "Memory: %s MB RSS; top allocation growth: %s",
+                entry["rss_mb"],
+                self.top_growth[:5],
+            )
+        return entry
+
+    def diff_snapshots(self) -> List[str]:
+        """Take a snapshot and return the sites that grew most since the last one."""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = self._take_snapshot()
+        if self._snapshot is not None:
+            stats = snapshot.compare_to(self._snapshot, "lineno")
+            self.top_growth = [str(stat) for stat in stats[: self.top_n]]
+        self._snapshot = snapshot
+        return self.top_growth
+
+    @property
+    def over_soft_limit(self) -> bool:
+        if self.soft_limit_mb <= 0:
+            return False
+        return read_rss_bytes() / _MB >= self.soft_limit_mb
+
+    def relieve_pressure(self) -> bool:
+        """Collect garbage if above the soft limit; return True if still above.
+
+        Runs at most once per cycle (a full collection is expensive); later
+        calls in the same cycle return False.
+        """
+        if self._relieved_this_cycle or not self.over_soft_limit:
+            return False
+        self._relieved_this_cycle = True
+        gc.collect()
+        if not self.over_soft_limit:
+            return False
+        self.pressure_events += 1
+        logger.warning(
+            "RSS above soft limit of %s MB after collection", self.soft_limit_mb
+        )
+        return True
+
+    def limit_concurrency(self, requested: int) -> int:
+        """Concurrency to use: 1 while above the soft limit, else *requested*."""
+        return 1 if self.over_soft_limit else requested
+
+    def report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "rss_mb": round(read_rss_bytes() / _MB, 1),
+            "soft_limit_mb": self.soft_limit_mb,
+            "pressure_events": self.pressure_events,
+            "recent_cycles": list(self.cycles)[-10:],
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["traced_mb"] = round(current / _MB, 1)
+            report["traced_peak_mb"] = round(peak / _MB, 1)
+            report["top_growth"] = self.diff_snapshots()
+        return report
+
+    def install_signal_handler(self, loop, sig: Optional[int] = None) -> None:
+        """Log `report()` whenever the process receives *sig* (SIGUSR1)."""
+        sig = sig or getattr(signal, "SIGUSR1", None)
+        if sig is None:
+            return
+        try:
+            loop.add_signal_handler(sig, self._log_report)
+        except (NotImplementedError, RuntimeError, AttributeError) as exc:
+            logger.debug("Memory report signal handler not installed: %s", exc)
+
+    def _log_report(self) -> None:
+        logger.warning("Memory report: %s", self.report())
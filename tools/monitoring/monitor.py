@@ -7,14 +7,21 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from collections import deque
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Dict, List, Set
 
 import pytz
 
+from core.config import settings
 from models import Item
+from tools.events.sinks import BaseEventSink, NewItemEvent, build_event_sink
+from tools.monitoring.memory import MemoryMonitor
+from tools.persistence.sinks import BaseItemSink, build_item_sink
 from tools.processing.description import DescriptionSummarizer
 from tools.scraping.base import BaseScraper
+from tools.utils.urls import canonicalize_item_url, canonicalize_search_url
 
 if TYPE_CHECKING:
     from clients.topn_db_client import TopnDbClient
@@ -30,11 +37,42 @@ class ItemMonitor:
         db_client: "TopnDbClient",
         scraper_cls: type[BaseScraper],
         cycle_sleep_seconds: int = 3,
+        sink: BaseItemSink | None = None,
+        event_sink: BaseEventSink | None = None,
+        cycle_deadline_seconds: float | None = None,
+        memory: MemoryMonitor | None = None,
+        seen_refresh_seconds: float = 0,
     ) -> None:
         self.db_client = db_client
+        self.sink = sink or build_item_sink(db_client)
+        self.event_sink = event_sink or build_event_sink(
+            settings.EVENT_SINK_URL,
+            stream=settings.EVENT_STREAM_NAME,
+            timeout=settings.EVENT_SINK_TIMEOUT_SECONDS,
+        )
         self.scraper: BaseScraper = scraper_cls()
         self.summarizer = DescriptionSummarizer()
         self.cycle_sleep_seconds = cycle_sleep_seconds
+        self.cycle_deadline_seconds = cycle_deadline_seconds
+        self.memory = memory
+        # source URL -> (loaded_at, canonical item URLs stored for it). Lists
+        # are re-read from topn-db every `seen_refresh_seconds` (0: always)
+        # and extended locally with the items persisted in between.
+        self.seen_refresh_seconds = seen_refresh_seconds
+        self._seen: Dict[str, tuple[float, Set[str]]] = {}
+        # Search URL -> when it was last scraped in full; orders the queue.
+        self.last_scraped: Dict[str, float] = {}
+        # In-flight item writes, shielded from the cycle deadline.
+        self._writes: Set[asyncio.Task] = set()
+        # URLs the previous cycle ran out of time for; scraped first next time.
+        self._carry_over: List[str] = []
+        self.cycle_stats: Dict[str, float] = {
+            "cycles": 0,
+            "overruns": 0,
+            "cancelled_urls": 0,
+            "last_duration": 0.0,
+            "max_duration": 0.0,
+        }
 
     async def run_once(self):
         """Scrape each task URL once and persist new items."""
@@ -43,44 +81,269 @@ class ItemMonitor:
             tasks_response = await self.db_client.get_all_tasks()
             tasks = tasks_response.get("tasks", [])
 
-            # Extract distinct URLs
-            distinct_urls = list({task["url"] for task in tasks})
+            self.scraper.start_cycle()
+
+            # Group task URLs by their canonical search URL so that every
+            # logical search is scraped once per cycle
+            url_groups = self._group_task_urls(tasks)
+            task_ids = self._task_ids_by_url(tasks)
+            logger.info(
+                "ItemMonitor starting scraping loop for %s URLs", len(url_groups)
+            )
+            await self._scrape_urls(url_groups, task_ids)
             logger.info(
-                "ItemMonitor starting scraping loop for %s URLs", len(distinct_urls)
+                "ItemMonitor finished all URLs; cycle stats: %s; scraper stats: %s",
+                self.cycle_stats,
+                self.scraper.stats,
             )
+        except Exception as exc:
+            logger.error("Error in run_once: %s", exc, exc_info=True)
+            raise
 
-            for url in distinct_urls:
-                try:
-                    # Get existing items for this source URL
-                    items_response = await self.db_client.get_items_by_source_url(
-                        url, limit=10000
-                    )
-                    existing_items = items_response.get("items", [])
-                    existing_urls = {item["item_url"] for item in existing_items}
+    async def _scrape_urls(
+        self, url_groups: Dict[str, List[str]], task_ids: Dict[str, List[Any]]
+    ) -> None:
+        """Scrape and persist every URL group within the cycle deadline.
 
-                    new_items = await self.scraper.fetch_new_items(
-                        url=url,
-                        existing_urls=existing_urls,
-                        summarizer=self.summarizer,
-                    )
+        URLs are scraped by a pool of workers sized by the scraper's
+        adaptive concurrency limit (one while memory is under pressure).
+        URLs carried over from the previous cycle go first, then the rest
+        from the least recently scraped (never scraped first), so after a
+        warm restart the stalest searches are refreshed before the others.
+        Items are persisted as the scraper yields them. Each URL's lookup
+        and scrape is bounded by the time left in the cycle; once it runs
+        out the URLs in progress are cancelled and they and the remaining
+        URLs are carried over to the front of the next cycle. Items already
+        yielded by a cancelled URL are still persisted.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = (
+            started + self.cycle_deadline_seconds
+            if self.cycle_deadline_seconds
+            else None
+        )
+        if self.memory is not None:
+            self.memory.begin_cycle()
+        # Drop searches no task monitors any more.
+        self.last_scraped = {
+            url: at for url, at in self.last_scraped.items() if url in url_groups
+        }
+        carried = [url for url in self._carry_over if url in url_groups]
+        rest = sorted(
+            (url for url in url_groups if url not in carried),
+            key=lambda url: self.last_scraped.get(url, 0.0),
+        )
+        queue = deque(carried + rest)
+        running: Dict[asyncio.Task, str] = {}
+        unfinished: List[str] = []
+        launched = 0
+
+        while queue or running:
+            while queue and len(running) < self._url_concurrency():
+                url = queue.popleft()
+                # Consecutive URLs are spaced by `cycle_sleep_seconds`.
+                delay = self.cycle_sleep_seconds if launched else None
+                task = asyncio.create_task(
+                    self._fetch_url(url, url_groups[url], task_ids, delay=delay)
+                )
+                running[task] = url
+                launched += 1
+
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                url = running.pop(task)
+                try:
+                    task.result()
                 except Exception as exc:
                     logger.error(
                         "Failed fetching items for %s: %s", url, exc, exc_info=True
                     )
-                    continue
 
-                await self._persist_items(new_items, source_url=url)
-                logger.info("URL %s processed; added %s new items", url, len(new_items))
+        if running:
+            for task, url in running.items():
+                logger.warning("Cycle deadline reached while scraping %s", url)
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            unfinished.extend(running.values())
+        unfinished.extend(queue)
+        # Writes started by cancelled workers run to completion.
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
 
-                await asyncio.sleep(self.cycle_sleep_seconds)
+        self._carry_over = unfinished
+        if self.memory is not None:
+            self.memory.end_cycle()
+        duration = loop.time() - started
+        stats = self.cycle_stats
+        stats["cycles"] += 1
+        stats["last_duration"] = duration
+        stats["max_duration"] = max(stats["max_duration"], duration)
+        if unfinished:
+            stats["overruns"] += 1
+            stats["cancelled_urls"] += len(unfinished)
+            logger.warning(
+                "Cycle deadline of %ss exceeded; %s URLs carried over to next cycle",
+                self.cycle_deadline_seconds,
+                len(unfinished),
+            )
 
-            logger.info("ItemMonitor finished all URLs")
-        except Exception as exc:
-            logger.error("Error in run_once: %s", exc, exc_info=True)
-            raise
+    def _url_concurrency(self) -> int:
+        """URL workers allowed right now, from the scraper's adaptive limit."""
+        limit = max(1, self.scraper.concurrency_limit)
+        if self.memory is not None:
+            if self.memory.relieve_pressure():
+                # Under memory pressure (checked once per cycle), drop what
+                # the scraper caches for this cycle as well.
+                self.scraper.start_cycle()
+            limit = self.memory.limit_concurrency(limit)
+        return limit
+
+    async def _store_items(
+        self,
+        source_urls: List[str],
+        new_items: List[Item],
+        task_ids: Dict[str, List[Any]],
+    ) -> bool:
+        """Persist and publish *new_items*; return whether all were stored."""
+        # Items are recorded once per task URL variant so that the
+        # database keeps matching them to every task by source URL.
+        stored = []
+        for source_url in source_urls:
+            stored += await self._persist_items(new_items, source_url=source_url)
+        for record in stored:
+            cached = self._seen.get(record["source_url"])
+            if cached is not None:
+                cached[1].add(record["item_url"])
+        await self._publish_new_items(stored, task_ids)
+        return len(stored) == len(new_items) * len(source_urls)
+
+    async def _store_shielded(
+        self,
+        source_urls: List[str],
+        new_items: List[Item],
+        task_ids: Dict[str, List[Any]],
+    ) -> bool:
+        """Store *new_items* in a task the worker's cancellation cannot abort."""
+        write = asyncio.create_task(self._store_items(source_urls, new_items, task_ids))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+        return await asyncio.shield(write)
 
-    async def _persist_items(self, items: list[Item], source_url: str):
+    async def _fetch_url(
+        self,
+        url: str,
+        source_urls: List[str],
+        task_ids: Dict[str, List[Any]],
+        delay: float | None = None,
+    ) -> int:
+        """Scrape *url*, persisting each new item as soon as it is ready.
+
+        The scraper is told the URL is complete only when the whole stream
+        was consumed and every item stored, so a cancelled or partly failed
+        URL is scraped in full again next time.
+        """
+        if delay is not None:
+            await asyncio.sleep(delay)
+        existing_urls = await self._existing_item_urls(source_urls)
+        count = 0
+        complete = True
+        async for item in self.scraper.iter_new_items(
+            url=url,
+            existing_urls=existing_urls,
+            summarizer=self.summarizer,
+        ):
+            complete &= await self._store_shielded(source_urls, [item], task_ids)
+            count += 1
+        if complete:
+            self.scraper.url_completed(url)
+        self.last_scraped[url] = time.time()
+        logger.info("URL %s processed; added %s new items", url, count)
+        return count
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"cycle": dict(self.cycle_stats), "sink": self.sink.stats}
+
+    @staticmethod
+    def _group_task_urls(tasks: list[dict]) -> Dict[str, List[str]]:
+        """Map canonical search URLs to the distinct raw task URLs behind them."""
+        groups: Dict[str, List[str]] = {}
+        for task in tasks:
+            raw_url = task["url"]
+            variants = groups.setdefault(canonicalize_search_url(raw_url), [])
+            if raw_url not in variants:
+                variants.append(raw_url)
+        return groups
+
+    @staticmethod
+    def _task_ids_by_url(tasks: list[dict]) -> Dict[str, List[Any]]:
+        """Map each raw task URL to the IDs of the tasks monitoring it."""
+        ids: Dict[str, List[Any]] = {}
+        for task in tasks:
+            if task.get("id") is not None:
+                ids.setdefault(task["url"], []).append(task["id"])
+        return ids
+
+    async def _existing_item_urls(self, source_urls: List[str]) -> Set[str]:
+        """Return canonical item URLs already stored for any of *source_urls*.
+
+        Items the sink accepted but has not delivered yet (e.g. still in the
+        outbox) count as stored.
+        """
+        existing_urls: Set[str] = set()
+        now = time.time()
+        for source_url in source_urls:
+            cached = self._seen.get(source_url)
+            if cached is None or now - cached[0] >= self.seen_refresh_seconds:
+                urls: Set[str] = set()
+                async for item_url in self.db_client.iter_item_urls_by_source_url(
+                    source_url
+                ):
+                    urls.add(canonicalize_item_url(item_url))
+                cached = (now, urls)
+                if self.seen_refresh_seconds > 0:
+                    self._seen[source_url] = cached
+            existing_urls |= cached[1]
+        existing_urls |= await self.sink.pending_item_urls(source_urls)
+        return existing_urls
+
+    def export_state(self) -> Dict[str, Any]:
+        """Warm-restart state of the monitor, scraper and summarizer."""
+        return {
+            "seen": {
+                source_url: {"loaded_at": loaded_at, "urls": sorted(urls)}
+                for source_url, (loaded_at, urls) in self._seen.items()
+            },
+            "last_scraped": dict(self.last_scraped),
+            "carry_over": list(self._carry_over),
+            "scraper": self.scraper.export_state(),
+            "summarizer": self.summarizer.export_state(),
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self._seen = {
+            source_url: (entry["loaded_at"], set(entry["urls"]))
+            for source_url, entry in state.get("seen", {}).items()
+        }
+        self.last_scraped = dict(state.get("last_scraped", {}))
+        self._carry_over = list(state.get("carry_over", []))
+        self.scraper.restore_state(state.get("scraper", {}))
+        self.summarizer.restore_state(state.get("summarizer", {}))
+
+    async def _persist_items(
+        self, items: list[Item], source_url: str
+    ) -> List[Dict[str, Any]]:
+        """Hand *items* to the sink; return the records it accepted."""
         poland_tz = pytz.timezone("Europe/Warsaw")
+        records = []
         for item in items:
             if "otodom.pl" in item.item_url:
                 source = "Otodom"
@@ -89,26 +352,64 @@ class ItemMonitor:
             else:
                 source = "OLX"
 
-            item_data = {
-                "item_url": item.item_url,
-                "title": item.title,
-                "price": item.price,
-                "location": item.location,
-                "created_at": item.created_at.isoformat() if item.created_at else None,
-                "created_at_pretty": item.created_at_pretty,
-                "image_url": item.image_url,
-                "description": item.description,
-                "source_url": source_url,
-                "source": source,
-                "first_seen": datetime.now(poland_tz).replace(tzinfo=None).isoformat(),
-            }
-            try:
-                await self.db_client.create_item(item_data)
-                logger.info("New item persisted: %s | %s", item.title, item.item_url)
-            except Exception as exc:
-                logger.error(
-                    "Failed to persist item %s: %s", item.item_url, exc, exc_info=True
-                )
+            records.append(
+                {
+                    "item_url": canonicalize_item_url(item.item_url),
+                    "title": item.title,
+                    "price": item.price,
+                    "location": item.location,
+                    "created_at": (
+                        item.created_at.isoformat() if item.created_at else None
+                    ),
+                    "created_at_pretty": item.created_at_pretty,
+                    "image_url": item.image_url,
+                    "description": item.description,
+                    "source_url": source_url,
+                    "source": source,
+                    "first_seen": datetime.now(poland_tz)
+                    .replace(tzinfo=None)
+                    .isoformat(),
+                    **(item.summary.as_record() if item.summary else {}),
+                    **({"repost_of": item.repost_of} if item.repost_of else {}),
+                }
+            )
+        if not records:
+            return []
+        try:
+            stored = await self.sink.write(records)
+        except Exception as exc:
+            logger.error(
+                "Failed to persist items for %s: %s", source_url, exc, exc_info=True
+            )
+            return []
+        for record in stored:
+            logger.info(
+                "New item persisted: %s | %s", record["title"], record["item_url"]
+            )
+        return stored
+
+    async def _publish_new_items(
+        self, records: List[Dict[str, Any]], task_ids: Dict[str, List[Any]]
+    ) -> None:
+        """Emit one event per new item with every task it matched."""
+        if self.event_sink is None or not records:
+            return
+        events: Dict[str, NewItemEvent] = {}
+        for record in records:
+            ids = task_ids.get(record["source_url"], [])
+            event = events.get(record["item_url"])
+            if event is None:
+                events[record["item_url"]] = NewItemEvent.from_record(record, ids)
+            else:
+                event.task_ids += [i for i in ids if i not in event.task_ids]
+        try:
+            await self.event_sink.publish(list(events.values()))
+        except Exception as exc:
+            # Consumers still see the items on their next poll of topn-db.
+            logger.warning("Failed to publish %s item events: %s", len(events), exc)
 
     async def close(self):
         await self.scraper.close()
+        await self.sink.close()
+        if self.event_sink is not None:
+            await self.event_sink.close()
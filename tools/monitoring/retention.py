@@ -0,0 +1,357 @@
+"""Scheduled retention cleanup of old item records.
+
+`RetentionTask` runs in the background next to the scraping loop and calls
+`TopnDbClient.delete_old_items` once per interval, inside an off-peak
+window (Warsaw time). The cleanup is done in a few steps from the oldest
+records down to the retention age, with pauses in between, so no single
+DELETE is very large. A lock makes sure only one replica runs it: a
+Postgres advisory lock when a DSN is configured, otherwise a lock file.
+The lock backend also keeps the time of the last run (a table row or the
+lock file's contents), so a replica whose schedule is offset from the
+others does not repeat a cleanup that has just finished. Each run logs
+the rows removed and the dedup lookup latency before and after.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from datetime import time as dt_time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional
+
+import pytz
+
+if TYPE_CHECKING:
+    from clients.topn_db_client import TopnDbClient
+
+logger = logging.getLogger(__name__)
+
+WARSAW = pytz.timezone("Europe/Warsaw")
+# Arbitrary application-wide key for pg_try_advisory_lock.
+ADVISORY_LOCK_KEY = 0x6F6C7872  # "olxr"
+# Table holding the last run per advisory lock key.
+RUNS_TABLE = "retention_runs"
+
+
+def parse_window(window: str) -> tuple[dt_time, dt_time]:
+    """Parse ``"HH:MM-HH:MM"``; the window may wrap around midnight."""
+    start, end = (part.strip() for part in window.split("-"))
+    return dt_time.fromisoformat(start), dt_time.fromisoformat(end)
+
+
+def in_window(now: datetime, window: Optional[str]) -> bool:
+    if not window:
+        return True
+    start, end = parse_window(window)
+    current = now.time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def deleted_count(response: Dict[str, Any]) -> int:
+    """Pull the number of removed rows out of a cleanup response."""
+    for key in ("deleted_count", "deleted", "count", "rows"):
+        value = response.get(key)
+        if isinstance(value, int):
+            return value
+    return 0
+
+
+class FileLock:
+    """Non-blocking exclusive lock on a file shared by the replicas.
+
+    The file holds the Unix time of the last completed run.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    async def last_run(self) -> Optional[float]:
+        try:
+            with open(self.path) as f:
+                return float(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    async def record_run(self, at: float) -> None:
+        # Rewritten in place: truncating on open would race with replicas
+        # opening the file to take the lock.
+        with open(self.path, "r+") as f:
+            f.write(repr(at))
+            f.truncate()
+
+    @contextlib.asynccontextmanager
+    async def hold(self) -> AsyncIterator[bool]:
+        import fcntl
+
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class PostgresAdvisoryLock:
+    """Session-level ``pg_try_advisory_lock`` held for the duration of a run.
+
+    The last completed run is kept in ``retention_runs``, keyed by the lock
+    key, and read over the connection holding the lock.
+    """
+
+    def __init__(self, dsn: str, key: int = ADVISORY_LOCK_KEY) -> None:
+        self.dsn = dsn
+        self.key = key
+        self._conn = None
+
+    def _acquire(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (self.key,))
+            acquired = cur.fetchone()[0]
+        if not acquired:
+            conn.close()
+            return None
+        return conn
+
+    def _release(self, conn) -> None:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (self.key,))
+        finally:
+            conn.close()
+
+    def _read_last_run(self, conn) -> Optional[float]:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {RUNS_TABLE} "
+                "(lock_key BIGINT PRIMARY KEY, last_run DOUBLE PRECISION NOT NULL)"
+            )
+            cur.execute(
+                f"SELECT last_run FROM {RUNS_TABLE} WHERE lock_key = %s", (self.key,)
+            )
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _write_last_run(self, conn, at: float) -> None:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO {RUNS_TABLE} (lock_key, last_run) VALUES (%s, %s) "
+                "ON CONFLICT (lock_key) DO UPDATE SET last_run = EXCLUDED.last_run",
+                (self.key, at),
+            )
+
+    async def last_run(self) -> Optional[float]:
+        if self._conn is None:
+            return None
+        return await asyncio.to_thread(self._read_last_run, self._conn)
+
+    async def record_run(self, at: float) -> None:
+        if self._conn is not None:
+            await asyncio.to_thread(self._write_last_run, self._conn, at)
+
+    @contextlib.asynccontextmanager
+    async def hold(self) -> AsyncIterator[bool]:
+        conn = await asyncio.to_thread(self._acquire)
+        if conn is None:
+            yield False
+            return
+        self._conn = conn
+        try:
+            yield True
+        finally:
+            self._conn = None
+            await asyncio.to_thread(self._release, conn)
+
+
+class LocalLock:
+    """No cross-replica coordination; only used when nothing is configured."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._last_run: Optional[float] = None
+
+    async def last_run(self) -> Optional[float]:
+        return self._last_run
+
+    async def record_run(self, at: float) -> None:
+        self._last_run = at
+
+    @contextlib.asynccontextmanager
+    async def hold(self) -> AsyncIterator[bool]:
+        if self._lock.locked():
+            yield False
+            return
+        async with self._lock:
+            yield True
+
+
+@dataclass
+class RetentionReport:
+    started_at: datetime
+    rows_removed: int = 0
+    steps: List[int] = field(default_factory=list)
+    dedup_latency_before: Optional[float] = None
+    dedup_latency_after: Optional[float] = None
+    duration: float = 0.0
+
+
+class RetentionTask:
+    """Periodically remove items older than *days* from topn-db."""
+
+    def __init__(
+        self,
+        db_client: "TopnDbClient",
+        days: int = 30,
+        interval_hours: float = 24,
+        window: Optional[str] = "02:00-05:00",
+        pause_seconds: float = 30,
+        check_seconds: float = 300,
+        lock=None,
+        now: Callable[[], datetime] = lambda: datetime.now(WARSAW),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.db_client = db_client
+        self.days = days
+        self.interval_hours = interval_hours
+        self.window = window
+        self.pause_seconds = pause_seconds
+        self.check_seconds = check_seconds
+        self.lock = lock or LocalLock()
+        self._now = now
+        self._clock = clock
+        self.last_run: Optional[float] = None
+        self.last_report: Optional[RetentionReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def due(self) -> bool:
+        if not in_window(self._now(), self.window):
+            return False
+        if self.last_run is None:
+            return True
+        return self._clock() - self.last_run >= self.interval_hours * 3600
+
+    def step_days(self) -> List[int]:
+        """Cut-offs from oldest to the retention age, e.g. 120, 60, 30."""
+        return [self.days * 4, self.days * 2, self.days]
+
+    async def run_once(self) -> Optional[RetentionReport]:
+        """Run the cleanup if this replica gets the lock; return its report."""
+        async with self.lock.hold() as acquired:
+            if not acquired:
+                logger.info("Retention cleanup running on another replica")
+                # Another replica is handling this interval.
+                self.last_run = self._clock()
+                return None
+            # Replicas check on their own schedules; one that gets the lock
+            # right after another finished must not clean up again.
+            shared = await self.lock.last_run()
+            age = self._now().timestamp() - shared if shared is not None else None
+            if age is not None and 0 <= age < self.interval_hours * 3600:
+                logger.info("Retention cleanup already ran %.0fs ago", age)
+                self.last_run = self._clock() - age
+                return None
+            report = await self._cleanup()
+            await self.lock.record_run(report.started_at.timestamp())
+            return report
+
+    async def _cleanup(self) -> RetentionReport:
+        started = self._clock()
+        report = RetentionReport(started_at=self._now())
+        sample_url = await self._sample_source_url()
+        report.dedup_latency_before = await self._dedup_latency(sample_url)
+
+        for index, days in enumerate(self.step_days()):
+            if index:
+                await asyncio.sleep(self.pause_seconds)
+            response = await self.db_client.delete_old_items(days)
+            report.rows_removed += deleted_count(response)
+            report.steps.append(days)
+
+        report.dedup_latency_after = await self._dedup_latency(sample_url)
+        report.duration = self._clock() - started
+        self.last_run = self._clock()
+        self.last_report = report
+        logger.info(
+            "Retention cleanup removed %s items older than %s days in %.1fs; "
+            "dedup lookup %s -> %s s",
+            report.rows_removed,
+            self.days,
+            report.duration,
+            _fmt(report.dedup_latency_before),
+            _fmt(report.dedup_latency_after),
+        )
+        return report
+
+    async def _sample_source_url(self) -> Optional[str]:
+        try:
+            tasks = (await self.db_client.get_all_tasks()).get("tasks", [])
+        except Exception as exc:
+            logger.warning("Retention: could not load tasks: %s", exc)
+            return None
+        return tasks[0]["url"] if tasks else None
+
+    async def _dedup_latency(self, source_url: Optional[str]) -> Optional[float]:
+        """Time the existing-item lookup the monitor runs for every URL."""
+        if source_url is None:
+            return None
+        started = self._clock()
+        try:
+            async for _ in self.db_client.iter_item_urls_by_source_url(source_url):
+                pass
+        except Exception as exc:
+            logger.warning("Retention: dedup latency probe failed: %s", exc)
+            return None
+        return self._clock() - started
+
+    async def _run(self) -> None:
+        while True:
+            if self.due():
+                try:
+                    await self.run_once()
+                except Exception as exc:
+                    logger.error("Retention cleanup failed: %s", exc, exc_info=True)
+                    # Do not retry until the next interval.
+                    self.last_run = self._clock()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="retention")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.3f}"
+
+
+def build_retention_lock(dsn: Optional[str], path: Optional[str]):
+    if dsn:
+        return PostgresAdvisoryLock(dsn)
+    if path:
+        return FileLock(path)
+    return LocalLock()
@@ -0,0 +1,111 @@
+"""Warm-restart snapshots of the worker's in-memory state.
+
+The monitor's seen-URL cache and per-URL scrape times, the scraper's HTTP
+validators (ETags) and the summary cache are written to a gzip-compressed
+JSON file every few seconds. The file is written to a temporary path and
+renamed into place, so a crash mid-write never leaves a torn snapshot. On
+startup the snapshot is restored unless it is older than the configured
+maximum age.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from tools.monitoring.monitor import ItemMonitor
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: str, state: Dict[str, Any], saved_at: float) -> int:
+    """Atomically write *state* to *path*; return the compressed size."""
+    payload = {"version": SNAPSHOT_VERSION, "saved_at": saved_at, "state": state}
+    data = gzip.compress(
+        json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode(),
+        compresslevel=6,
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as tmp:
+        tmp.write(data)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_snapshot(
+    path: str, max_age: float, now: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """Return the saved state, or None if missing, unreadable or stale."""
+    try:
+        with open(path, "rb") as snapshot:
+            payload = json.loads(gzip.decompress(snapshot.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError) as exc:
+        logger.warning("Ignoring unreadable state snapshot %s: %s", path, exc)
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION:
+        logger.info("Ignoring state snapshot with version %s", payload.get("version"))
+        return None
+    age = (time.time() if now is None else now) - payload.get("saved_at", 0)
+    if age > max_age:
+        logger.info("Ignoring state snapshot saved %.0fs ago", age)
+        return None
+    return payload["state"]
+
+
+class StateSnapshotter:
+    """Save and restore the monitor's state at *path*."""
+
+    def __init__(
+        self,
+        path: str,
+        interval_seconds: float = 60,
+        max_age_seconds: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self.last_saved: Optional[float] = None
+
+    def restore(self, monitor: "ItemMonitor") -> bool:
+        state = load_snapshot(self.path, self.max_age_seconds, now=self._clock())
+        if state is None:
+            return False
+        try:
+            monitor.restore_state(state)
+        except Exception as exc:
+            logger.warning("Failed to restore state snapshot: %s", exc)
+            return False
+        logger.info("Restored worker state from %s", self.path)
+        return True
+
+    async def maybe_save(self, monitor: "ItemMonitor", force: bool = False) -> bool:
+        now = self._clock()
+        if (
+            not force
+            and self.last_saved is not None
+            and now - self.last_saved < self.interval_seconds
+        ):
+            return False
+        state = monitor.export_state()
+        try:
+            size = await asyncio.to_thread(save_snapshot, self.path, state, now)
+        except OSError as exc:
+            logger.warning("Failed to write state snapshot %s: %s", self.path, exc)
+            return False
+        self.last_saved = now
+        logger.debug("State snapshot written (%s bytes)", size)
+        return True
@@ -0,0 +1,294 @@
+"""Local write-ahead outbox for item records.
+
+`ItemMonitor` hands new items to `OutboxItemSink`, which commits them to a
+SQLite database in WAL mode and returns immediately. A background flusher
+drains the outbox to the target sink (topn-db) in batches; records that fail
+are retried with exponential backoff. Each record carries an idempotency key
+(item URL + task URL), so re-queuing an item that is still pending is a
+no-op and a retried write is recognised by topn-db.
+
+A record that runs out of attempts, or that the target rejects for good
+(e.g. a 400), becomes a dead letter: it is logged, no longer retried and
+no longer reported as pending, so the monitor picks the listing up again.
+Queuing it again then revives it with the new payload.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from .sinks import BaseItemSink, ItemRecord, idempotency_key
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+)
+"""
+
+PENDING = "pending"
+DEAD = "dead"
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    key: str
+    record: ItemRecord
+    attempts: int
+
+
+class SqliteOutbox:
+    """Durable queue of item records backed by a SQLite file.
+
+    Methods are blocking; `OutboxItemSink` runs them in a worker thread.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives process crashes; only power loss can drop
+        # the last transactions.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "status" not in columns:
+            # Outbox files created before dead letters existed.
+            self._conn.execute(
+                "ALTER TABLE outbox ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'"
+            )
+        self._conn.commit()
+
+    def enqueue(self, records: Sequence[ItemRecord]) -> int:
+        """Add *records*, ignoring ones already pending; return how many were queued.
+
+        A dead letter with the same key is queued again with the new payload.
+        """
+        now = self._clock()
+        rows = [
+            (idempotency_key(r), json.dumps(r, ensure_ascii=False), now, now)
+            for r in records
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO outbox "
+                "(idempotency_key, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (idempotency_key) DO UPDATE SET "
+                "payload = excluded.payload, attempts = 0, "
+                "next_attempt_at = excluded.next_attempt_at, last_error = NULL, "
+                f"status = '{PENDING}' WHERE status = '{DEAD}'",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def due(self, limit: int) -> List[OutboxEntry]:
+        """Oldest entries whose next attempt is due."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, payload, attempts FROM outbox "
+                f"WHERE status = '{PENDING}' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (self._clock(), limit),
+            ).fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def complete(self, ids: Sequence[int]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE id = ?", [(i,) for i in ids]
+            )
+
+    def retry_later(self, ids: Sequence[int], delay: float, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, "
+                "last_error = ? WHERE id = ?",
+                [(self._clock() + delay, error, i) for i in ids],
+            )
+
+    def dead_letter(self, ids: Sequence[int], error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, "
+                f"status = '{DEAD}' WHERE id = ?",
+                [(error, i) for i in ids],
+            )
+
+    def pending_item_urls(self, source_urls: Sequence[str]) -> Set[str]:
+        """Item URLs of queued records for any of *source_urls*."""
+        if not source_urls:
+            return set()
+        placeholders = ", ".join("?" * len(source_urls))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT json_extract(payload, '$.item_url') FROM outbox "
+                f"WHERE status = '{PENDING}' "
+                f"AND json_extract(payload, '$.source_url') IN ({placeholders})",
+                list(source_urls),
+            ).fetchall()
+        return {row[0] for row in rows if row[0]}
+
+    def count(self, status: str = PENDING) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+    def pending(self) -> int:
+        return self.count(PENDING)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxItemSink(BaseItemSink):
+    """Accept records into a `SqliteOutbox` and drain them to *target*."""
+
+    def __init__(
+        self,
+        outbox: SqliteOutbox,
+        target: BaseItemSink,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 600.0,
+        max_attempts: int = 20,
+    ) -> None:
+        self.outbox = outbox
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.enqueued = 0
+        self.flushed = 0
+        self.retries = 0
+
+    async def write(self, records: Sequence[ItemRecord]) -> List[ItemRecord]:
+        if not records:
+            return []
+        self.enqueued += await asyncio.to_thread(self.outbox.enqueue, records)
+        self._wake.set()
+        return list(records)
+
+    async def pending_item_urls(self, source_urls: Sequence[str]) -> Set[str]:
+        return await asyncio.to_thread(self.outbox.pending_item_urls, source_urls)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="outbox-flusher")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.flush_once()
+            except Exception as exc:
+                logger.error("Outbox flush failed: %s", exc, exc_info=True)
+                sent = 0
+            if sent < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def flush_once(self) -> int:
+        """Forward one batch of due records; return how many were delivered."""
+        entries = await asyncio.to_thread(self.outbox.due, self.batch_size)
+        if not entries:
+            return 0
+        try:
+            stored, rejected = await self.target.write_with_rejections(
+                [e.record for e in entries]
+            )
+        except Exception as exc:
+            logger.error("Outbox target write failed: %s", exc)
+            stored, rejected = [], []
+        stored_keys = {idempotency_key(r) for r in stored}
+        rejected_keys = {idempotency_key(r) for r in rejected}
+        done = [e for e in entries if e.key in stored_keys]
+        failed = [e for e in entries if e.key not in stored_keys]
+
+        if done:
+            await asyncio.to_thread(self.outbox.complete, [e.id for e in done])
+            self.flushed += len(done)
+        retried = 0
+        for entry in failed:
+            if entry.key in rejected_keys:
+                await self._dead_letter(entry, "rejected by target")
+            elif entry.attempts + 1 >= self.max_attempts:
+                await self._dead_letter(
+                    entry, f"target write failed {entry.attempts + 1} times"
+                )
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2**entry.attempts)
+                await asyncio.to_thread(
+                    self.outbox.retry_later, [entry.id], delay, "target write failed"
+                )
+                self.retries += 1
+                retried += 1
+        if retried:
+            logger.warning(
+                "Outbox: %s records delivered, %s scheduled for retry",
+                len(done),
+                retried,
+            )
+        return len(done)
+
+    async def _dead_letter(self, entry: OutboxEntry, reason: str) -> None:
+        await asyncio.to_thread(self.outbox.dead_letter, [entry.id], reason)
+        logger.error(
+            "Outbox: giving up on item %s for %s (%s)",
+            entry.record.get("item_url"),
+            entry.record.get("source_url"),
+            reason,
+        )
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Best-effort final drain; anything left is sent after restart.
+        while await self.flush_once():
+            pass
+        await self.target.close()
+        self.outbox.close()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.outbox.pending(),
+            "dead_letters": self.outbox.count(DEAD),
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "retries": self.retries,
+            "target": self.target.stats,
+        }
@@ -0,0 +1,217 @@
+"""Bulk item sink writing straight to the Postgres schema behind topn-db.
+
+`PostgresItemSink` takes the topn-db HTTP API out of the write hot path for
+high-volume deployments. Small batches go in as one multi-row
+``INSERT ... ON CONFLICT DO NOTHING``; larger ones are COPYed into a
+temporary table and inserted from there with the same conflict rule, so
+items already stored (same ``item_url`` by default) are skipped. Put it
+behind the outbox (``OUTBOX_PATH``) to get real batches: the monitor hands
+items over one at a time as they are scraped.
+
+The sink only relies on DB-API calls plus psycopg2's ``copy_expert`` for
+the COPY path, so SQLite (3.35+, for ``RETURNING``) works as a stand-in in
+tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .sinks import BaseItemSink, ItemRecord
+
+logger = logging.getLogger(__name__)
+
+# Item payload fields stored as columns of the items table.
+DEFAULT_COLUMNS: Tuple[str, ...] = (
+    "item_url",
+    "source_url",
+    "title",
+    "price",
+    "location",
+    "created_at",
+    "created_at_pretty",
+    "image_url",
+    "description",
+    "source",
+    "first_seen",
+    "summary_price",
+    "summary_deposit",
+    "summary_animals_allowed",
+    "summary_rent",
+    "repost_of",
+)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def copy_text(rows: Sequence[Sequence[Any]]) -> str:
+    """Encode *rows* in COPY's text format (tab separated, ``\\N`` for NULL)."""
+    lines = []
+    for row in rows:
+        lines.append(
+            "\t".join(
+                "\\N" if value is None else str(value).translate(_COPY_ESCAPES)
+                for value in row
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+class PostgresItemSink(BaseItemSink):
+    """Write records to the items table in bulk, skipping existing items."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        table: str = "items",
+        columns: Sequence[str] = DEFAULT_COLUMNS,
+        conflict_columns: Sequence[str] = ("item_url",),
+        copy_threshold: int = 200,
+        max_rows_per_statement: int = 500,
+        paramstyle: str = "format",
+    ) -> None:
+        self._connect = connect
+        self.table = _identifier(table)
+        self.columns = tuple(_identifier(c) for c in columns)
+        self.conflict_columns = tuple(_identifier(c) for c in conflict_columns)
+        self.copy_threshold = copy_threshold
+        self.max_rows_per_statement = max_rows_per_statement
+        self._placeholder = "?" if paramstyle == "qmark" else "%s"
+        self._conn = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.copies = 0
+
+    @classmethod
+    def from_dsn(cls, dsn: str, **kwargs: Any) -> "PostgresItemSink":
+        def connect():
+            import psycopg2
+
+            return psycopg2.connect(dsn)
+
+        return cls(connect, **kwargs)
+
+    async def write(self, records: Sequence[ItemRecord]) -> List[ItemRecord]:
+        if not records:
+            return []
+        try:
+            inserted = await asyncio.to_thread(self._write, records)
+        except Exception as exc:
+            self.failed += len(records)
+            logger.error(
+                "Failed to write %s items to %s: %s",
+                len(records),
+                self.table,
+                exc,
+                exc_info=True,
+            )
+            return []
+        self.written += inserted
+        self.duplicates += len(records) - inserted
+        # Rows skipped by the conflict rule are already stored.
+        return list(records)
+
+    def _write(self, records: Sequence[ItemRecord]) -> int:
+        """Insert *records* in one transaction; return the rows inserted."""
+        rows = [tuple(record.get(c) for c in self.columns) for record in records]
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            conn = self._conn
+            try:
+                cursor = conn.cursor()
+                try:
+                    if len(rows) >= self.copy_threshold and hasattr(
+                        cursor, "copy_expert"
+                    ):
+                        inserted = self._copy(cursor, rows)
+                    else:
+                        inserted = self._insert(cursor, rows)
+                finally:
+                    cursor.close()
+                conn.commit()
+                return inserted
+            except Exception:
+                # Drop the connection; the next write starts a fresh one.
+                self._conn = None
+                try:
+                    conn.rollback()
+                    conn.close()
+                except Exception:
+                    pass
+                raise
+
+    def _conflict_clause(self) -> str:
+        return f"ON CONFLICT ({', '.join(self.conflict_columns)}) DO NOTHING"
+
+    def _insert(self, cursor, rows: List[tuple]) -> int:
+        row_sql = "(" + ", ".join([self._placeholder] * len(self.columns)) + ")"
+        inserted = 0
+        for start in range(0, len(rows), self.max_rows_per_statement):
+            chunk = rows[start : start + self.max_rows_per_statement]
+            cursor.execute(
+                f"INSERT INTO {self.table} ({', '.join(self.columns)}) "
+                f"VALUES {', '.join([row_sql] * len(chunk))} "
+                f"{self._conflict_clause()} RETURNING 1",
+                [value for row in chunk for value in row],
+            )
+            inserted += len(cursor.fetchall())
+        return inserted
+
+    def _copy(self, cursor, rows: List[tuple]) -> int:
+        self.copies += 1
+        columns = ", ".join(self.columns)
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS items_copy "
+            f"(LIKE {self.table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            f"COPY items_copy ({columns}) FROM STDIN", io.StringIO(copy_text(rows))
+        )
+        cursor.execute(
+            f"INSERT INTO {self.table} ({columns}) "
+            f"SELECT {columns} FROM items_copy {self._conflict_clause()} RETURNING 1"
+        )
+        return len(cursor.fetchall())
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "copies": self.copies,
+        }
+
+
+def build_postgres_sink(
+    dsn: Optional[str], table: str, columns: Sequence[str], copy_threshold: int
+) -> PostgresItemSink:
+    if not dsn:
+        raise ValueError("DATABASE_URL must be set for the postgres item sink")
+    return PostgresItemSink.from_dsn(
+        dsn, table=table, columns=columns, copy_threshold=copy_threshold
+    )
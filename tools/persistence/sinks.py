@@ -0,0 +1,171 @@
+"""Destinations for item records produced by `ItemMonitor`.
+
+A sink receives fully built item payloads (the JSON sent to topn-db) and
+reports which of them were stored. `TopnDbItemSink` writes straight to the
+API; `tools.persistence.postgres.PostgresItemSink` bulk-inserts into the
+database behind it; `tools.persistence.outbox.OutboxItemSink` accepts
+records locally and forwards them to either in the background.
+"""
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Set, Tuple
+
+import httpx
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    from clients.topn_db_client import TopnDbClient
+
+logger = logging.getLogger(__name__)
+
+ItemRecord = Dict[str, Any]
+
+# topn-db answers 409 when an item with the same URL already exists.
+DUPLICATE_STATUSES = (409,)
+# Client errors worth retrying; any other 4xx rejects the record for good.
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+def is_permanent_rejection(status_code: int) -> bool:
+    return 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_STATUSES
+
+
+def idempotency_key(record: ItemRecord) -> str:
+    """Stable key for a record: one item URL persisted for one task URL."""
+    raw = f"{record.get('item_url', '')}|{record.get('source_url', '')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class BaseItemSink(abc.ABC):
+    """Interface for persisting item records."""
+
+    @abc.abstractmethod
+    async def write(self, records: Sequence[ItemRecord]) -> List[ItemRecord]:
+        """Persist *records* and return the ones that were accepted.
+
+        Failures are logged by the sink; records missing from the result
+        were not stored.
+        """
+
+    async def write_with_rejections(
+        self, records: Sequence[ItemRecord]
+    ) -> Tuple[List[ItemRecord], List[ItemRecord]]:
+        """Like `write`, also returning the records rejected for good.
+
+        A rejected record (e.g. one the API answers with a 400) will fail
+        the same way on every retry. By default no failure is permanent.
+        """
+        return await self.write(records), []
+
+    async def pending_item_urls(self, source_urls: Sequence[str]) -> Set[str]:
+        """Item URLs accepted for *source_urls* but not yet in the store."""
+        return set()
+
+    async def start(self) -> None:
+        """Start background work, if any."""
+
+    async def close(self) -> None:
+        """Flush pending work and release resources."""
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class TopnDbItemSink(BaseItemSink):
+    """Write records one by one through the topn-db API."""
+
+    def __init__(self, db_client: "TopnDbClient") -> None:
+        self.db_client = db_client
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def write(self, records: Sequence[ItemRecord]) -> List[ItemRecord]:
+        stored, _ = await self.write_with_rejections(records)
+        return stored
+
+    async def write_with_rejections(
+        self, records: Sequence[ItemRecord]
+    ) -> Tuple[List[ItemRecord], List[ItemRecord]]:
+        stored: List[ItemRecord] = []
+        rejected: List[ItemRecord] = []
+        for record in records:
+            try:
+                await self.db_client.create_item(
+                    record, idempotency_key=idempotency_key(record)
+                )
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code in DUPLICATE_STATUSES:
+                    # Already stored by an earlier attempt.
+                    self.duplicates += 1
+                    stored.append(record)
+                    continue
+                self.failed += 1
+                logger.error("Failed to persist item %s: %s", record["item_url"], exc)
+                if is_permanent_rejection(exc.response.status_code):
+                    self.rejected += 1
+                    rejected.append(record)
+                continue
+            except Exception as exc:
+                self.failed += 1
+                logger.error(
+                    "Failed to persist item %s: %s",
+                    record["item_url"],
+                    exc,
+                    exc_info=True,
+                )
+                continue
+            self.written += 1
+            stored.append(record)
+        return stored, rejected
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+def build_item_sink(db_client: "TopnDbClient") -> BaseItemSink:
+    """Create the sink configured in settings.
+
+    ``ITEM_SINK`` picks the destination: the topn-db API (``topn-db``) or
+    the database directly (``postgres``). With ``OUTBOX_PATH`` set, records
+    go to a local outbox that is drained to it in the background; otherwise
+    they are written directly.
+    """
+    sink: BaseItemSink
+    if settings.ITEM_SINK == "topn-db":
+        sink = TopnDbItemSink(db_client)
+    elif settings.ITEM_SINK == "postgres":
+        from .postgres import build_postgres_sink
+
+        sink = build_postgres_sink(
+            settings.DATABASE_URL,
+            table=settings.POSTGRES_ITEM_TABLE,
+            columns=settings.POSTGRES_ITEM_COLUMNS,
+            copy_threshold=settings.POSTGRES_COPY_THRESHOLD,
+        )
+    else:
+        raise ValueError(f"Unknown ITEM_SINK: {settings.ITEM_SINK!r}")
+    if settings.OUTBOX_PATH:
+        from .outbox import OutboxItemSink, SqliteOutbox
+
+        sink = OutboxItemSink(
+            SqliteOutbox(settings.OUTBOX_PATH),
+            target=sink,
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            flush_interval=settings.OUTBOX_FLUSH_INTERVAL_SECONDS,
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        )
+    return sink
@@ -1,24 +1,152 @@
-"""Utility that wraps calling the LLM to summarise item descriptions."""
+"""Utility that wraps calling the LLM to summarise item descriptions.
+
+Summaries are typed (`models.DescriptionSummary`). The chat model is asked
+for JSON through its structured-output mode; answers that do not validate
+are repaired locally rather than sent back to the model. Callers pass the
+`Route` chosen for the listing's category, which names the prompt or rules
+out the LLM entirely.
+"""
 
 from __future__ import annotations
 
+import hashlib
 import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 
 from core.config import settings
-from prompts import get_description_summary_prompt
+from models import DescriptionSummary
+from prompts import SUMMARY_PROMPTS
+from tools.processing.extractor import ExtractionResult, RuleBasedExtractor
+from tools.processing.routing import APARTMENT_ROUTE, Route
 
 logger = logging.getLogger(__name__)
 
 
 class DescriptionSummarizer:
-    """Asynchronous helper for shortening raw description text via LLM."""
+    """Asynchronous helper for shortening raw description text via LLM.
+
+    Descriptions are first run through the `RuleBasedExtractor`; the LLM is
+    only called when the extractor is not confident enough or found
+    conflicting values. LLM answers are kept in a small LRU cache keyed by
+    a hash of the description, so relisted or repeated descriptions are not
+    sent to the model again.
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[RuleBasedExtractor] = None,
+        min_confidence: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        if extractor is None and settings.RULE_EXTRACTOR_ENABLED:
+            extractor = RuleBasedExtractor()
+        self.extractor = extractor
+        self.min_confidence = (
+            settings.RULE_EXTRACTOR_MIN_CONFIDENCE
+            if min_confidence is None
+            else min_confidence
+        )
+        self.rule_hits = 0
+        self.llm_calls = 0
+        self.repairs = 0
+        self.cache_hits = 0
+        self.cache_size = (
+            settings.SUMMARY_CACHE_SIZE if cache_size is None else cache_size
+        )
+        self._cache: "OrderedDict[str, DescriptionSummary]" = OrderedDict()
+        # (model, structured runnable) so the wrapper is built once per model
+        self._structured: Optional[tuple] = None
+
+    async def summarize(self, description: str, route: Route = APARTMENT_ROUTE) -> str:
+        """Return the summary in its 4-line text form, or "" on failure."""
+        summary = await self.summarize_structured(description, route)
+        return summary.to_text() if summary is not None else ""
 
-    async def summarize(self, description: str) -> str:
+    async def summarize_structured(
+        self, description: str, route: Route = APARTMENT_ROUTE
+    ) -> Optional[DescriptionSummary]:
+        """Summarise *description* as *route* says; None when there is nothing."""
+        if not route.needs_summary:
+            return None
+        key = self._cache_key(description, route.prompt)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        if self.extractor is not None:
+            result = self.extractor.extract(description)
+            if result.confidence >= self.min_confidence and not result.has_conflicts:
+                self.rule_hits += 1
+                logger.debug(
+                    "Rule extractor answered with confidence %.2f", result.confidence
+                )
+                return self._from_extraction(result)
+            if not route.uses_llm:
+                found = any(v is not None and v != 0 for v in result.as_dict().values())
+                return self._from_extraction(result) if found else None
+        if not route.uses_llm:
+            return None
+
+        self.llm_calls += 1
         try:
-            response = await settings.GENERATIVE_MODEL.ainvoke(
-                input=get_description_summary_prompt(description)
+            response = await self._structured_model().ainvoke(
+                SUMMARY_PROMPTS[route.prompt](description)
             )
-            return response.content
         except Exception as exc:  # pragma: no cover
             logger.error("Failed summarising description: %s", exc, exc_info=True)
-            return ""
+            return None
+        summary = self._parse_response(response)
+        self._remember(key, summary)
+        return summary
+
+    @staticmethod
+    def _cache_key(description: str, prompt: Optional[str]) -> str:
+        return hashlib.sha1(f"{prompt}|{description.strip()}".encode()).hexdigest()
+
+    def _remember(self, key: str, summary: DescriptionSummary) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = summary
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def export_state(self) -> Dict[str, Any]:
+        return {
+            "cache": {key: summary.model_dump() for key, summary in self._cache.items()}
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self._cache.clear()
+        for key, data in state.get("cache", {}).items():
+            self._remember(key, DescriptionSummary.repair(data))
+
+    @staticmethod
+    def _from_extraction(result: ExtractionResult) -> DescriptionSummary:
+        return DescriptionSummary(**result.as_dict())
+
+    def _structured_model(self) -> Any:
+        """The generative model in JSON mode, or the model itself if unsupported."""
+        model = settings.GENERATIVE_MODEL
+        if self._structured is None or self._structured[0] is not model:
+            runnable = model
+            if hasattr(model, "with_structured_output"):
+                runnable = model.with_structured_output(
+                    DescriptionSummary, method="json_mode", include_raw=True
+                )
+            self._structured = (model, runnable)
+        return self._structured[1]
+
+    def _parse_response(self, response: Any) -> DescriptionSummary:
+        if isinstance(response, DescriptionSummary):
+            return response
+        if isinstance(response, dict) and "raw" in response:
+            # include_raw=True output: {"raw", "parsed", "parsing_error"}
+            if response.get("parsed") is not None:
+                return DescriptionSummary.repair(response["parsed"])
+            response = response["raw"]
+        self.repairs += 1
+        return DescriptionSummary.repair(getattr(response, "content", response))
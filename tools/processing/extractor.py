@@ -0,0 +1,250 @@
+"""Rule-based extraction of rental terms from Polish OLX descriptions.
+
+Acts as a fast path in front of the LLM: most listings state the price,
+deposit (kaucja), additional fees (czynsz) and the pet policy in a handful of
+recurring phrasings that can be read with regular expressions. The result is
+rendered in exactly the same 4-line format the summary prompt asks the model
+for, together with a confidence score that tells `DescriptionSummarizer`
+whether the LLM still has to be consulted.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+NOT_SPECIFIED = "NOT_SPECIFIED"
+
+# Conversion rate used by the summary prompt for USD / EUR amounts.
+FOREIGN_CURRENCY_RATE = 4
+
+# Confidence contributed by a field that is simply not mentioned. Deposit,
+# fees and the pet policy are frequently omitted, so the prompt defaults are
+# plausible; a missing price on the other hand almost always means the rules
+# did not understand the text.
+_ABSENT_CONFIDENCE = 0.7
+
+_AMOUNT = r"(?P<amount>\d{1,3}(?:[  .]\d{3})+|\d+)(?:[.,](?P<frac>\d{1,2}))?"
+_CURRENCY = r"(?P<currency>zł|zl|pln|złotych|zlotych|€|eur|euro|\$|usd)?"
+_GAP = r"[^\d\n]{0,30}?"
+# A bare number followed by this is a count of months ("kaucja: 2 miesiące",
+# "kaucja 1-miesięczna"), not an amount.
+_MONTHS_AFTER = re.compile(r"\s*-?\s*mies")
+# Smallest PLN amount taken at face value; anything below is a count or a
+# fragment of some other number.
+_MIN_AMOUNT = 50
+
+_PRICE_KEYWORDS = (
+    r"cena(?:\s+najmu)?",
+    r"czynsz\s+najmu",
+    r"koszt\s+(?:najmu|wynajmu)",
+    r"odstępne",
+    r"wynajem\s+za",
+    r"do\s+wynajęcia\s+za",
+)
+_DEPOSIT_KEYWORDS = (r"kaucj[aięy]", r"depozyt")
+_RENT_KEYWORDS = (
+    r"czynsz\s+(?:administracyjny|do\s+wspólnoty|do\s+spółdzielni|dla\s+spółdzielni)",
+    r"\+\s*czynsz",
+    r"plus\s+czynsz",
+    r"opłaty\s+administracyjne",
+    r"czynsz(?!\s+najmu)",
+)
+
+_PETS_ALLOWED = (
+    r"zwierzęta\s+(?:są\s+)?(?:mile\s+widziane|akceptowane|dozwolone|tak)",
+    r"akceptujemy\s+zwierzęta",
+    r"przyjazne\s+zwierzętom",
+    r"pet\s+friendly",
+    r"zwierzęta\s*:\s*tak",
+)
+_PETS_FORBIDDEN = (
+    r"bez\s+zwierząt",
+    r"zwierzęta\s+(?:nie\s+są\s+)?(?:niedozwolone|nieakceptowane|zabronione)",
+    r"nie\s+(?:akceptujemy|przyjmujemy)\s+zwierząt",
+    r"zakaz\s+(?:trzymania\s+)?zwierząt",
+    r"zwierzęta\s*:\s*nie",
+    r"zwierzęta\s+nie\s+są\s+(?:mile\s+widziane|akceptowane|dozwolone)",
+)
+
+
+@dataclass
+class ExtractionResult:
+    """Values read from a description plus how much we trust them."""
+
+    price: int = 0
+    deposit: int = 0
+    animals_allowed: Optional[bool] = None
+    rent: int = 0
+    confidence: float = 0.0
+    conflicts: List[str] = field(default_factory=list)
+
+    @property
+    def has_conflicts(self) -> bool:
+        return bool(self.conflicts)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "price": self.price,
+            "deposit": self.deposit,
+            "animals_allowed": self.animals_allowed,
+            "rent": self.rent,
+        }
+
+    def to_summary(self) -> str:
+        """Render the result in the 4-line format produced by the LLM prompt."""
+        return format_summary(self.as_dict())
+
+
+def format_summary(fields: Dict[str, object]) -> str:
+    """Format extracted fields as the `price/deposit/animals_allowed/rent` block."""
+    animals = fields.get("animals_allowed")
+    if animals is True:
+        animals_str = "true"
+    elif animals is False:
+        animals_str = "false"
+    else:
+        animals_str = NOT_SPECIFIED
+    return (
+        f"price: {int(fields.get('price') or 0)}\n"
+        f"deposit: {int(fields.get('deposit') or 0)}\n"
+        f"animals_allowed: {animals_str}\n"
+        f"rent: {int(fields.get('rent') or 0)}"
+    )
+
+
+def parse_summary(text: str) -> Dict[str, object]:
+    """Parse a 4-line summary (from the LLM or the extractor) back into fields.
+
+    Unknown or malformed lines fall back to the prompt defaults.
+    """
+    fields: Dict[str, object] = {
+        "price": 0,
+        "deposit": 0,
+        "animals_allowed": None,
+        "rent": 0,
+    }
+    for line in (text or "").splitlines():
+        if ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        key = key.strip().lower()
+        value = value.strip()
+        if key == "animals_allowed":
+            lowered = value.lower()
+            if lowered == "true":
+                fields[key] = True
+            elif lowered == "false":
+                fields[key] = False
+        elif key in fields:
+            digits = re.sub(r"[^\d]", "", value.split(".")[0].split(",")[0])
+            fields[key] = int(digits) if digits else 0
+    return fields
+
+
+class RuleBasedExtractor:
+    """Regex driven extractor for price, kaucja, czynsz and the pet policy."""
+
+    def __init__(self) -> None:
+        self._price_res = [self._amount_re(k) for k in _PRICE_KEYWORDS]
+        self._deposit_res = [self._amount_re(k) for k in _DEPOSIT_KEYWORDS]
+        self._rent_res = [self._amount_re(k) for k in _RENT_KEYWORDS]
+        self._deposit_mention = re.compile("|".join(_DEPOSIT_KEYWORDS))
+        self._rent_mention = re.compile(r"czynsz(?!\s+najmu)|opłaty\s+administracyjne")
+        self._price_mention = re.compile("|".join(_PRICE_KEYWORDS))
+        self._pets_mention = re.compile(r"zwierz")
+        self._pets_allowed = re.compile("|".join(_PETS_ALLOWED))
+        self._pets_forbidden = re.compile("|".join(_PETS_FORBIDDEN))
+
+    @staticmethod
+    def _amount_re(keyword: str) -> re.Pattern:
+        return re.compile(rf"(?:{keyword}){_GAP}{_AMOUNT}\s*{_CURRENCY}")
+
+    @staticmethod
+    def _normalise(text: str) -> str:
+        text = unicodedata.normalize("NFC", text or "").lower()
+        return re.sub(r"[ \t]+", " ", text)
+
+    @staticmethod
+    def _to_pln(match: re.Match) -> int:
+        amount = int(re.sub(r"[  .]", "", match.group("amount")))
+        currency = (match.group("currency") or "").lower()
+        if currency in ("€", "eur", "euro", "$", "usd"):
+            amount *= FOREIGN_CURRENCY_RATE
+        return amount
+
+    def _amounts(self, patterns: List[re.Pattern], text: str) -> List[int]:
+        found: List[int] = []
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                if not match.group("currency") and _MONTHS_AFTER.match(
+                    text, match.end()
+                ):
+                    continue
+                value = self._to_pln(match)
+                if value >= _MIN_AMOUNT and value not in found:
+                    found.append(value)
+        return found
+
+    def _field(
+        self,
+        name: str,
+        values: List[int],
+        mentioned: bool,
+        conflicts: List[str],
+    ) -> tuple[int, float]:
+        if len(values) == 1:
+            return values[0], 1.0
+        if len(values) > 1:
+            conflicts.append(name)
+            return values[0], 0.5
+        # Keyword present but no amount could be read (e.g. "kaucja zwrotna").
+        if mentioned:
+            return 0, 0.3
+        return 0, _ABSENT_CONFIDENCE if name != "price" else 0.0
+
+    def extract(self, description: str) -> ExtractionResult:
+        """Extract rental terms from *description*."""
+        text = self._normalise(description)
+        conflicts: List[str] = []
+
+        price_values = self._amounts(self._price_res, text)
+        deposit_values = self._amounts(self._deposit_res, text)
+        rent_values = self._amounts(self._rent_res, text)
+
+        price, price_conf = self._field(
+            "price", price_values, bool(self._price_mention.search(text)), conflicts
+        )
+        deposit, deposit_conf = self._field(
+            "deposit",
+            deposit_values,
+            bool(self._deposit_mention.search(text)),
+            conflicts,
+        )
+        rent, rent_conf = self._field(
+            "rent", rent_values, bool(self._rent_mention.search(text)), conflicts
+        )
+
+        allowed = bool(self._pets_allowed.search(text))
+        forbidden = bool(self._pets_forbidden.search(text))
+        if allowed and forbidden:
+            conflicts.append("animals_allowed")
+            animals, animals_conf = None, 0.0
+        elif allowed or forbidden:
+            animals, animals_conf = allowed, 1.0
+        elif self._pets_mention.search(text):
+            animals, animals_conf = None, 0.3
+        else:
+            animals, animals_conf = None, _ABSENT_CONFIDENCE
+
+        confidence = (price_conf + deposit_conf + rent_conf + animals_conf) / 4
+        return ExtractionResult(
+            price=price,
+            deposit=deposit,
+            animals_allowed=animals,
+            rent=rent,
+            confidence=round(confidence, 3),
+            conflicts=conflicts,
+        )
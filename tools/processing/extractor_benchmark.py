@@ -0,0 +1,171 @@
+"""Accuracy / latency comparison of the rule extractor against the LLM.
+
+Runs both summarisation paths over a labelled corpus (JSON lines with a
+``description`` and an ``expected`` mapping of ``price``, ``deposit``,
+``animals_allowed`` and ``rent``) and reports per-field accuracy, coverage of
+the fast path and latency percentiles.
+
+Usage::
+
+    python -m tools.processing.extractor_benchmark tests/fixtures/descriptions.jsonl
+    python -m tools.processing.extractor_benchmark corpus.jsonl --llm
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tools.processing.extractor import RuleBasedExtractor, parse_summary
+
+FIELDS = ("price", "deposit", "animals_allowed", "rent")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Load a JSON-lines corpus of labelled descriptions."""
+    corpus = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                corpus.append(json.loads(line))
+    return corpus
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _score(predictions: List[Dict[str, Any]], corpus: List[Dict[str, Any]]) -> Dict:
+    per_field = {}
+    for name in FIELDS:
+        hits = sum(
+            1
+            for pred, sample in zip(predictions, corpus)
+            if pred.get(name) == sample["expected"].get(name)
+        )
+        per_field[name] = hits / len(corpus) if corpus else 0.0
+    exact = sum(
+        1
+        for pred, sample in zip(predictions, corpus)
+        if all(pred.get(n) == sample["expected"].get(n) for n in FIELDS)
+    )
+    return {
+        "field_accuracy": per_field,
+        "exact_match": exact / len(corpus) if corpus else 0.0,
+    }
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "total_ms": sum(samples) * 1000,
+    }
+
+
+def evaluate_extractor(
+    corpus: List[Dict[str, Any]],
+    extractor: Optional[RuleBasedExtractor] = None,
+    min_confidence: float = 0.85,
+) -> Dict[str, Any]:
+    """Score the rule extractor on *corpus*.
+
+    Besides plain accuracy, reports the accuracy restricted to the samples the
+    extractor would answer on its own (confidence above *min_confidence* and
+    no conflicts), which is what matters for the LLM fast path.
+    """
+    extractor = extractor or RuleBasedExtractor()
+    predictions, timings, confident = [], [], []
+    for sample in corpus:
+        start = time.perf_counter()
+        result = extractor.extract(sample["description"])
+        timings.append(time.perf_counter() - start)
+        predictions.append(result.as_dict())
+        confident.append(
+            result.confidence >= min_confidence and not result.has_conflicts
+        )
+
+    report = _score(predictions, corpus)
+    confident_pairs = [
+        (pred, sample) for pred, sample, ok in zip(predictions, corpus, confident) if ok
+    ]
+    report["coverage"] = len(confident_pairs) / len(corpus) if corpus else 0.0
+    report["confident_exact_match"] = (
+        _score([p for p, _ in confident_pairs], [s for _, s in confident_pairs])[
+            "exact_match"
+        ]
+        if confident_pairs
+        else 0.0
+    )
+    report["latency"] = _latency(timings)
+    return report
+
+
+async def evaluate_llm(
+    corpus: List[Dict[str, Any]],
+    summarize: Callable[[str], Awaitable[str]],
+) -> Dict[str, Any]:
+    """Score an LLM-backed *summarize* coroutine on *corpus*."""
+    predictions, timings = [], []
+    for sample in corpus:
+        start = time.perf_counter()
+        text = await summarize(sample["description"])
+        timings.append(time.perf_counter() - start)
+        predictions.append(parse_summary(text))
+    report = _score(predictions, corpus)
+    report["latency"] = _latency(timings)
+    return report
+
+
+async def compare(
+    corpus: List[Dict[str, Any]],
+    summarize: Optional[Callable[[str], Awaitable[str]]] = None,
+    min_confidence: float = 0.85,
+) -> Dict[str, Any]:
+    """Return side-by-side reports for the extractor and (optionally) the LLM."""
+    report = {"rules": evaluate_extractor(corpus, min_confidence=min_confidence)}
+    if summarize is not None:
+        report["llm"] = await evaluate_llm(corpus, summarize)
+    return report
+
+
+async def _llm_summarize(description: str) -> str:  # pragma: no cover
+    from core.config import settings
+    from prompts import get_description_summary_prompt
+
+    response = await settings.GENERATIVE_MODEL.ainvoke(
+        input=get_description_summary_prompt(description)
+    )
+    return response.content
+
+
+def main(argv: Optional[List[str]] = None) -> None:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="Path to a JSON-lines labelled corpus")
+    parser.add_argument(
+        "--llm", action="store_true", help="Also benchmark the configured LLM"
+    )
+    parser.add_argument("--min-confidence", type=float, default=0.85)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    report = asyncio.run(
+        compare(
+            corpus,
+            summarize=_llm_summarize if args.llm else None,
+            min_confidence=args.min_confidence,
+        )
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,324 @@
+"""Pool of chat models spread over several API keys, models and providers.
+
+One Groq account's rate limit caps how many descriptions can be summarised
+per minute. `LLMPool` puts several members (key + model + provider, each
+with its own request budget and weight) behind the chat-model interface
+`DescriptionSummarizer` uses - ``ainvoke`` and ``with_structured_output``.
+Every call goes to the member with the best score: its weight times the
+share of its per-minute budget still unused, divided by its recent latency
+and by the calls it already has in flight. A member that is rate limited,
+times out or fails server-side is put on cooldown (longer after repeated
+failures) and the call fails over to the next member; any other error
+(e.g. a 400 for a bad request) is the caller's and is raised right away.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# EWMA weight of the newest latency sample.
+_LATENCY_ALPHA = 0.2
+
+
+def _groq_model(config: Mapping[str, Any]) -> Any:
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(model_name=config["model"], api_key=config.get("api_key"))
+
+
+def _openai_model(config: Mapping[str, Any]) -> Any:
+    # Any OpenAI-compatible endpoint (OpenRouter, Together, vLLM, ...).
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=config["model"],
+        api_key=config.get("api_key"),
+        base_url=config.get("base_url"),
+    )
+
+
+PROVIDERS: Dict[str, Callable[[Mapping[str, Any]], Any]] = {
+    "groq": _groq_model,
+    "openai": _openai_model,
+}
+
+
+# Error class names of provider SDKs that mean "try again elsewhere".
+_TRANSIENT_ERROR_NAMES = (
+    "ratelimit",
+    "timeout",
+    "internalserver",
+    "serviceunavailable",
+    "apiconnection",
+)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    return getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    return _status_code(exc) == 429 or "ratelimit" in type(exc).__name__.lower()
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether *exc* is a 429, a 5xx or a timeout / connection failure."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    name = type(exc).__name__.lower()
+    return any(part in name for part in _TRANSIENT_ERROR_NAMES)
+
+
+class PoolMember:
+    """One chat model in the pool with its limits and observed health."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        weight: float = 1.0,
+        requests_per_minute: int = 0,
+        max_concurrency: int = 0,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.weight = weight
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._recent: Deque[float] = deque()
+        self._bound: Dict[str, Any] = {}
+
+    def remaining_quota(self, now: float) -> float:
+        """Share of the per-minute budget still unused (1.0 when unlimited)."""
+        if self.requests_per_minute <= 0:
+            return 1.0
+        while self._recent and now - self._recent[0] >= 60:
+            self._recent.popleft()
+        return max(0, self.requests_per_minute - len(self._recent)) / (
+            self.requests_per_minute
+        )
+
+    def available(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return False
+        return self.remaining_quota(now) > 0
+
+    def score(self, now: float) -> float:
+        latency = self.latency if self.latency is not None else 1.0
+        return (
+            self.weight
+            * self.remaining_quota(now)
+            / (max(latency, 0.01) * (1 + self.in_flight))
+        )
+
+    def next_available_at(self, now: float) -> float:
+        """Earliest time the member may be available again."""
+        at = max(now, self.cooldown_until)
+        if self.requests_per_minute > 0 and self.remaining_quota(now) <= 0:
+            at = max(at, self._recent[0] + 60)
+        return at
+
+    def bound(self, key: str, build: Callable[[Any], Any]) -> Any:
+        """Runnable derived from the model (e.g. structured output), cached."""
+        if key not in self._bound:
+            self._bound[key] = build(self.model)
+        return self._bound[key]
+
+    def started(self, now: float) -> None:
+        self.in_flight += 1
+        self.requests += 1
+        self._recent.append(now)
+
+    def succeeded(self, latency: float) -> None:
+        self.in_flight -= 1
+        self.consecutive_failures = 0
+        self.latency = (
+            latency
+            if self.latency is None
+            else _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * self.latency
+        )
+
+    def failed(self, now: float, cooldown: float) -> None:
+        self.in_flight -= 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.cooldown_until = now + cooldown
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+        }
+
+
+class LLMPool:
+    """Route chat-model calls over several members with failover."""
+
+    def __init__(
+        self,
+        members: Sequence[PoolMember],
+        cooldown_seconds: float = 30,
+        max_cooldown_seconds: float = 600,
+        max_wait_seconds: float = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not members:
+            raise ValueError("LLMPool needs at least one member")
+        self.members = list(members)
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+
+    async def ainvoke(self, input: Any, **kwargs: Any) -> Any:
+        return await self._call("", lambda model: model, input, kwargs)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "PoolBinding":
+        """Pool runnable returning structured output where members support it.
+
+        Members whose model has no ``with_structured_output`` are called
+        directly; the caller is expected to parse their plain answers.
+        """
+        key = (
+            f"structured:{getattr(schema, '__name__', schema)}:{sorted(kwargs.items())}"
+        )
+
+        def build(model: Any) -> Any:
+            if hasattr(model, "with_structured_output"):
+                return model.with_structured_output(schema, **kwargs)
+            return model
+
+        return PoolBinding(self, key, build)
+
+    def _ranked(self, now: float, exclude: List[PoolMember]) -> List[PoolMember]:
+        candidates = [m for m in self.members if m not in exclude and m.available(now)]
+        return sorted(candidates, key=lambda m: m.score(now), reverse=True)
+
+    async def _pick(self, exclude: List[PoolMember]) -> Optional[PoolMember]:
+        """Best available member, waiting a bit if all are busy or limited."""
+        waited = 0.0
+        while True:
+            now = self._clock()
+            ranked = self._ranked(now, exclude)
+            if ranked:
+                return ranked[0]
+            remaining = [m for m in self.members if m not in exclude]
+            if not remaining or waited >= self.max_wait_seconds:
+                return None
+            delay = min(m.next_available_at(now) for m in remaining) - now
+            delay = min(max(delay, 0.05), self.max_wait_seconds - waited)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def _call(
+        self,
+        key: str,
+        build: Callable[[Any], Any],
+        input: Any,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        tried: List[PoolMember] = []
+        error: Optional[BaseException] = None
+        while True:
+            member = await self._pick(tried)
+            if member is None:
+                if error is not None:
+                    raise error
+                raise RuntimeError("No LLM pool member available")
+            tried.append(member)
+            runnable = member.bound(key, build) if key else member.model
+            started = self._clock()
+            member.started(started)
+            try:
+                result = await runnable.ainvoke(input, **kwargs)
+            except asyncio.CancelledError:
+                member.in_flight -= 1
+                raise
+            except Exception as exc:
+                if not is_transient_error(exc):
+                    # Another member would reject the same request.
+                    member.in_flight -= 1
+                    raise
+                cooldown = min(
+                    self.max_cooldown_seconds,
+                    self.cooldown_seconds * 2**member.consecutive_failures,
+                )
+                member.failed(self._clock(), cooldown)
+                logger.warning(
+                    "LLM pool member %s failed (%s%s); cooling down for %.0fs",
+                    member.name,
+                    "rate limited: " if is_rate_limit_error(exc) else "",
+                    exc,
+                    cooldown,
+                )
+                error = exc
+                continue
+            member.succeeded(self._clock() - started)
+            return result
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {member.name: member.stats for member in self.members}
+
+
+class PoolBinding:
+    """A runnable derived from every pool member, e.g. structured output."""
+
+    def __init__(self, pool: LLMPool, key: str, build: Callable[[Any], Any]) -> None:
+        self.pool = pool
+        self.key = key
+        self.build = build
+
+    async def ainvoke(self, input: Any, **kwargs: Any) -> Any:
+        return await self.pool._call(self.key, self.build, input, kwargs)
+
+
+def build_llm_pool(
+    configs: Sequence[Mapping[str, Any]],
+    cooldown_seconds: float = 30,
+    providers: Optional[Mapping[str, Callable[[Mapping[str, Any]], Any]]] = None,
+) -> LLMPool:
+    """Build a pool from ``LLM_POOL`` entries.
+
+    Each entry needs a ``model`` and may set ``provider`` (``groq`` or
+    ``openai``), ``api_key``, ``base_url``, ``name``, ``weight``,
+    ``requests_per_minute`` and ``max_concurrency``.
+    """
+    providers = providers or PROVIDERS
+    members = []
+    for index, config in enumerate(configs):
+        provider = config.get("provider", "groq")
+        if provider not in providers:
+            raise ValueError(f"Unknown LLM provider: {provider!r}")
+        members.append(
+            PoolMember(
+                name=config.get("name") or f"{provider}:{config['model']}#{index}",
+                model=providers[provider](config),
+                weight=float(config.get("weight", 1.0)),
+                requests_per_minute=int(config.get("requests_per_minute", 0)),
+                max_concurrency=int(config.get("max_concurrency", 0)),
+            )
+        )
+    return LLMPool(members, cooldown_seconds=cooldown_seconds)
@@ -0,0 +1,133 @@
+"""Category-aware routing of description summaries.
+
+The summary prompts are written for a particular kind of listing (flat
+rentals), so sending every tracked search through them wastes LLM quota on
+answers that mean nothing for, say, phones or cars. `SummaryRouter` maps an
+OLX category path (``nieruchomosci/mieszkania/wynajem``) to one of:
+
+* ``llm:<prompt>`` - rule extractor fast path, then the named LLM prompt
+* ``rules``        - rule extractor only, never the LLM
+* ``none``         - no summary at all; the detail page is not downloaded
+
+Routes are matched on the longest configured path prefix; categories that
+match nothing use the default route. Listings only known by their numeric
+category id (from the search page state) are routed through the category
+path learned from an earlier listing's breadcrumb with the same id.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Optional
+from urllib.parse import urlsplit
+
+from prompts import SUMMARY_PROMPTS
+
+logger = logging.getLogger(__name__)
+
+MODES = ("llm", "rules", "none")
+
+
+@dataclass(frozen=True)
+class Route:
+    mode: str
+    prompt: Optional[str] = None
+
+    @property
+    def uses_llm(self) -> bool:
+        return self.mode == "llm"
+
+    @property
+    def needs_summary(self) -> bool:
+        return self.mode != "none"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Route":
+        """Parse ``"llm:<prompt>"``, ``"rules"`` or ``"none"``."""
+        mode, _, prompt = spec.strip().partition(":")
+        if mode not in MODES:
+            raise ValueError(f"Unknown summary route mode: {spec!r}")
+        if mode == "llm":
+            prompt = prompt or "apartment"
+            if prompt not in SUMMARY_PROMPTS:
+                raise ValueError(f"Unknown summary prompt: {prompt!r}")
+            return cls(mode, prompt)
+        return cls(mode)
+
+    def __str__(self) -> str:
+        return f"{self.mode}:{self.prompt}" if self.prompt else self.mode
+
+
+# Default route for callers that do not route (the original behaviour).
+APARTMENT_ROUTE = Route("llm", "apartment")
+
+
+def category_from_path(path: str) -> str:
+    """Normalise an OLX URL path to its category part, e.g. ``a/b/c``.
+
+    The ``/d/`` prefix of newer URLs and item pages (``oferta``) are dropped.
+    Location segments of search URLs are kept; they only make the path
+    longer and do not affect prefix matching.
+    """
+    segments = [p for p in path.split("/") if p]
+    if segments and segments[0] == "d":
+        segments = segments[1:]
+    if segments and segments[0] == "oferta":
+        return ""
+    return "/".join(segments)
+
+
+def category_from_url(url: str) -> str:
+    return category_from_path(urlsplit(url).path)
+
+
+def category_from_breadcrumb(hrefs: Iterable[str]) -> str:
+    """Most specific category among the breadcrumb links of a listing."""
+    best = ""
+    for href in hrefs:
+        category = category_from_url(href)
+        if len(category) > len(best):
+            best = category
+    return best
+
+
+class SummaryRouter:
+    """Pick the summary route for a listing category."""
+
+    def __init__(self, routes: Mapping[str, str], default: str = "rules") -> None:
+        self.routes: Dict[str, Route] = {
+            category_from_path(category): Route.parse(spec)
+            for category, spec in routes.items()
+        }
+        self.default = Route.parse(default)
+        self.counts: Dict[str, int] = {mode: 0 for mode in MODES}
+        # OLX category id -> category path, learned from breadcrumbs.
+        self.category_ids: Dict[int, str] = {}
+
+    def learn(self, category_id: Optional[int], category: str) -> None:
+        """Remember that listings with *category_id* belong to *category*."""
+        if category_id is not None and category:
+            self.category_ids[category_id] = category
+
+    def category_for_id(self, category_id: Optional[int]) -> Optional[str]:
+        return self.category_ids.get(category_id) if category_id is not None else None
+
+    def match(self, category: str) -> Optional[Route]:
+        """Route of the longest configured prefix of *category*, if any."""
+        segments = category.split("/") if category else []
+        for end in range(len(segments), 0, -1):
+            route = self.routes.get("/".join(segments[:end]))
+            if route is not None:
+                return route
+        return None
+
+    def route(self, category: str) -> Route:
+        route = self.match(category) or self.default
+        self.counts[route.mode] += 1
+        logger.debug("Summary route for %r: %s", category, route)
+        return route
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
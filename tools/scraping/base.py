@@ -1,13 +1,15 @@
 """Abstract base class for all scrapers.
 
 Allows us to plug additional marketplaces in the future simply by
-subclassing `BaseScraper` and implementing the abstract methods.
+subclassing `BaseScraper` and implementing either `iter_new_items` (items
+are handed to the monitor as soon as each one is ready) or the older list
+form `fetch_new_items`; each has a default built on the other.
 """
 
 from __future__ import annotations
 
 import abc
-from typing import List, Set
+from typing import Any, AsyncIterator, Dict, List, Set
 
 from models import Item
 from tools.processing.description import (  # noqa: F401 pylint: disable=cyclic-import
@@ -18,20 +20,85 @@ from tools.processing.description import (  # noqa: F401 pylint: disable=cyclic-
 class BaseScraper(abc.ABC):
     """Interface that every marketplace‐specific scraper must implement."""
 
-    @abc.abstractmethod
-    async def fetch_new_items(
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if (
+            not getattr(cls, "__abstractmethods__", None)
+            and cls.iter_new_items is BaseScraper.iter_new_items
+            and cls.fetch_new_items is BaseScraper.fetch_new_items
+        ):
+            raise TypeError(
+                f"{cls.__name__} must implement iter_new_items or fetch_new_items"
+            )
+
+    async def iter_new_items(
         self,
         url: str,
         existing_urls: Set[str],
         summarizer: "DescriptionSummarizer",
-    ) -> List[Item]:
-        """Return a list of *new* `Item` objects collected from *url*.
+    ) -> AsyncIterator[Item]:
+        """Yield *new* `Item` objects from *url* as soon as each is complete.
 
         Args:
             url: Marketplace search / listing URL.
             existing_urls: A set of already processed item URLs (deduplication).
             summarizer: Helper used to summarise raw item descriptions.
         """
+        for item in await self.fetch_new_items(
+            url=url, existing_urls=existing_urls, summarizer=summarizer
+        ):
+            yield item
+
+    async def fetch_new_items(
+        self,
+        url: str,
+        existing_urls: Set[str],
+        summarizer: "DescriptionSummarizer",
+    ) -> List[Item]:
+        """Return a list of *new* `Item` objects collected from *url*.
+
+        Takes the same arguments as `iter_new_items` and collects its items.
+        """
+        return [
+            item
+            async for item in self.iter_new_items(
+                url=url, existing_urls=existing_urls, summarizer=summarizer
+            )
+        ]
+
+    async def warm_up(self) -> None:
+        """Override to open connections / sessions ahead of the first cycle."""
+        return None
+
+    def start_cycle(self) -> None:
+        """Called by the monitor before each cycle to reset cycle-scoped state."""
+        return None
+
+    def url_completed(self, url: str) -> None:
+        """Called by the monitor once every item yielded for *url* is stored.
+
+        Override to commit per-URL progress (e.g. HTTP validators) only when
+        nothing scraped from the URL can be lost any more.
+        """
+        return None
+
+    @property
+    def concurrency_limit(self) -> int:
+        """How many search URLs the monitor may scrape at once."""
+        return 1
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Counters describing the scraper's work, exposed for logging."""
+        return {}
+
+    def export_state(self) -> Dict[str, Any]:
+        """JSON-serialisable state worth keeping across restarts."""
+        return {}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Load state produced by `export_state`."""
+        return None
 
     async def close(self):  # pragma: no cover
         """Override if the scraper keeps any open connections / sessions."""
@@ -0,0 +1,184 @@
+"""Adaptive (AIMD) concurrency limit for marketplace requests.
+
+`AIMDLimiter` hands out permits up to its current limit. Every full
+window of healthy responses (fast enough, no throttling) raises the limit
+by one; a 403 / 429, a timeout or a captcha page cuts it by a factor.
+Cuts are spaced by a short cooldown so one burst of throttled responses
+counts as a single congestion signal.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+import httpx
+
+from .egress import THROTTLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Markup of bot-protection pages served instead of the requested content.
+CAPTCHA_MARKERS = (
+    "g-recaptcha",
+    "h-captcha",
+    "hcaptcha.com",
+    "px-captcha",
+    "cf-challenge",
+    "challenge-platform",
+    "captcha-delivery.com",
+)
+
+
+def looks_like_captcha(text: str) -> bool:
+    head = text[:20000].lower()
+    return any(marker in head for marker in CAPTCHA_MARKERS)
+
+
+class NoPermitAvailable(Exception):
+    """Raised by a non-waiting `AIMDLimiter.acquire` when the limit is reached."""
+
+
+class Permit:
+    """One in-flight request; report its outcome before releasing it."""
+
+    def __init__(self, limiter: "AIMDLimiter") -> None:
+        self._limiter = limiter
+        self._started = limiter._clock()
+        self.reported = False
+
+    def report(
+        self,
+        status_code: Optional[int] = None,
+        error: Optional[BaseException] = None,
+        captcha: bool = False,
+    ) -> None:
+        if self.reported:
+            return
+        self.reported = True
+        latency = self._limiter._clock() - self._started
+        overloaded = (
+            captcha
+            or status_code in THROTTLE_STATUSES
+            or isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError))
+        )
+        if overloaded:
+            self._limiter._on_overload()
+        elif error is None and (status_code or 200) < 500:
+            self._limiter._on_success(latency)
+        else:
+            self._limiter._on_failure()
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(
+        self,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        decrease_factor: float = 0.5,
+        latency_target: float = 3.0,
+        decrease_cooldown: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+        self._clock = clock
+        self._condition = asyncio.Condition()
+        # Pending wake-ups; the loop only keeps weak references to tasks.
+        self._notifies: Set[asyncio.Task] = set()
+        self.in_flight = 0
+        self._healthy_streak = 0
+        self._last_decrease = float("-inf")
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def has_free_permit(self) -> bool:
+        return self.in_flight < self.limit
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, wait: bool = True) -> AsyncIterator[Permit]:
+        """Take a slot under the current limit, waiting for one by default.
+
+        With ``wait=False`` `NoPermitAvailable` is raised instead of waiting.
+        """
+        async with self._condition:
+            if not wait and not self.has_free_permit:
+                raise NoPermitAvailable()
+            await self._condition.wait_for(lambda: self.has_free_permit)
+            self.in_flight += 1
+        permit = Permit(self)
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            raise
+        except BaseException as exc:
+            permit.report(error=exc)
+            raise
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self._healthy_streak = 0
+            return
+        self._healthy_streak += 1
+        # One step per window of `limit` healthy responses (~ one round trip).
+        if self._healthy_streak >= self.limit and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1)
+            self._healthy_streak = 0
+            self.increases += 1
+            self._wake()
+
+    def _on_failure(self) -> None:
+        self._healthy_streak = 0
+
+    def _on_overload(self) -> None:
+        self._healthy_streak = 0
+        now = self._clock()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self.decreases += 1
+        logger.warning(
+            "Throttling detected; concurrency limit %s -> %s", previous, self.limit
+        )
+
+    def _wake(self) -> None:
+        async def notify():
+            async with self._condition:
+                self._condition.notify_all()
+
+        try:
+            task = asyncio.get_running_loop().create_task(notify())
+        except RuntimeError:
+            return
+        self._notifies.add(task)
+        task.add_done_callback(self._notifies.discard)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
@@ -0,0 +1,225 @@
+"""Pool of egress points (proxies + header profiles) for marketplace requests.
+
+Each egress has its own HTTP client, a per-minute request budget and a
+health state. Requests are sent through the least-loaded healthy egress
+with remaining budget; a 403 / 429 answer (or repeated network errors)
+puts the egress into a cooldown so throttling on one exit point does not
+stall the whole scraper. A pool with a single egress has nowhere else to
+send requests, so it uses a much shorter cooldown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = (403, 429)
+BUDGET_WINDOW_SECONDS = 60.0
+
+# Alternative browser identities rotated over egresses. The first profile is
+# the scraper's own header set.
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15",
+)
+
+
+@dataclass
+class Egress:
+    """One exit point: an optional proxy and the headers sent through it."""
+
+    name: str
+    headers: Dict[str, str]
+    proxy: Optional[str] = None
+    requests_per_minute: int = 60
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    consecutive_failures: int = 0
+    total_requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    sent_at: Deque[float] = field(default_factory=deque)
+
+    def used_budget(self, now: float) -> int:
+        while self.sent_at and now - self.sent_at[0] >= BUDGET_WINDOW_SECONDS:
+            self.sent_at.popleft()
+        return len(self.sent_at)
+
+    def available_at(self, now: float) -> float:
+        """Earliest time this egress may send the next request."""
+        ready = max(now, self.cooldown_until)
+        if self.used_budget(now) >= self.requests_per_minute:
+            ready = max(ready, self.sent_at[0] + BUDGET_WINDOW_SECONDS)
+        return ready
+
+    def load(self, now: float) -> float:
+        return self.in_flight + self.used_budget(now) / max(1, self.requests_per_minute)
+
+
+def header_profiles(base_headers: Dict[str, str]) -> List[Dict[str, str]]:
+    """Return *base_headers* followed by variants with other user agents."""
+    profiles = [dict(base_headers)]
+    for agent in USER_AGENTS:
+        if agent != base_headers.get("User-Agent"):
+            profiles.append({**base_headers, "User-Agent": agent})
+    return profiles
+
+
+def build_egresses(
+    base_headers: Dict[str, str],
+    proxies: Sequence[str] = (),
+    requests_per_minute: int = 60,
+    include_direct: bool = True,
+) -> List[Egress]:
+    """Create one egress per proxy (plus the direct connection).
+
+    Header profiles are assigned round-robin so each exit point presents a
+    stable identity.
+    """
+    profiles = header_profiles(base_headers)
+    endpoints: List[Optional[str]] = ([None] if include_direct else []) + list(proxies)
+    egresses = []
+    for index, proxy in enumerate(endpoints):
+        egresses.append(
+            Egress(
+                name="direct" if proxy is None else f"proxy-{index}",
+                headers=profiles[index % len(profiles)],
+                proxy=proxy,
+                requests_per_minute=requests_per_minute,
+            )
+        )
+    return egresses
+
+
+class EgressPool:
+    """Select egresses for requests and track their budget and health."""
+
+    def __init__(
+        self,
+        egresses: Sequence[Egress],
+        client_factory: Optional[Callable[[Egress], httpx.AsyncClient]] = None,
+        cooldown_seconds: float = 300.0,
+        failure_threshold: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+        sole_cooldown_seconds: float = 30.0,
+    ) -> None:
+        if not egresses:
+            raise ValueError("EgressPool needs at least one egress")
+        self.egresses = list(egresses)
+        self._client_factory = client_factory or self._default_client
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.cooldown_seconds = cooldown_seconds
+        if len(self.egresses) == 1:
+            # Cooling the only egress down pauses all scraping.
+            self.cooldown_seconds = min(cooldown_seconds, sole_cooldown_seconds)
+        self.failure_threshold = failure_threshold
+        self._clock = clock
+
+    @staticmethod
+    def _default_client(egress: Egress) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=egress.headers,
+            proxy=egress.proxy,
+            timeout=10,
+            follow_redirects=True,
+        )
+
+    def client(self, egress: Egress) -> httpx.AsyncClient:
+        if egress.name not in self._clients:
+            self._clients[egress.name] = self._client_factory(egress)
+        return self._clients[egress.name]
+
+    def _pick(self, now: float) -> Optional[Egress]:
+        ready = [e for e in self.egresses if e.available_at(now) <= now]
+        if not ready:
+            return None
+        return min(ready, key=lambda e: e.load(now))
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Egress]:
+        """Reserve the least-loaded healthy egress, waiting if none is ready."""
+        while True:
+            now = self._clock()
+            egress = self._pick(now)
+            if egress is not None:
+                break
+            wait = min(e.available_at(now) for e in self.egresses) - now
+            logger.warning("All egresses throttled; waiting %.1fs", wait)
+            await asyncio.sleep(max(wait, 0.05))
+
+        egress.in_flight += 1
+        egress.total_requests += 1
+        egress.sent_at.append(now)
+        try:
+            yield egress
+        finally:
+            egress.in_flight -= 1
+
+    def report(
+        self,
+        egress: Egress,
+        status_code: Optional[int] = None,
+        error: Optional[BaseException] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Record the outcome of a request sent through *egress*."""
+        now = self._clock()
+        if error is not None:
+            egress.errors += 1
+            egress.consecutive_failures += 1
+            if egress.consecutive_failures >= self.failure_threshold:
+                self._cool_down(egress, now, self.cooldown_seconds, "network errors")
+            return
+        if status_code in THROTTLE_STATUSES:
+            egress.throttled += 1
+            egress.consecutive_failures += 1
+            cooldown = self.cooldown_seconds
+            if retry_after and str(retry_after).isdigit():
+                cooldown = max(cooldown, float(retry_after))
+            self._cool_down(egress, now, cooldown, f"HTTP {status_code}")
+            return
+        egress.consecutive_failures = 0
+
+    def _cool_down(self, egress: Egress, now: float, seconds: float, reason: str):
+        egress.cooldown_until = now + seconds
+        logger.warning(
+            "Egress %s cooling down for %.0fs after %s", egress.name, seconds, reason
+        )
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        now = self._clock()
+        return {
+            e.name: {
+                "healthy": e.cooldown_until <= now,
+                "in_flight": e.in_flight,
+                "used_budget": e.used_budget(now),
+                "requests": e.total_requests,
+                "throttled": e.throttled,
+                "errors": e.errors,
+            }
+            for e in self.egresses
+        }
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
@@ -0,0 +1,140 @@
+"""Recognition of re-posted listings from search card data.
+
+Sellers often delete an ad and post it again under a new URL, so it looks
+new to the URL-based dedup. A fingerprint of what the card shows - the
+normalised title, price and location plus the photo's CDN file id - stays
+the same across such reposts. `FingerprintIndex` remembers the description
+and summary produced for recent fingerprints so a repost can reuse them
+instead of downloading the detail page and calling the LLM again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from models import DescriptionSummary
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_CDN_FILE_ID = re.compile(r"/v1/files/([^/;?]+)")
+
+
+def _normalise(text: Optional[str]) -> str:
+    """Lower-case ASCII words: ``"Mieszkanie, 2 pokoje!"`` -> ``mieszkanie 2 pokoje``."""
+    text = unicodedata.normalize("NFKD", (text or "").replace("ł", "l").lower())
+    text = text.encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def image_key(image_url: Optional[str]) -> str:
+    """Stable id of a listing photo, independent of the requested size."""
+    if not image_url:
+        return ""
+    match = _CDN_FILE_ID.search(image_url)
+    if match:
+        return match.group(1)
+    parts = urlsplit(image_url)
+    return hashlib.sha1(f"{parts.netloc}{parts.path}".encode()).hexdigest()[:16]
+
+
+def listing_fingerprint(
+    title: str, price: str, location: str, image_url: Optional[str]
+) -> Optional[str]:
+    """Fingerprint of a search card, or None if it has too little to go on."""
+    title_key = _normalise(title)
+    if not title_key:
+        return None
+    parts = (
+        title_key,
+        re.sub(r"\D", "", price or ""),
+        _normalise(location),
+        image_key(image_url),
+    )
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class FingerprintEntry:
+    item_url: str
+    description: str
+    image_url: str
+    summary: Optional[DescriptionSummary] = None
+    seen_at: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["summary"] = self.summary.model_dump() if self.summary else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FingerprintEntry":
+        data = dict(data)
+        if data.get("summary") is not None:
+            data["summary"] = DescriptionSummary.repair(data["summary"])
+        return cls(**data)
+
+
+class FingerprintIndex:
+    """Bounded, expiring map of listing fingerprints to processed details."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, FingerprintEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, fingerprint: Optional[str]) -> Optional[FingerprintEntry]:
+        if fingerprint is None:
+            return None
+        entry = self._entries.get(fingerprint)
+        if entry is not None and self._clock() - entry.seen_at > self.ttl_seconds:
+            del self._entries[fingerprint]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def add(self, fingerprint: Optional[str], entry: FingerprintEntry) -> None:
+        if fingerprint is None or self.max_entries <= 0:
+            return
+        entry.seen_at = entry.seen_at or self._clock()
+        self._entries[fingerprint] = entry
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def export_state(self) -> Dict[str, Any]:
+        return {fp: entry.as_dict() for fp, entry in self._entries.items()}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self._entries.clear()
+        for fingerprint, data in state.items():
+            try:
+                self.add(fingerprint, FingerprintEntry.from_dict(data))
+            except (TypeError, ValueError) as exc:
+                logger.debug("Dropping unreadable fingerprint entry: %s", exc)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,182 @@
+"""Hedged requests against slow-tail responses.
+
+`Hedger.run` starts a request and, if it has not finished after the
+observed latency percentile (e.g. p95 of recent requests), starts a second
+identical request; whichever succeeds first wins and the other is
+cancelled. The share of hedged requests is capped so a slow backend does
+not double the load.
+
+The hedged callable receives an `Attempt`: it tells a backup from the
+primary (a backup should not queue for resources its primary holds) and
+marks, with ``attempt.timed()``, the part of the call whose latency is
+tracked - the request itself, not the wait for a permit or an egress. An
+attempt cancelled mid-request (a slow loser) still adds its elapsed time,
+as a lower bound, so the slowest requests are not left out of the window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+class Attempt:
+    """One call made by `Hedger.run`: the primary or its backup."""
+
+    def __init__(self, hedger: Optional["Hedger"] = None, backup: bool = False):
+        self._hedger = hedger
+        self.backup = backup
+
+    @contextlib.contextmanager
+    def timed(self) -> Iterator[None]:
+        """Record the latency of the enclosed block unless it fails.
+
+        A cancelled block records the time it ran for; the real latency
+        was at least that.
+        """
+        if self._hedger is None:
+            yield
+            return
+        started = self._hedger._clock()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self._hedger.latencies.add(self._hedger._clock() - started)
+            raise
+        self._hedger.latencies.add(self._hedger._clock() - started)
+
+
+class Hedger:
+    """Send a backup request when the first one is slower than usual."""
+
+    def __init__(
+        self,
+        name: str = "",
+        percentile: float = 0.95,
+        min_delay: float = 0.25,
+        max_delay: float = 5.0,
+        max_hedge_ratio: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self._clock = clock
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.skipped = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while still learning."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        threshold = self.latencies.percentile(self.percentile)
+        return min(self.max_delay, max(self.min_delay, threshold))
+
+    def _may_hedge(self) -> bool:
+        return self.hedged + 1 <= self.max_hedge_ratio * self.requests
+
+    async def run(
+        self,
+        fn: Callable[[Attempt], Awaitable[T]],
+        can_hedge: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """Await ``fn(attempt)``, racing it against a backup if it is slow.
+
+        *can_hedge* is asked right before a backup would start; when it
+        says no (e.g. no free request permit) the primary is awaited alone.
+        """
+        self.requests += 1
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(fn(Attempt(self)))
+        tasks = [primary]
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._may_hedge():
+                return await primary
+            if can_hedge is not None and not can_hedge():
+                self.skipped += 1
+                return await primary
+
+            self.hedged += 1
+            logger.debug("Hedging %s request after %.2fs", self.name, delay)
+            backup = asyncio.ensure_future(fn(Attempt(self, backup=True)))
+            tasks.append(backup)
+            pending = {primary, backup}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is backup:
+                        self.hedge_wins += 1
+                    else:
+                        self.primary_wins += 1
+                    return task.result()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled (cycle deadline,
+            # shutdown): no attempt may outlive it holding a permit.
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        delay = self.hedge_delay()
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "skipped": self.skipped,
+            "hedge_win_rate": (
+                round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0
+            ),
+            "delay": round(delay, 3) if delay is not None else None,
+        }
@@ -0,0 +1,113 @@
+"""Derivation of high-resolution image URLs from search card thumbnails.
+
+OLX and Otodom serve photos from the same CDN and encode the requested size
+in the URL (``.../image;s=216x152``). Rewriting the size parameter gives the
+largest variant the detail page would offer, without downloading the page.
+Each rewrite pattern is verified with a HEAD request the first time it is
+used (and again after ``verify_ttl``); a pattern that fails verification is
+not applied until it is re-verified.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImagePattern:
+    """A CDN URL shape and how to turn it into its largest variant."""
+
+    name: str
+    regex: re.Pattern
+    template: str
+
+    def rewrite(self, url: str) -> Optional[str]:
+        match = self.regex.match(url)
+        return match.expand(self.template) if match else None
+
+
+# Sizes match the largest `srcset` candidates served on detail pages.
+DEFAULT_PATTERNS: List[ImagePattern] = [
+    ImagePattern(
+        name="olx-apollo",
+        regex=re.compile(
+            r"^(https?://[^/]*apollo\.olx\.pl(?::\d+)?/v1/files/[^/;?]+/image)"
+            r"(?:;s=(?:\d+|\{width\})x(?:\d+|\{height\}))?(?:;q=\d+)?(?:\?.*)?$"
+        ),
+        template=r"\1;s=1000x700",
+    ),
+    ImagePattern(
+        name="otodom-apollo",
+        regex=re.compile(
+            r"^(https?://[^/]*apollo\.otodom\.pl(?::\d+)?/v1/files/[^/;?]+/image)"
+            r"(?:;s=\d+x\d+)?(?:;q=\d+)?(?:\?.*)?$"
+        ),
+        template=r"\1;s=1280x1024;q=80",
+    ),
+]
+
+
+class ImageUrlResolver:
+    """Rewrite thumbnail URLs into their highest-resolution variant."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        patterns: Optional[List[ImagePattern]] = None,
+        verify: bool = True,
+        verify_ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.client = client
+        self.patterns = patterns if patterns is not None else DEFAULT_PATTERNS
+        self.verify = verify and client is not None
+        self.verify_ttl = verify_ttl
+        self._clock = clock
+        # pattern name -> (verdict, checked_at)
+        self._verified: Dict[str, Tuple[bool, float]] = {}
+        self.rewritten = 0
+        self.verifications = 0
+
+    def rewrite(self, url: str) -> Tuple[Optional[ImagePattern], str]:
+        """Return the matching pattern and rewritten URL (or the original)."""
+        for pattern in self.patterns:
+            candidate = pattern.rewrite(url or "")
+            if candidate:
+                return pattern, candidate
+        return None, url
+
+    async def resolve(self, url: str) -> str:
+        """Return the high-resolution variant of *url* when it is known to work."""
+        pattern, candidate = self.rewrite(url)
+        if pattern is None or candidate == url:
+            return url
+        if self.verify and not await self._pattern_ok(pattern, candidate):
+            return url
+        self.rewritten += 1
+        return candidate
+
+    async def _pattern_ok(self, pattern: ImagePattern, candidate: str) -> bool:
+        cached = self._verified.get(pattern.name)
+        if cached is not None and self._clock() - cached[1] < self.verify_ttl:
+            return cached[0]
+        self.verifications += 1
+        try:
+            response = await self.client.head(candidate)
+        except Exception as exc:
+            # Transient failure: do not cache a verdict, try again next time.
+            logger.debug("Image URL verification failed for %s: %s", candidate, exc)
+            return False
+        content_type = response.headers.get("content-type", "")
+        ok = response.status_code == 200 and content_type.startswith("image/")
+        if not ok:
+            logger.warning("Image pattern %s failed verification", pattern.name)
+        self._verified[pattern.name] = (ok, self._clock())
+        return ok
@@ -2,23 +2,52 @@
 
 from __future__ import annotations
 
+import contextlib
 import logging
 import re
 from datetime import datetime
-from typing import List, Set
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import httpx
 import pytz
 from bs4 import BeautifulSoup
 
+from core.config import settings
 from models import Item
 from tools.processing.description import DescriptionSummarizer
+from tools.processing.routing import (
+    Route,
+    SummaryRouter,
+    category_from_breadcrumb,
+    category_from_url,
+)
+from tools.utils.single_flight import SingleFlight
 from tools.utils.time_helpers import TimeUtils
+from tools.utils.urls import canonicalize_item_url
 
 from .base import BaseScraper
+from .concurrency import AIMDLimiter, Permit, looks_like_captcha
+from .egress import Egress, EgressPool, build_egresses
+from .fingerprint import FingerprintEntry, FingerprintIndex, listing_fingerprint
+from .hedging import Attempt, Hedger
+from .images import ImageUrlResolver
+from .olx_state import OlxAd, extract_state, parse_detail_ad, parse_search_ads
+from .streaming import DetailPageScanner
 
 logger = logging.getLogger(__name__)
 
+DETAIL_ERROR_PREFIX = "Failed to load description"
+
 
 class OLXScraper(BaseScraper):
     """OLX marketplace scraper.
@@ -38,26 +67,384 @@ class OLXScraper(BaseScraper):
     }
 
     def __init__(self) -> None:
-        self.client = httpx.AsyncClient(
-            headers=self.HEADERS, timeout=10, follow_redirects=True
+        self._client: Optional[httpx.AsyncClient] = None
+        self._images: Optional[ImageUrlResolver] = None
+        self.egress = EgressPool(
+            build_egresses(
+                self.HEADERS,
+                proxies=settings.OLX_PROXIES,
+                requests_per_minute=settings.OLX_EGRESS_REQUESTS_PER_MINUTE,
+                include_direct=settings.OLX_EGRESS_INCLUDE_DIRECT
+                or not settings.OLX_PROXIES,
+            ),
+            client_factory=self._egress_client,
+            cooldown_seconds=settings.OLX_EGRESS_COOLDOWN_SECONDS,
+            sole_cooldown_seconds=settings.OLX_EGRESS_SOLE_COOLDOWN_SECONDS,
+        )
+        # Listings shared by overlapping searches are fetched and summarised
+        # once per cycle, keyed by canonical item URL.
+        self.detail_flight = SingleFlight()
+        # Details of recently processed listings by card fingerprint, reused
+        # when a seller re-posts the same ad under a new URL.
+        self.fingerprints: Optional[FingerprintIndex] = None
+        if settings.REPOST_FINGERPRINT_ENABLED:
+            self.fingerprints = FingerprintIndex(
+                ttl_seconds=settings.REPOST_FINGERPRINT_TTL_HOURS * 3600,
+                max_entries=settings.REPOST_FINGERPRINT_MAX_ENTRIES,
+            )
+        # Which summary (LLM prompt, rules or none) each category gets.
+        self.router = SummaryRouter(
+            settings.SUMMARY_ROUTES, default=settings.SUMMARY_ROUTE_DEFAULT
+        )
+        # Shared by every OLX request and used by the monitor to size its
+        # pool of URL workers.
+        self.limiter = AIMDLimiter(
+            initial=settings.OLX_CONCURRENCY_INITIAL,
+            max_limit=settings.OLX_CONCURRENCY_MAX,
+            latency_target=settings.OLX_CONCURRENCY_LATENCY_TARGET_SECONDS,
+        )
+        # Backup requests for slow responses; search and detail pages have
+        # different latency profiles so each gets its own tracker.
+        self.hedgers: Dict[str, Hedger] = {}
+        if settings.OLX_HEDGING_ENABLED:
+            self.hedgers = {
+                kind: Hedger(
+                    name=kind,
+                    percentile=settings.OLX_HEDGE_PERCENTILE,
+                    min_delay=settings.OLX_HEDGE_MIN_DELAY_SECONDS,
+                    max_hedge_ratio=settings.OLX_HEDGE_MAX_RATIO,
+                )
+                for kind in ("search", "detail")
+            }
+        # Search URL -> ETag / Last-Modified of its last 200 response, sent
+        # back as conditional headers so unchanged pages come back as 304.
+        # Validators of a fresh response are staged until the monitor
+        # reports every item of the page stored (`url_completed`).
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self._pending_validators: Dict[str, Dict[str, str]] = {}
+        self.detail_transfer = {
+            "pages": 0,
+            "closed_early": 0,
+            "bytes_read": 0,
+            "bytes_saved": 0,
+            # Pages closed early whose full size was not announced.
+            "bytes_saved_unknown": 0,
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for OLX, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.HEADERS, timeout=10, follow_redirects=True
+            )
+        return self._client
+
+    def _egress_client(self, egress: Egress) -> httpx.AsyncClient:
+        """The direct egress reuses the scraper's own session."""
+        if egress.proxy is None:
+            return self.client
+        return EgressPool._default_client(egress)
+
+    async def _hedged(self, kind: str, fn: Callable[[Attempt], Awaitable[Any]]):
+        hedger = self.hedgers.get(kind)
+        if hedger is None:
+            return await fn(Attempt())
+        # A backup only runs when a permit is free right away; it must not
+        # queue behind the permit held by its own primary.
+        return await hedger.run(fn, can_hedge=lambda: self.limiter.has_free_permit)
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, attempt: Attempt) -> AsyncIterator[Tuple[Egress, Permit]]:
+        """Reserve an egress, then a concurrency permit, for one request.
+
+        The egress comes first so that waiting out an egress cooldown does
+        not hold a permit other requests could use.
+        """
+        async with self.egress.acquire() as egress, self.limiter.acquire(
+            wait=not attempt.backup
+        ) as permit:
+            yield egress, permit
+
+    async def _get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET *url*, hedged with a second request when it is slow."""
+        return await self._hedged(
+            "search", lambda attempt: self._get_once(url, headers, attempt)
         )
 
-    async def fetch_new_items(
+    async def _get_once(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        attempt: Optional[Attempt] = None,
+    ) -> httpx.Response:
+        """GET *url* through the least-loaded healthy egress."""
+        attempt = attempt or Attempt()
+        async with self._slot(attempt) as (egress, permit):
+            try:
+                with attempt.timed():
+                    response = await self.egress.client(egress).get(
+                        url, headers=headers
+                    )
+            except Exception as exc:
+                self.egress.report(egress, error=exc)
+                permit.report(error=exc)
+                raise
+            self.egress.report(
+                egress,
+                status_code=response.status_code,
+                retry_after=response.headers.get("retry-after"),
+            )
+            captcha = looks_like_captcha(response.text)
+            if captcha:
+                logger.warning("Captcha page served for %s", url)
+            permit.report(status_code=response.status_code, captcha=captcha)
+            return response
+
+    @property
+    def images(self) -> ImageUrlResolver:
+        """Resolver deriving high-resolution photo URLs from thumbnails."""
+        if self._images is None:
+            self._images = ImageUrlResolver(
+                client=self.client, verify=settings.IMAGE_URL_VERIFY
+            )
+        return self._images
+
+    @property
+    def concurrency_limit(self) -> int:
+        return self.limiter.limit
+
+    async def warm_up(self) -> None:
+        _ = self.client
+
+    def start_cycle(self) -> None:
+        self.detail_flight.reset()
+
+    def _conditional_headers(self, url: str) -> Optional[Dict[str, str]]:
+        validator = self.validators.get(url)
+        if not validator:
+            return None
+        headers = {}
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+        return headers or None
+
+    def _remember_validators(self, url: str, response: httpx.Response) -> None:
+        validator = {
+            key: value
+            for key, value in (
+                ("etag", response.headers.get("etag")),
+                ("last_modified", response.headers.get("last-modified")),
+            )
+            if isinstance(value, str)
+        }
+        self._pending_validators[url] = validator
+
+    def url_completed(self, url: str) -> None:
+        validator = self._pending_validators.pop(url, None)
+        if validator is None:
+            return
+        if validator:
+            self.validators[url] = validator
+        else:
+            self.validators.pop(url, None)
+
+    def export_state(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = {"validators": dict(self.validators)}
+        if self.fingerprints is not None:
+            state["fingerprints"] = self.fingerprints.export_state()
+        return state
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.validators = dict(state.get("validators", {}))
+        if self.fingerprints is not None:
+            self.fingerprints.restore_state(state.get("fingerprints", {}))
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "details": self.detail_flight.stats,
+            "egress": self.egress.stats,
+            "detail_transfer": dict(self.detail_transfer),
+            "hedging": {kind: h.stats for kind, h in self.hedgers.items()},
+            "concurrency": self.limiter.stats,
+            "summary_routes": self.router.stats,
+            "reposts": self.fingerprints.stats if self.fingerprints else {},
+            # Read without creating the resolver (and its HTTP client).
+            "images": {
+                "rewritten": self._images.rewritten if self._images else 0,
+                "verifications": self._images.verifications if self._images else 0,
+            },
+        }
+
+    async def iter_new_items(
         self,
         url: str,
         existing_urls: Set[str],
         summarizer: DescriptionSummarizer,
-    ) -> List[Item]:
+    ) -> AsyncIterator[Item]:
         logger.info("Fetching OLX items from %s", url)
+        self._pending_validators.pop(url, None)
 
-        response = await self.client.get(url)
+        response = await self._get(url, headers=self._conditional_headers(url))
         logger.debug("OLX response status code: %s", response.status_code)
-        soup = BeautifulSoup(response.text, "html.parser")
-        divs = soup.find_all("div", attrs={"data-testid": "l-card"})
-
-        new_items: List[Item] = []
+        if response.status_code == 304:
+            logger.info("OLX search page %s not modified", url)
+            return
+        self._remember_validators(url, response)
+
+        state = extract_state(response.text)
+        if state is not None:
+            ads = self._ads_from_state(state)
+        else:
+            logger.debug("No embedded state on %s, falling back to HTML cards", url)
+            soup = BeautifulSoup(response.text, "html.parser")
+            try:
+                ads = self._ads_from_html(soup)
+            finally:
+                # Break the tree's reference cycles so it is freed right away.
+                soup.decompose()
+        del response
+
+        # Category searches are routed once; listings of uncategorised
+        # searches are routed by the breadcrumb of their detail page.
+        category = category_from_url(url)
+        search_routed = self.router.match(category) is not None
+
+        new_count = 0
         skipped_count = 0
-        for div in divs:
+        for ad in ads:
+            if ad.url in existing_urls:
+                skipped_count += 1
+                continue
+
+            summary = None
+            fingerprint = repost = None
+            failed = False
+            if self.fingerprints is not None:
+                fingerprint = listing_fingerprint(
+                    ad.title, ad.price, ad.location, ad.image_url
+                )
+                repost = self.fingerprints.lookup(fingerprint)
+                if repost is not None and repost.item_url == ad.url:
+                    repost = None
+            route = self.router.route(category) if search_routed else None
+            if repost is not None:
+                logger.info("Listing %s is a re-post of %s", ad.url, repost.item_url)
+                description, image_url, summary = (
+                    repost.description,
+                    repost.image_url,
+                    repost.summary,
+                )
+            elif route is None or route.needs_summary:
+                # Failures propagate out of the shared call, so they are not
+                # memoised for the cycle; they become text only here.
+                try:
+                    description, image_url, summary = await self.detail_flight.do(
+                        ad.url,
+                        lambda ad=ad, route=route: self._listing_details(
+                            ad, summarizer, route
+                        ),
+                    )
+                except Exception as exc:
+                    logger.error("Failed to load details for %s: %s", ad.url, exc)
+                    description, image_url, summary = (
+                        f"{DETAIL_ERROR_PREFIX}: {exc}",
+                        "",
+                        None,
+                    )
+                    failed = True
+            else:
+                description = ad.description[:500]
+                image_url = await self.images.resolve(ad.image_url)
+
+            if ad.created_at is not None:
+                created_at, created_at_pretty = self._format_times(ad.created_at)
+            else:
+                created_at, created_at_pretty = self._parse_times(ad.time_str)
+
+            item = Item(
+                title=ad.title,
+                price=ad.price,
+                location=ad.location,
+                created_at=created_at,
+                created_at_pretty=created_at_pretty,
+                image_url=image_url,
+                item_url=ad.url,
+                description=description,
+                ad_id=ad.ad_id,
+                summary=summary,
+                repost_of=repost.item_url if repost is not None else None,
+            )
+            if failed:
+                # Keep the old validators so the page is not skipped as
+                # unchanged before this listing could be processed.
+                self._pending_validators.pop(url, None)
+            if self.fingerprints is not None and repost is None and not failed:
+                self.fingerprints.add(
+                    fingerprint,
+                    FingerprintEntry(ad.url, description, image_url, summary),
+                )
+            new_count += 1
+            yield item
+
+        logger.info(
+            "OLX scraper found %s new items, skipped %s existing",
+            new_count,
+            skipped_count,
+        )
+
+    async def _listing_details(
+        self,
+        ad: OlxAd,
+        summarizer: DescriptionSummarizer,
+        route: Optional[Route] = None,
+    ):
+        """Return (description, image_url, summary) for *ad*.
+
+        The detail page is only fetched when the search state did not carry
+        the description, or when there is no *route* and the ad's category
+        id has not been seen before: the listing's breadcrumb then decides
+        the route and teaches the router the id.
+        """
+        if route is None:
+            category = self.router.category_for_id(ad.category_id)
+            if category is not None:
+                route = self.router.route(category)
+        if ad.description and route is not None:
+            # The embedded state already carries the full description and
+            # photo list, so the detail page does not need to be fetched.
+            summary = await summarizer.summarize_structured(ad.description, route)
+            description = summary.to_text() if summary else ad.description[:500]
+            return description, ad.image_url, summary
+
+        description, highres, summary = await self._fetch_item_details(
+            ad.url, summarizer, route, category_id=ad.category_id
+        )
+        highres = highres or await self.images.resolve(ad.image_url)
+        return description, highres, summary
+
+    @staticmethod
+    def _ads_from_state(state: dict) -> List[OlxAd]:
+        """Return recent ads from the embedded search page state."""
+        ads = []
+        for ad in parse_search_ads(state):
+            if ad.created_at is None or not TimeUtils.is_recent(ad.created_at):
+                logger.debug("Skipping old item %s (%s)", ad.url, ad.created_at)
+                continue
+            ad.url = canonicalize_item_url(ad.url)
+            ads.append(ad)
+        return ads
+
+    @staticmethod
+    def _ads_from_html(soup: BeautifulSoup) -> List[OlxAd]:
+        """Return recent ads by walking the `l-card` elements of the page."""
+        ads = []
+        for div in soup.find_all("div", attrs={"data-testid": "l-card"}):
             location_date = div.find(
                 "p", attrs={"data-testid": "location-date"}
             ).get_text(strip=True)
@@ -74,67 +461,121 @@ class OLXScraper(BaseScraper):
 
             title_div = div.find("div", attrs={"data-cy": "ad-card-title"})
             a_tag = title_div.find("a")
-            item_url = a_tag["href"]
-            if not item_url.startswith("http"):
-                item_url = "https://www.olx.pl" + item_url
-
-            if item_url in existing_urls:
-                skipped_count += 1
-                continue
-
-            title = a_tag.get_text(strip=True)
+            item_url = canonicalize_item_url(a_tag["href"])
 
             price_div = div.find("p", attrs={"data-testid": "ad-price"})
-            price = price_div.get_text(strip=True) if price_div else "Brak ceny"
-
             image_div = div.find("div", attrs={"data-testid": "image-container"})
-            image_url = image_div.find("img")["src"] if image_div else ""
-
-            description, highres = await self._fetch_item_details(item_url, summarizer)
-            if highres:
-                image_url = highres
-
-            created_at, created_at_pretty = self._parse_times(time_str)
 
-            new_items.append(
-                Item(
-                    title=title,
-                    price=price,
+            ads.append(
+                OlxAd(
+                    url=item_url,
+                    title=a_tag.get_text(strip=True),
+                    price=price_div.get_text(strip=True) if price_div else "Brak ceny",
                     location=location,
-                    created_at=created_at,
-                    created_at_pretty=created_at_pretty,
-                    image_url=image_url,
-                    item_url=item_url,
-                    description=description,
+                    photos=[image_div.find("img")["src"]] if image_div else [],
+                    time_str=time_str,
                 )
             )
-
-        logger.info(
-            "OLX scraper found %s new items, skipped %s existing",
-            len(new_items),
-            skipped_count,
-        )
-        return new_items
+        return ads
 
     async def _fetch_item_details(
-        self, item_url: str, summarizer: DescriptionSummarizer
+        self,
+        item_url: str,
+        summarizer: DescriptionSummarizer,
+        route: Optional[Route] = None,
+        category_id: Optional[int] = None,
     ):
-        if "otodom" in item_url:
-            return "Otodom link will be implemented soon", ""
-
-        try:
-            response = await self.client.get(item_url)
-            soup = BeautifulSoup(response.text, "html.parser")
+        """Return (description, image_url, summary) read from the detail page.
 
+        Errors are raised to the caller rather than turned into text.
+        """
+        if "otodom" in item_url:
+            return "Otodom link will be implemented soon", "", None
+
+        scanner = await self._scan_detail_page(item_url)
+
+        ad = None
+        state = extract_state(scanner.state_script or "")
+        if state is not None:
+            ad = parse_detail_ad(state)
+        if ad is not None and ad.description:
+            raw_desc, highres = ad.description, ad.image_url
+        else:
+            soup = BeautifulSoup(scanner.html, "html.parser")
             raw_desc = self._extract_description(soup)
-            summary = await summarizer.summarize(raw_desc)
-            description = summary or raw_desc[:500]
-
             highres = self._extract_highres_image(soup)
-            return description, highres
-        except Exception as exc:  # pragma: no cover
-            logger.error("Failed to load details for %s: %s", item_url, exc)
-            return f"Failed to load description: {exc}", ""
+            soup.decompose()
+
+        if route is None:
+            category = category_from_breadcrumb(scanner.breadcrumbs)
+            self.router.learn(category_id, category)
+            route = self.router.route(category)
+        summary = await summarizer.summarize_structured(raw_desc, route)
+        description = summary.to_text() if summary else raw_desc[:500]
+        return description, highres, summary
+
+    async def _scan_detail_page(self, item_url: str) -> DetailPageScanner:
+        return await self._hedged(
+            "detail", lambda attempt: self._scan_detail_page_once(item_url, attempt)
+        )
+
+    async def _scan_detail_page_once(
+        self, item_url: str, attempt: Optional[Attempt] = None
+    ) -> DetailPageScanner:
+        """Stream a detail page and stop once the needed fragments are in.
+
+        The connection is closed as soon as the description block and first
+        gallery image (or the embedded state) have arrived; the bytes left
+        unread are recorded in `detail_transfer` when the response announced
+        its length.
+        """
+        attempt = attempt or Attempt()
+        scanner = DetailPageScanner()
+        async with self._slot(attempt) as (egress, permit):
+            client = self.egress.client(egress)
+            try:
+                with attempt.timed():
+                    async with client.stream("GET", item_url) as response:
+                        self.egress.report(
+                            egress,
+                            status_code=response.status_code,
+                            retry_after=response.headers.get("retry-after"),
+                        )
+                        captcha = closed_early = False
+                        async for chunk in response.aiter_text():
+                            if not scanner.chars_seen and looks_like_captcha(chunk):
+                                captcha = True
+                            if scanner.feed(chunk):
+                                closed_early = True
+                                break
+                        bytes_read = response.num_bytes_downloaded
+                        length = response.headers.get("content-length")
+            except Exception as exc:
+                self.egress.report(egress, error=exc)
+                permit.report(error=exc)
+                raise
+            permit.report(status_code=response.status_code, captcha=captcha)
+
+        transfer = self.detail_transfer
+        transfer["pages"] += 1
+        transfer["bytes_read"] += bytes_read
+        # Without a Content-Length (e.g. chunked responses) the size of the
+        # unread rest is unknown.
+        saved = None
+        if closed_early:
+            transfer["closed_early"] += 1
+            if length is not None and length.isdigit():
+                saved = max(0, int(length) - bytes_read)
+                transfer["bytes_saved"] += saved
+            else:
+                transfer["bytes_saved_unknown"] += 1
+        logger.debug(
+            "Detail page %s: read %s bytes, saved %s bytes",
+            item_url,
+            bytes_read,
+            "unknown" if closed_early and saved is None else saved or 0,
+        )
+        return scanner
 
     @staticmethod
     def _extract_highres_image(soup: BeautifulSoup) -> str:
@@ -179,12 +620,20 @@ class OLXScraper(BaseScraper):
         datetime_provided_utc = utc_tz.localize(
             datetime.combine(now_utc.date(), parsed_time)
         )
+        return OLXScraper._format_times(datetime_provided_utc)
+
+    @staticmethod
+    def _format_times(timestamp: datetime):
+        """Return (naive Warsaw datetime, pretty string) for an aware *timestamp*."""
         poland_tz = pytz.timezone("Europe/Warsaw")
-        datetime_provided_pl = datetime_provided_utc.astimezone(poland_tz)
+        datetime_provided_pl = timestamp.astimezone(poland_tz)
         datetime_naive_pl = datetime_provided_pl.replace(tzinfo=None)
         created_at_pretty = datetime_provided_pl.strftime("%d.%m.%Y - *%H:%M*")
         return datetime_naive_pl, created_at_pretty
 
     async def close(self):
-        await self.client.aclose()
+        await self.egress.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         await super().close()
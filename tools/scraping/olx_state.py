@@ -0,0 +1,149 @@
+"""Extraction of the JSON state OLX embeds into its server-rendered pages.
+
+Both search result pages and item detail pages carry the full listing data
+as ``window.__PRERENDERED_STATE__ = "<json encoded as a JS string>";``.
+Decoding that blob is a lot cheaper than building a DOM for the page and
+gives us exact timestamps instead of the ``Dzisiaj o HH:MM`` card label.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+STATE_MARKER = "window.__PRERENDERED_STATE__"
+
+_STATE_ASSIGNMENT = re.compile(r"window\.__PRERENDERED_STATE__\s*=\s*")
+_TAG = re.compile(r"<[^>]+>")
+_BREAK = re.compile(r"<br\s*/?>|</p>", re.IGNORECASE)
+_PHOTO_SIZE = {"{width}": "1000", "{height}": "700"}
+
+
+@dataclass
+class OlxAd:
+    """Listing data read either from the embedded state or from a card."""
+
+    url: str
+    title: str
+    price: str = "Brak ceny"
+    location: str = ""
+    created_at: Optional[datetime] = None
+    description: str = ""
+    photos: List[str] = field(default_factory=list)
+    ad_id: Optional[int] = None
+    category_id: Optional[int] = None
+    # Raw "HH:MM" label, only set for cards parsed from HTML.
+    time_str: Optional[str] = None
+
+    @property
+    def image_url(self) -> str:
+        return self.photos[0] if self.photos else ""
+
+
+def extract_state(page: str) -> Optional[Dict[str, Any]]:
+    """Return the decoded prerendered state of an OLX page, if present."""
+    if not page or STATE_MARKER not in page:
+        return None
+    match = _STATE_ASSIGNMENT.search(page)
+    if not match:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(page, match.end())
+        # The state is usually a JSON document serialised into a JS string.
+        if isinstance(value, str):
+            value = json.loads(value)
+    except ValueError as exc:
+        logger.warning("Failed decoding OLX prerendered state: %s", exc)
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp from the state into an aware UTC datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = pytz.UTC.localize(parsed)
+    return parsed.astimezone(pytz.UTC)
+
+
+def html_to_text(value: str) -> str:
+    """Flatten the HTML description stored in the state into plain text."""
+    text = _BREAK.sub("\n", value or "")
+    text = html.unescape(_TAG.sub("", text))
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def _photo_url(photo: Any) -> str:
+    url = photo.get("link") or photo.get("url") if isinstance(photo, dict) else photo
+    if not isinstance(url, str):
+        return ""
+    for placeholder, size in _PHOTO_SIZE.items():
+        url = url.replace(placeholder, size)
+    return url
+
+
+def _location(raw: Dict[str, Any]) -> str:
+    parts = [raw.get("cityName"), raw.get("districtName")]
+    return ", ".join(p for p in parts if p)
+
+
+def _price(raw: Optional[Dict[str, Any]]) -> str:
+    if not raw:
+        return "Brak ceny"
+    if raw.get("displayValue"):
+        return raw["displayValue"]
+    regular = raw.get("regularPrice") or {}
+    if regular.get("value") is not None:
+        return f"{regular['value']} {regular.get('currencySymbol') or 'zł'}"
+    return "Brak ceny"
+
+
+def _ad_from_raw(raw: Dict[str, Any]) -> Optional[OlxAd]:
+    url = raw.get("url")
+    if not url or not raw.get("title"):
+        return None
+    created = parse_timestamp(raw.get("lastRefreshTime")) or parse_timestamp(
+        raw.get("createdTime")
+    )
+    return OlxAd(
+        url=url,
+        title=raw["title"],
+        price=_price(raw.get("price")),
+        location=_location(raw.get("location") or {}),
+        created_at=created,
+        description=html_to_text(raw.get("description") or ""),
+        photos=[p for p in (_photo_url(x) for x in raw.get("photos") or []) if p],
+        ad_id=raw.get("id"),
+        category_id=(raw.get("category") or {}).get("id"),
+    )
+
+
+def parse_search_ads(state: Dict[str, Any]) -> List[OlxAd]:
+    """Return the ads listed in the state of a search results page."""
+    listing = (state.get("listing") or {}).get("listing") or {}
+    ads = []
+    for raw in listing.get("ads") or []:
+        ad = _ad_from_raw(raw)
+        if ad is not None:
+            ads.append(ad)
+    return ads
+
+
+def parse_detail_ad(state: Dict[str, Any]) -> Optional[OlxAd]:
+    """Return the ad described by the state of an item detail page."""
+    raw = (state.get("ad") or {}).get("ad")
+    return _ad_from_raw(raw) if isinstance(raw, dict) else None
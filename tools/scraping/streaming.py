@@ -0,0 +1,119 @@
+"""Incremental scanning of OLX detail pages.
+
+Detail pages are mostly scripts and markup we never look at; all the
+scraper needs is the ``ad_description`` block and the first
+``swiper-image`` tag (or the embedded page state, which contains both),
+plus the category breadcrumb links that precede them.
+`DetailPageScanner` is fed the page chunk by chunk and reports when
+everything needed has been seen so the download can be abandoned early.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+from .olx_state import STATE_MARKER
+
+_DESCRIPTION_ATTR = 'data-cy="ad_description"'
+_DIV_TOKEN = re.compile(r"<div\b|</div\s*>", re.IGNORECASE)
+_SWIPER_IMG = re.compile(
+    r"<img\b[^>]*data-testid=\"swiper-image[^\"]*\"[^>]*>", re.IGNORECASE
+)
+_BREADCRUMB_LINK = re.compile(
+    r"data-testid=\"breadcrumb-item\"[^>]*>\s*<a\b[^>]*href=\"([^\"]*)\"",
+    re.IGNORECASE,
+)
+# Longest breadcrumb fragment that may be cut by a chunk boundary.
+_BREADCRUMB_OVERLAP = 512
+
+
+class DetailPageScanner:
+    """Collect the fragments of a detail page the scraper needs."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self.description_html: Optional[str] = None
+        self.image_html: Optional[str] = None
+        self.state_script: Optional[str] = None
+        self.breadcrumbs: List[str] = []
+        self.chars_seen = 0
+        # Resume positions so each chunk is only scanned once.
+        self._desc_start: Optional[int] = None
+        self._desc_pos = 0
+        self._desc_depth = 0
+        self._img_pos = 0
+        self._state_pos = 0
+        self._crumb_pos = 0
+
+    @property
+    def done(self) -> bool:
+        if self.state_script is not None:
+            return True
+        return self.description_html is not None and self.image_html is not None
+
+    @property
+    def html(self) -> str:
+        """Markup of the fragments found so far, parseable with BeautifulSoup."""
+        return (self.description_html or "") + (self.image_html or "")
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk of the page; return True once scanning can stop."""
+        self._buffer += text
+        self.chars_seen += len(text)
+        self._scan_breadcrumbs()
+        if self.description_html is None:
+            self._scan_description()
+        if self.image_html is None:
+            self._scan_image()
+        if self.state_script is None:
+            self._scan_state()
+        return self.done
+
+    def _scan_description(self) -> None:
+        buffer = self._buffer
+        if self._desc_start is None:
+            attr = buffer.find(_DESCRIPTION_ATTR)
+            if attr == -1:
+                return
+            start = buffer.rfind("<div", 0, attr)
+            if start == -1:
+                return
+            self._desc_start = start
+            self._desc_pos = start
+            self._desc_depth = 0
+
+        for match in _DIV_TOKEN.finditer(buffer, self._desc_pos):
+            if match.group(0).startswith("</"):
+                self._desc_depth -= 1
+                if self._desc_depth == 0:
+                    self.description_html = buffer[self._desc_start : match.end()]
+                    return
+            else:
+                self._desc_depth += 1
+            self._desc_pos = match.end()
+
+    def _scan_breadcrumbs(self) -> None:
+        for match in _BREADCRUMB_LINK.finditer(self._buffer, self._crumb_pos):
+            self.breadcrumbs.append(match.group(1))
+            self._crumb_pos = match.end()
+        self._crumb_pos = max(self._crumb_pos, len(self._buffer) - _BREADCRUMB_OVERLAP)
+
+    def _scan_image(self) -> None:
+        match = _SWIPER_IMG.search(self._buffer, self._img_pos)
+        if match:
+            self.image_html = match.group(0)
+        else:
+            # An incomplete tag may still be arriving; rescan from its start.
+            last = self._buffer.rfind("<img", self._img_pos)
+            self._img_pos = last if last != -1 else max(0, len(self._buffer) - 4)
+
+    def _scan_state(self) -> None:
+        start = self._buffer.find(STATE_MARKER, self._state_pos)
+        if start == -1:
+            self._state_pos = max(0, len(self._buffer) - len(STATE_MARKER))
+            return
+        self._state_pos = start
+        end = self._buffer.find("</script>", start)
+        if end != -1:
+            self.state_script = self._buffer[start:end]
@@ -0,0 +1,80 @@
+"""Single-flight execution of async work keyed by an identifier.
+
+Concurrent callers asking for the same key share one in-flight execution,
+and (when memoisation is on) later callers reuse its result until the
+group is reset. Failures are never memoised, so the next caller retries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicate concurrent and repeated async calls for the same key."""
+
+    def __init__(self, memoize: bool = True) -> None:
+        self.memoize = memoize
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._results: Dict[Hashable, Any] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``fn()`` for *key*, running it at most once."""
+        self.calls += 1
+        if key in self._results:
+            self.cache_hits += 1
+            return self._results[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else is waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if self.memoize:
+                self._results[key] = result
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def forget(self, key: Hashable) -> None:
+        """Drop a memoised result so the next call executes again."""
+        self._results.pop(key, None)
+
+    def reset(self) -> None:
+        """Drop all memoised results and counters (in-flight calls finish)."""
+        self._results.clear()
+        self.calls = self.executions = self.coalesced = self.cache_hits = 0
+
+    @property
+    def duplicates(self) -> int:
+        """Number of calls that did not trigger their own execution."""
+        return self.coalesced + self.cache_hits
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "duplicates": self.duplicates,
+        }
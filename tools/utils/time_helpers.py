@@ -47,3 +47,20 @@ class TimeUtils:
         except ValueError:
             logger.error("Invalid time format received from OLX: %s", time_str)
             return False
+
+    @staticmethod
+    def is_recent(timestamp: datetime, n: int | None = None) -> bool:
+        """Return True if the aware *timestamp* is within *n* minutes from now.
+
+        Used for exact timestamps taken from the OLX embedded page state, where
+        no HH:MM guessing is needed. Naive datetimes are assumed to be UTC.
+
+        Args:
+            timestamp: Listing creation / refresh time.
+            n: Number of minutes. Defaults to settings.DEFAULT_LAST_MINUTES_GETTING.
+        """
+        if n is None:
+            n = settings.DEFAULT_LAST_MINUTES_GETTING
+        if timestamp.tzinfo is None:
+            timestamp = pytz.UTC.localize(timestamp)
+        return timestamp >= datetime.now(pytz.UTC) - timedelta(minutes=n)
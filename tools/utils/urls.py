@@ -0,0 +1,113 @@
+"""Canonical forms of OLX / Otodom search and item URLs.
+
+The same logical search or listing can be reached through many textual
+URLs: query parameters in a different order, tracking parameters such as
+``?reason=`` or ``utm_*``, fragments, ``olx.pl`` vs ``www.olx.pl`` or a
+missing trailing slash. Every place that compares or stores URLs (task
+deduplication, ``existing_urls`` checks, persistence) goes through these
+helpers so each search and listing is processed exactly once.
+"""
+
+from __future__ import annotations
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+OLX_HOST = "www.olx.pl"
+OTODOM_HOST = "www.otodom.pl"
+
+_HOST_ALIASES = {
+    "olx.pl": OLX_HOST,
+    "m.olx.pl": OLX_HOST,
+    "otodom.pl": OTODOM_HOST,
+    "m.otodom.pl": OTODOM_HOST,
+}
+
+# Query parameters that never change the result set of a search.
+TRACKING_PARAMS = frozenset(
+    {
+        "reason",
+        "ref",
+        "bs",
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "isPreviewActive",
+        "sessionid",
+        "search_reason",
+    }
+)
+_TRACKING_PREFIXES = ("utm_",)
+
+_MULTI_SLASH = re.compile(r"/{2,}")
+
+
+def _host(netloc: str) -> str:
+    host = netloc.lower().split("@")[-1]
+    if host.endswith(":443") or host.endswith(":80"):
+        host = host.rsplit(":", 1)[0]
+    return _HOST_ALIASES.get(host, host)
+
+
+def _is_tracking(key: str) -> bool:
+    return key in TRACKING_PARAMS or key.startswith(_TRACKING_PREFIXES)
+
+
+def _split(url: str, default_host: str = OLX_HOST):
+    url = (url or "").strip()
+    if url.startswith("//"):
+        url = "https:" + url
+    elif not re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", url):
+        url = f"https://{default_host}/" + url.lstrip("/")
+    parts = urlsplit(url)
+    path = _MULTI_SLASH.sub("/", parts.path or "/")
+    return _host(parts.netloc), path, parts.query
+
+
+def canonicalize_search_url(url: str) -> str:
+    """Return the canonical form of a marketplace search URL.
+
+    Tracking and empty query parameters are dropped, the rest are sorted, the
+    fragment is removed and the host / trailing slash are normalised. OLX
+    search paths keep their trailing slash (that is what OLX serves), other
+    hosts have it stripped.
+    """
+    host, path, query = _split(url)
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(query, keep_blank_values=True)
+        if value != "" and not _is_tracking(key)
+    )
+    if host == OLX_HOST:
+        if not path.endswith("/"):
+            path += "/"
+    else:
+        path = path.rstrip("/")
+    return urlunsplit(("https", host, path, urlencode(params), ""))
+
+
+def canonicalize_item_url(url: str) -> str:
+    """Return the canonical form of a listing URL.
+
+    OLX and Otodom listing URLs identify the ad by path alone, so the query
+    string (``?reason=...`` etc.) and fragment are dropped. Legacy OLX
+    ``/oferta/`` paths are mapped onto the current ``/d/oferta/`` form.
+    Relative URLs are resolved against www.olx.pl.
+    """
+    host, path, query = _split(url)
+    if host in (OLX_HOST, OTODOM_HOST):
+        query = ""
+        if host == OLX_HOST and path.startswith("/oferta/"):
+            path = "/d" + path
+    else:
+        query = urlencode(
+            [
+                (key, value)
+                for key, value in parse_qsl(query, keep_blank_values=True)
+                if not _is_tracking(key)
+            ]
+        )
+    if path != "/":
+        path = path.rstrip("/")
+    return urlunsplit(("https", host, path, query, ""))